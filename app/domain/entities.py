@@ -4,7 +4,12 @@ Classe de entidade que representa regras de negócio fundamentais(validação do
 """
 
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, Any
+from datetime import datetime
+from typing import Literal, Optional, Any
+
+
+# Dono atribuído quando a requisição não informa um (dados anteriores ao multi-tenant)
+DEFAULT_OWNER = "default"
 
 
 class Task(BaseModel):
@@ -12,6 +17,10 @@ class Task(BaseModel):
     title: str = Field(..., description="Title must be a non-empty string")
     description: Optional[str] = None
     completed: bool = False
+    # Campos controlados pelo servidor: ignorados na entrada
+    version: Optional[int] = None
+    updated_at: Optional[datetime] = None
+    owner_id: Optional[str] = None
 
     @field_validator('title', mode='before')
     def validate_title_type(cls, v: Any) -> str:
@@ -34,3 +43,61 @@ class Task(BaseModel):
         "from_attributes": True,
         "extra": "forbid"
     }
+
+
+class TaskPage(BaseModel):
+    """Página de tarefas obtida por cursor (keyset) sobre o id"""
+    items: list[Task]
+    next_cursor: Optional[int] = None
+
+
+# Campos aceitos em TaskStats.group_by
+STATS_GROUP_FIELDS = ("completed",)
+
+
+class TaskStatsGroup(BaseModel):
+    """Contagem de um valor do campo usado no agrupamento"""
+    value: Any
+    count: int
+
+
+class TaskStats(BaseModel):
+    """Contagens agregadas da coleção de tarefas"""
+    total: int
+    completed: int
+    pending: int
+    group_by: Optional[str] = None
+    groups: Optional[list[TaskStatsGroup]] = None
+
+    @classmethod
+    def from_counts(cls, total: int, completed: int, group_by: Optional[str] = None) -> "TaskStats":
+        """Monta as estatísticas a partir dos dois totais (os grupos por completed derivam deles)"""
+        if group_by not in (None, *STATS_GROUP_FIELDS):
+            raise ValueError(f"Unsupported group_by: {group_by}")
+        groups = None
+        if group_by == "completed":
+            groups = [
+                TaskStatsGroup(value=True, count=completed),
+                TaskStatsGroup(value=False, count=total - completed),
+            ]
+        return cls(
+            total=total, completed=completed, pending=total - completed, group_by=group_by, groups=groups
+        )
+
+
+class TaskChange(BaseModel):
+    """Entrada do log de alterações: a tarefa como ficou após a escrita (None na exclusão)"""
+    seq: int
+    op: Literal["create", "update", "delete"]
+    task_id: int
+    owner_id: Optional[str] = None
+    task: Optional[Task] = None
+    changed_at: Optional[datetime] = None
+
+
+class TaskDelta(BaseModel):
+    """Sincronização incremental: estado atual das tarefas alteradas e ids excluídos desde o token"""
+    upserts: list[Task]
+    deletes: list[int]
+    token: int
+    has_more: bool = False
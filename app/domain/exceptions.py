@@ -0,0 +1,38 @@
+"""
+Exceções de domínio, independentes da camada HTTP e da infraestrutura
+
+"""
+
+
+class VersionConflictError(Exception):
+    """A tarefa foi alterada por outro cliente desde a versão informada"""
+
+    def __init__(self, task_id: int, expected_version: int):
+        super().__init__(f"Task {task_id} is no longer at version {expected_version}")
+        self.task_id = task_id
+        self.expected_version = expected_version
+
+
+class IdempotencyKeyReusedError(Exception):
+    """A Idempotency-Key já foi usada em uma requisição com outro conteúdo"""
+
+    def __init__(self, key: str):
+        super().__init__(f"Idempotency key {key!r} was already used with a different request")
+        self.key = key
+
+
+class IdempotencyKeyInProgressError(Exception):
+    """A requisição original com esta Idempotency-Key ainda não terminou"""
+
+    def __init__(self, key: str):
+        super().__init__(f"A request with idempotency key {key!r} is still in progress")
+        self.key = key
+
+
+class ChangeLogExpiredError(Exception):
+    """O token de sincronização é anterior ao início do log retido (ou não pertence a ele)"""
+
+    def __init__(self, since: int, horizon: int):
+        super().__init__(f"Changes since {since} are no longer available (log starts after {horizon})")
+        self.since = since
+        self.horizon = horizon
@@ -3,9 +3,21 @@ Classe abstrata que atua como um contrato que define operações obrigatórias s
 
 """
 from abc import ABC, abstractmethod
-from app.domain.entities import Task
+from collections.abc import Iterator
+from app.domain.entities import Task, TaskChange, TaskDelta, TaskPage, TaskStats
+from app.domain.exceptions import ChangeLogExpiredError
+
+# Ordem dos valores em cada linha das leituras compactas (iter_rows): a dos campos de Task
+ROW_FIELDS = tuple(Task.model_fields)
+
+# Alterações lidas por chamada a changes_since na implementação genérica de changes_delta
+DELTA_SCAN_BATCH = 1000
+
 
 class TaskRepository(ABC):
+    # Dono ao qual o repositório está restrito: leituras e escritas só enxergam as tarefas dele
+    owner_id: str | None = None
+
     @abstractmethod
     def create(self, task: Task) -> Task:
         pass
@@ -19,9 +31,145 @@ class TaskRepository(ABC):
         pass
 
     @abstractmethod
-    def update(self, task_id: int, task: Task) -> Task | None:
+    def update(self, task_id: int, task: Task, expected_version: int | None = None) -> Task | None:
+        """Com expected_version, levanta VersionConflictError se a versão atual for outra"""
         pass
 
     @abstractmethod
     def delete(self, task_id: int) -> bool:
-        pass
\ No newline at end of file
+        pass
+
+    def collection_version(self) -> int | None:
+        """Versão que muda a cada escrita na coleção; None quando o repositório não a mantém"""
+        return None
+
+    def list_page(
+        self,
+        limit: int,
+        after_id: int | None = None,
+        completed: bool | None = None,
+        title_prefix: str | None = None,
+    ) -> TaskPage:
+        """Implementação genérica sobre list_all; repositórios SQL devem sobrescrever"""
+        tasks = sorted(self.list_all(), key=lambda t: t.id)
+        selected = [
+            t for t in tasks
+            if (after_id is None or t.id > after_id)
+            and (completed is None or t.completed == completed)
+            and (title_prefix is None or t.title.startswith(title_prefix))
+        ]
+        items = selected[:limit]
+        next_cursor = items[-1].id if len(selected) > limit else None
+        return TaskPage(items=items, next_cursor=next_cursor)
+
+    def list_page_rows(
+        self,
+        limit: int,
+        after_id: int | None = None,
+        completed: bool | None = None,
+        title_prefix: str | None = None,
+    ) -> tuple[list[dict], int | None]:
+        """Mesma página de list_page, mas como dicts já prontos para serializar (leitura enxuta).
+        Retorna (linhas, próximo cursor)"""
+        page = self.list_page(limit, after_id=after_id, completed=completed, title_prefix=title_prefix)
+        return [task.model_dump() for task in page.items], page.next_cursor
+
+    def iter_all(self, after_id: int | None = None, batch_size: int = 1000) -> Iterator[Task]:
+        """Percorre todas as tarefas em ordem de id, página a página"""
+        while True:
+            page = self.list_page(batch_size, after_id=after_id)
+            yield from page.items
+            if page.next_cursor is None:
+                return
+            after_id = page.next_cursor
+
+    def iter_rows(self, after_id: int | None = None, batch_size: int = 1000) -> Iterator[tuple]:
+        """Como iter_all, mas cada tarefa vem como uma tupla na ordem de ROW_FIELDS (leitura compacta
+        para varreduras grandes); repositórios SQL devem sobrescrever sem criar Task por linha"""
+        for task in self.iter_all(after_id=after_id, batch_size=batch_size):
+            yield tuple(getattr(task, name) for name in ROW_FIELDS)
+
+    def bulk_create(self, tasks: list[Task]) -> list[Task]:
+        return [self.create(task) for task in tasks]
+
+    def bulk_update(self, updates: list[tuple[int, Task]]) -> list[Task | None]:
+        """Retorna, na ordem recebida, a tarefa atualizada ou None se o id não existir"""
+        return [self.update(task_id, task) for task_id, task in updates]
+
+    def bulk_delete(self, task_ids: list[int]) -> list[bool]:
+        return [self.delete(task_id) for task_id in task_ids]
+
+    def search(self, query: str, limit: int, offset: int = 0) -> TaskPage:
+        """Busca por prefixo de palavras em title/description; next_cursor é o próximo offset.
+        Implementação genérica por varredura; repositórios devem sobrescrever com um índice"""
+        terms = query.lower().split()
+        matches = []
+        for task in sorted(self.list_all(), key=lambda t: t.id):
+            words = f"{task.title} {task.description or ''}".lower().split()
+            if terms and all(any(word.startswith(term) for word in words) for term in terms):
+                matches.append(task)
+        items = matches[offset:offset + limit]
+        next_cursor = offset + limit if len(matches) > offset + limit else None
+        return TaskPage(items=items, next_cursor=next_cursor)
+
+    def stats(self, group_by: str | None = None) -> TaskStats:
+        """Implementação genérica sobre list_all; repositórios SQL devem sobrescrever"""
+        tasks = self.list_all()
+        completed = sum(1 for t in tasks if t.completed)
+        return TaskStats.from_counts(len(tasks), completed, group_by)
+
+    def last_change_seq(self) -> int | None:
+        """Sequência da alteração mais recente; None quando o repositório não mantém log"""
+        return None
+
+    def changes_since(self, after_seq: int, limit: int) -> list[TaskChange]:
+        """Alterações com seq > after_seq, em ordem de seq; sem log (last_change_seq None), nenhuma"""
+        return []
+
+    def change_horizon(self) -> int:
+        """Maior seq já descartada do log; tokens anteriores a ela expiraram"""
+        return 0
+
+    def check_change_token(self, since: int) -> int:
+        """Levanta ChangeLogExpiredError se since estiver fora do log retido (antes do horizonte ou
+        depois da última seq); retorna a última seq. Vale para a sincronização e para o feed"""
+        head = self.last_change_seq() or 0
+        horizon = self.change_horizon()
+        if since < horizon or since > head:
+            raise ChangeLogExpiredError(since, horizon)
+        return head
+
+    def changes_delta(self, since: int | None, limit: int) -> TaskDelta:
+        """Última versão de cada tarefa alterada após since e ids excluídos; sem since, só o token atual.
+        Levanta ChangeLogExpiredError se since estiver fora do log retido (check_change_token).
+        Implementação genérica sobre changes_since; repositórios SQL devem sobrescrever"""
+        if since is None:
+            return TaskDelta(upserts=[], deletes=[], token=self.last_change_seq() or 0)
+        head = self.check_change_token(since)
+        # Só a última alteração de cada tarefa, na ordem dessa última alteração
+        latest: dict[int, TaskChange] = {}
+        after_seq = since
+        while True:
+            batch = self.changes_since(after_seq, DELTA_SCAN_BATCH)
+            for change in batch:
+                latest.pop(change.task_id, None)
+                latest[change.task_id] = change
+            if len(batch) < DELTA_SCAN_BATCH:
+                break
+            after_seq = batch[-1].seq
+        changes = list(latest.values())
+
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        return TaskDelta(
+            upserts=[change.task for change in changes if change.task is not None],
+            deletes=[change.task_id for change in changes if change.task is None],
+            token=changes[-1].seq if has_more else head,
+            has_more=has_more,
+        )
+
+    @abstractmethod
+    def create_idempotent(self, task: Task, key: str, fingerprint: str) -> tuple[Task, bool]:
+        """Cria a tarefa uma única vez por key; repetições devolvem a tarefa original e True.
+        Levanta IdempotencyKeyReusedError se a key já foi usada com outro fingerprint"""
+        pass
@@ -0,0 +1,293 @@
+"""
+Cache de leitura para o repositório de tarefas: um decorator de TaskRepository que atende
+ get_by_id a partir de um backend de cache plugável e o invalida nas escritas.
+
+"""
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterator
+from typing import Any
+
+from app.domain.entities import Task, TaskChange, TaskDelta, TaskPage, TaskStats
+from app.domain.repositories import TaskRepository
+from app.infra.database.config import DATA_DIR
+from app.infra.metrics import Counter, Gauge
+
+
+class CacheBackend(ABC):
+    """Contrato dos backends de cache; os contadores ficam disponíveis em stats()"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class LRUCache(CacheBackend):
+    """Cache em memória do processo, limitado por tamanho (LRU) e com expiração por TTL"""
+
+    def __init__(self, max_size: int = 1024, ttl: float | None = 30.0):
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl else float("inf")
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Cache compartilhado entre workers da mesma máquina (substituto local de um cache distribuído).
+    Guarda tarefas como JSON: o arquivo é compartilhado, então nada lido dele é executado"""
+
+    # O limite de tamanho é aplicado a cada TRIM_EVERY escritas, então é aproximado
+    TRIM_EVERY = 100
+
+    def __init__(self, path: str, max_size: int = 10_000, ttl: float | None = 30.0):
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_expires_at ON cache (expires_at)")
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Task | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < time.time():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return Task.model_validate_json(row[0])
+
+    def set(self, key: str, value: Task) -> None:
+        expires_at = time.time() + self.ttl if self.ttl else float("inf")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value.model_dump_json(), expires_at),
+            )
+            self._writes += 1
+            if self._writes % self.TRIM_EVERY:
+                return
+            # Remove os expirados e, acima do limite, os que vencem antes
+            evicted = self._conn.execute(
+                "DELETE FROM cache WHERE expires_at < ? OR key IN ("
+                "SELECT key FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (time.time(), self.max_size),
+            ).rowcount
+            self.evictions += max(evicted, 0)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+
+def create_cache_backend() -> CacheBackend | None:
+    """Monta o backend a partir das variáveis de ambiente TASK_CACHE_*. Desligado por padrão: com
+    vários workers, o cache de um processo não vê as invalidações dos outros e serve a versão
+    antiga até o TTL, então só deve ser ligado onde essa defasagem é aceitável"""
+    backend = os.getenv("TASK_CACHE_BACKEND", "none").lower()
+    max_size = int(os.getenv("TASK_CACHE_SIZE", "1024"))
+    ttl = float(os.getenv("TASK_CACHE_TTL", "30")) or None
+
+    if backend in ("none", "off", ""):
+        return None
+    if backend == "sqlite":
+        path = os.getenv("TASK_CACHE_PATH") or os.path.join(DATA_DIR, "task_cache.db")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return SQLiteCacheBackend(path, max_size=max_size, ttl=ttl)
+    return LRUCache(max_size=max_size, ttl=ttl)
+
+
+def cache_metrics_collector(cache: CacheBackend):
+    """Coletor para o registro de métricas com os contadores do cache"""
+
+    def collect():
+        events = Counter("task_cache_events_total", "Acertos, faltas e remoções do cache de tarefas", ("event",))
+        for name, value in cache.stats().items():
+            events.inc(name, amount=value)
+        metrics = [events]
+        if isinstance(cache, LRUCache):
+            size = Gauge("task_cache_entries", "Entradas no cache de tarefas do processo")
+            size.set(len(cache))
+            metrics.append(size)
+        return metrics
+
+    return collect
+
+
+class CachedTaskRepository(TaskRepository):
+    """Leitura com read-through em get_by_id; create/update/delete invalidam as chaves afetadas"""
+
+    def __init__(self, repository: TaskRepository, cache: CacheBackend, populate: bool = True):
+        self.repository = repository
+        self.cache = cache
+        self.owner_id = repository.owner_id
+        # Sem populate, as faltas não voltam ao cache: leituras de uma réplica atrasada poderiam
+        # regravar a versão antiga logo depois de uma escrita tê-la invalidado
+        self.populate = populate
+
+    def _key(self, task_id: int) -> str:
+        # O dono faz parte da chave: o mesmo id em outro dono (ou shard) é outra tarefa
+        if self.owner_id is None:
+            return f"task:{task_id}"
+        return f"task:{self.owner_id}:{task_id}"
+
+    def create(self, task: Task) -> Task:
+        return self.repository.create(task)
+
+    def create_idempotent(self, task: Task, key: str, fingerprint: str) -> tuple[Task, bool]:
+        return self.repository.create_idempotent(task, key, fingerprint)
+
+    def get_by_id(self, task_id: int) -> Task | None:
+        key = self._key(task_id)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        task = self.repository.get_by_id(task_id)
+        if task is not None and self.populate:
+            self.cache.set(key, task)
+        return task
+
+    def list_all(self) -> list[Task]:
+        return self.repository.list_all()
+
+    def collection_version(self) -> int | None:
+        return self.repository.collection_version()
+
+    def list_page_rows(
+        self,
+        limit: int,
+        after_id: int | None = None,
+        completed: bool | None = None,
+        title_prefix: str | None = None,
+    ) -> tuple[list[dict], int | None]:
+        return self.repository.list_page_rows(
+            limit, after_id=after_id, completed=completed, title_prefix=title_prefix
+        )
+
+    def stats(self, group_by: str | None = None) -> TaskStats:
+        return self.repository.stats(group_by)
+
+    def last_change_seq(self) -> int | None:
+        return self.repository.last_change_seq()
+
+    def changes_since(self, after_seq: int, limit: int) -> list[TaskChange]:
+        return self.repository.changes_since(after_seq, limit)
+
+    def change_horizon(self) -> int:
+        return self.repository.change_horizon()
+
+    def check_change_token(self, since: int) -> int:
+        return self.repository.check_change_token(since)
+
+    def changes_delta(self, since: int | None, limit: int) -> TaskDelta:
+        return self.repository.changes_delta(since, limit)
+
+    def search(self, query: str, limit: int, offset: int = 0) -> TaskPage:
+        return self.repository.search(query, limit, offset)
+
+    def iter_all(self, after_id: int | None = None, batch_size: int = 1000) -> Iterator[Task]:
+        return self.repository.iter_all(after_id=after_id, batch_size=batch_size)
+
+    def iter_rows(self, after_id: int | None = None, batch_size: int = 1000) -> Iterator[tuple]:
+        return self.repository.iter_rows(after_id=after_id, batch_size=batch_size)
+
+    def update(self, task_id: int, task: Task, expected_version: int | None = None) -> Task | None:
+        try:
+            return self.repository.update(task_id, task, expected_version=expected_version)
+        finally:
+            self.cache.delete(self._key(task_id))
+
+    def delete(self, task_id: int) -> bool:
+        try:
+            return self.repository.delete(task_id)
+        finally:
+            self.cache.delete(self._key(task_id))
+
+    def bulk_create(self, tasks: list[Task]) -> list[Task]:
+        return self.repository.bulk_create(tasks)
+
+    def bulk_update(self, updates: list[tuple[int, Task]]) -> list[Task | None]:
+        try:
+            return self.repository.bulk_update(updates)
+        finally:
+            for task_id, _ in updates:
+                self.cache.delete(self._key(task_id))
+
+    def bulk_delete(self, task_ids: list[int]) -> list[bool]:
+        try:
+            return self.repository.bulk_delete(task_ids)
+        finally:
+            for task_id in task_ids:
+                self.cache.delete(self._key(task_id))
@@ -0,0 +1,149 @@
+"""
+Feed de mudanças em processo: um único leitor por engine consulta o log de alterações
+ (task_changes) e distribui cada lote, já serializado, para os assinantes conectados
+ (SSE/WebSocket) do dono de cada alteração, sem nenhuma consulta ao banco por assinante.
+
+"""
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.entities import DEFAULT_OWNER, TaskChange
+from app.infra.database.repository import change_log_head, read_change_log
+
+CHANGE_FEED_POLL_INTERVAL = float(os.getenv("CHANGE_FEED_POLL_INTERVAL", "0.25"))  # segundos
+CHANGE_FEED_BATCH_SIZE = 500
+# Lotes pendentes por assinante antes de ele ser considerado lento e desconectado
+CHANGE_FEED_MAX_PENDING = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeFeedOverflow(Exception):
+    """O assinante não acompanhou o feed; deve reconectar a partir da última seq recebida"""
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    seq: int
+    op: str
+    data: bytes
+    owner_id: str | None = None
+
+    @classmethod
+    def from_change(cls, change: TaskChange) -> "ChangeEvent":
+        return cls(seq=change.seq, op=change.op, data=change.model_dump_json().encode(), owner_id=change.owner_id)
+
+
+class Subscription:
+    def __init__(self, start_seq: int, max_pending: int, owner_id: str = DEFAULT_OWNER):
+        # Posição do feed no momento da assinatura: tudo depois dela chega pela fila
+        self.start_seq = start_seq
+        self.owner_id = owner_id
+        self.overflowed = False
+        self._queue: asyncio.Queue[list[ChangeEvent]] = asyncio.Queue(max_pending)
+
+    def publish(self, events: list[ChangeEvent]) -> None:
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(events)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout: float) -> list[ChangeEvent]:
+        """Próximo lote de eventos; lista vazia se nada chegou dentro do timeout"""
+        if self.overflowed and self._queue.empty():
+            raise ChangeFeedOverflow()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+
+
+class ChangeFeed:
+    def __init__(
+        self,
+        session_factory,
+        poll_interval: float = CHANGE_FEED_POLL_INTERVAL,
+        batch_size: int = CHANGE_FEED_BATCH_SIZE,
+        max_pending: int = CHANGE_FEED_MAX_PENDING,
+    ):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.position = 0
+        self._subscribers: set[Subscription] = set()
+        self._loop = None
+        self._lock = None
+        self._task = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def subscribe(self, owner_id: str = DEFAULT_OWNER) -> Subscription:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._lock, self._task = loop, asyncio.Lock(), None
+        async with self._lock:
+            # O leitor só roda enquanto houver assinantes e recomeça do fim do log
+            if self._task is None or self._task.done():
+                self.position = await asyncio.to_thread(self._head)
+                self._task = loop.create_task(self._run())
+            subscription = Subscription(self.position, self.max_pending, owner_id)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def _head(self) -> int:
+        with self.session_factory() as db:
+            return change_log_head(db)
+
+    def _read(self, after_seq: int) -> list[TaskChange]:
+        # Uma leitura para todos os donos; cada assinante recebe só as alterações do seu
+        with self.session_factory() as db:
+            return read_change_log(db, after_seq, self.batch_size)
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            try:
+                changes = await asyncio.to_thread(self._read, self.position)
+            except Exception:
+                # Falha do banco: registrada, e a leitura é refeita da mesma posição no próximo ciclo
+                logger.exception("Change feed read failed after seq %d", self.position)
+                changes = []
+            if changes:
+                self.position = changes[-1].seq
+                by_owner: dict[str | None, list[ChangeEvent]] = {}
+                for change in changes:
+                    by_owner.setdefault(change.owner_id, []).append(ChangeEvent.from_change(change))
+                for subscription in list(self._subscribers):
+                    events = by_owner.get(subscription.owner_id)
+                    if events:
+                        subscription.publish(events)
+            if len(changes) < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+
+# Um feed por engine, compartilhado por todas as conexões do processo
+_feeds = weakref.WeakKeyDictionary()
+_feeds_lock = threading.Lock()
+
+
+def change_feed_for(engine: Engine) -> ChangeFeed:
+    with _feeds_lock:
+        feed = _feeds.get(engine)
+        if feed is None:
+            feed = ChangeFeed(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+            _feeds[engine] = feed
+        return feed
@@ -4,9 +4,13 @@ atuando como uma dependência de infraestrutura essencial para persistência de
 
 """
 import os
-from sqlalchemy import create_engine
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import QueuePool, StaticPool
+from app.infra.metrics import METRICS_ENABLED, instrument_engine, timed_pool_class
 
 # Configuração base
 Base = declarative_base()
@@ -14,33 +18,219 @@ Base = declarative_base()
 # Verifica se está em modo de teste (pode ser definido via variável de ambiente)
 TESTING = os.getenv("TESTING", "False").lower() in ("true", "1", "t")
 
+# Perfis de PRAGMAs aplicados a cada nova conexão SQLite.
+# "performance": WAL permite leitores concorrentes a um escritor, synchronous=NORMAL
+# só faz fsync nos checkpoints do WAL e busy_timeout espera o lock em vez de falhar.
+SQLITE_PROFILES = {
+    "default": {},
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,       # ms
+        "cache_size": -64000,       # valor negativo = KiB (64 MB)
+        "mmap_size": 268435456,     # 256 MB
+        "temp_store": "MEMORY",
+    },
+}
+
+DB_PROFILE = os.getenv("DB_PROFILE", "performance").lower()
+
+# Pool de conexões (usado por bancos em arquivo e servidores como PostgreSQL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # segundos; -1 desativa
+
+# Log de alterações: por quanto tempo as entradas ficam disponíveis para sincronização
+# e de quanto em quanto tempo (s) a manutenção em segundo plano compacta as mais antigas (0 desativa)
+CHANGE_LOG_RETENTION_DAYS = float(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+CHANGE_LOG_COMPACT_INTERVAL = float(os.getenv("CHANGE_LOG_COMPACT_INTERVAL", "3600"))
+
+# Idempotency-Key do POST /tasks: por quanto tempo (s) a resposta original é guardada
+# e quantas chaves o cache do processo mantém à frente da tabela
+IDEMPOTENCY_KEY_TTL = float(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+
+# Leituras de um dono que escreveu há menos de READ_STICKY_SECONDS vão ao banco principal,
+# não ao pool de leitura (read-your-writes com réplicas atrasadas); 0 desativa
+READ_STICKY_SECONDS = float(os.getenv("READ_STICKY_SECONDS", "0"))
+READ_STICKY_CLIENTS = int(os.getenv("READ_STICKY_CLIENTS", "10000"))
+
+
+def sqlite_pragmas(profile: str) -> dict:
+    """PRAGMAs do perfil; cada um pode ser sobrescrito por SQLITE_<NOME> (ex.: SQLITE_BUSY_TIMEOUT)"""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown database profile: {profile}")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in SQLITE_PROFILES["performance"]:
+        override = os.getenv(f"SQLITE_{name.upper()}")
+        if override:
+            pragmas[name] = override
+    return pragmas
+
+
+def _pool_class(pool_class):
+    return timed_pool_class(pool_class) if METRICS_ENABLED else pool_class
+
+
+def _instrument(engine: Engine) -> Engine:
+    return instrument_engine(engine) if METRICS_ENABLED else engine
+
+
+def sqlite_read_only_url(url: str) -> str | None:
+    """URL somente leitura (mode=ro) para o mesmo arquivo SQLite; None se não for um arquivo"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or not parsed.database or parsed.database == ":memory:":
+        return None
+    return f"sqlite:///file:{os.path.abspath(parsed.database)}?mode=ro&uri=true"
+
+
+def create_sqlite_engine(url: str, profile: str = DB_PROFILE, read_only: bool = False) -> Engine:
+    in_memory = url in ("sqlite://", "sqlite:///:memory:")
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        # Banco em memória precisa de uma conexão única compartilhada entre as threads;
+        # em arquivo, um pool de conexões reaproveitadas evita reabrir o arquivo a cada sessão
+        poolclass=_pool_class(StaticPool if in_memory else QueuePool),
+        **({} if in_memory else {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}),
+    )
+    _instrument(engine)
+    pragmas = sqlite_pragmas(profile)
+    if read_only:
+        # O modo WAL fica gravado no arquivo (definido pelo escritor); uma conexão mode=ro não o altera
+        pragmas.pop("journal_mode", None)
+
+    if pragmas:
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    return engine
+
+
+def create_database_engine(url: str, profile: str = DB_PROFILE, read_only: bool = False) -> Engine:
+    """Cria a engine do backend indicado pela URL (SQLite, PostgreSQL, ...); read_only indica o
+    pool de leitura (réplica ou SQLite mode=ro), que não cria o arquivo nem muda o journal"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        if read_only:
+            return create_sqlite_engine(url, profile, read_only=True)
+        if parsed.database and parsed.database != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(parsed.database)), exist_ok=True)
+        return create_sqlite_engine(url, profile)
+    return _instrument(create_engine(
+        url,
+        poolclass=_pool_class(QueuePool),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    ))
+
+
+# Diretório dos arquivos locais da aplicação (banco SQLite padrão; rate limit e cache em sqlite)
+DATA_DIR = os.getenv("DATA_DIR") or os.path.join(os.path.dirname(__file__), '..', '..', 'sqlite_db')
+
 if TESTING:
     # Configuração para testes - banco em memória
     SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, 
-        connect_args={"check_same_thread": False}
-    )
 else:
-    # Configuração para desenvolvimento/produção
-    DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'sqlite_db', 'tasks.db')
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, 
-        connect_args={"check_same_thread": False}
-    )
+    # Configuração para desenvolvimento/produção: DATABASE_URL ou o arquivo SQLite padrão
+    DB_PATH = os.path.join(DATA_DIR, 'tasks.db')
+    SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL") or f"sqlite:///{DB_PATH}"
+
+# A engine é criada sob demanda (ou por configure_database, no lifespan da app): importar
+# este módulo não abre conexões nem cria diretórios
+_engine: Engine | None = None
+_session_factory: sessionmaker | None = None
+# Pool de leitura opcional (réplica ou SQLite mode=ro), separado das conexões que escrevem
+_read_engine: Engine | None = None
+_read_session_factory: sessionmaker | None = None
+_engine_lock = threading.RLock()
+
+
+def configure_database(
+    url: str = SQLALCHEMY_DATABASE_URL, profile: str = DB_PROFILE, read_url: str | None = None
+) -> Engine:
+    """Cria a engine do processo para a URL, substituindo (e liberando) a anterior, e a de
+    leitura para read_url (sem ela, as leituras usam a própria engine)"""
+    global _engine, _session_factory, _read_engine, _read_session_factory
+    with _engine_lock:
+        previous = (_engine, _read_engine)
+        _engine = create_database_engine(url, profile)
+        _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+        _read_engine = create_database_engine(read_url, profile, read_only=True) if read_url else None
+        _read_session_factory = (
+            sessionmaker(autocommit=False, autoflush=False, bind=_read_engine) if _read_engine is not None else None
+        )
+    for engine in previous:
+        if engine is not None:
+            engine.dispose()
+    return _engine
+
+
+def get_engine() -> Engine:
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                configure_database()
+    return _engine
+
+
+def get_session_factory() -> sessionmaker:
+    get_engine()
+    return _session_factory
+
+
+def get_read_engine() -> Engine | None:
+    return _read_engine
+
+
+def dispose_database() -> None:
+    """Fecha as conexões dos pools (fim do lifespan); a próxima sessão recria a engine"""
+    global _engine, _session_factory, _read_engine, _read_session_factory
+    with _engine_lock:
+        engines = (_engine, _read_engine)
+        _engine = _session_factory = _read_engine = _read_session_factory = None
+    for engine in engines:
+        if engine is not None:
+            engine.dispose()
+
+
+def __getattr__(name: str):
+    # Compatibilidade: config.engine e config.SessionLocal continuam disponíveis, agora sob demanda
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Função para injetar a sessão do banco (usada em endpoints FastAPI/Flask)
 def get_db():
-    db = SessionLocal()
+    db = get_session_factory()()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db():
+    """Sessão do pool de leitura, ou None quando não há um configurado"""
+    factory = _read_session_factory
+    if factory is None:
+        yield None
+        return
+    db = factory()
     try:
         yield db
     finally:
         db.close()
 
+
 # Função para criar tabelas (útil para testes e inicialização)
 def create_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=get_engine())
@@ -0,0 +1,192 @@
+"""
+Group commit opcional: as escritas das requisições concorrentes entram em uma fila atendida por
+ uma única thread escritora, que as aplica em lote em uma só transação (até GROUP_COMMIT_MAX_BATCH
+ escritas ou GROUP_COMMIT_MAX_DELAY_MS de espera). Cada requisição aguarda o futuro da sua escrita,
+ resolvido só depois do commit do lote: a resposta continua saindo com o dado já durável.
+
+"""
+import os
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.domain.entities import DEFAULT_OWNER, Task
+from app.infra.database.repository import SQLTaskRepository
+from app.infra.metrics import DB_GROUP_COMMIT_BATCH, METRICS_ENABLED
+
+GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "False").lower() in ("true", "1", "t")
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "64"))
+GROUP_COMMIT_MAX_DELAY = float(os.getenv("GROUP_COMMIT_MAX_DELAY_MS", "2")) / 1000  # segundos
+
+
+@dataclass
+class _Write:
+    owner_id: str
+    method: str
+    args: tuple
+    future: Future = field(default_factory=Future)
+
+
+class GroupCommitWriter:
+    def __init__(
+        self,
+        session_factory,
+        max_batch: int = GROUP_COMMIT_MAX_BATCH,
+        max_delay: float = GROUP_COMMIT_MAX_DELAY,
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.writes = 0
+        self._queue: queue.SimpleQueue[_Write | None] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, owner_id: str, method: str, *args) -> Future:
+        """Enfileira repository.<method>(*args) do dono; o futuro resolve após o commit do lote"""
+        write = _Write(owner_id, method, args)
+        with self._lock:
+            # A thread só existe a partir da primeira escrita
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+                self._thread.start()
+        self._queue.put(write)
+        return write.future
+
+    def close(self, timeout: float | None = None) -> None:
+        """Aplica o que já está na fila e encerra a thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _next_batch(self) -> tuple[list[_Write], bool]:
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        # Espera no máximo max_delay por mais escritas; o que chegar durante o commit anterior já está na fila
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                write = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if write is None:
+                return batch, True
+            batch.append(write)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            if batch:
+                self._apply(batch)
+
+    def _apply(self, batch: list[_Write]) -> None:
+        outcomes = []
+        try:
+            with self.session_factory() as db:
+                for write in batch:
+                    repository = SQLTaskRepository(db, write.owner_id, autocommit=False)
+                    try:
+                        # Cada escrita no seu savepoint: a que falha desfaz só o que ela gravou, e a
+                        # transação do lote segue válida (no PostgreSQL, um erro a abortaria inteira)
+                        with db.begin_nested():
+                            result = getattr(repository, write.method)(*write.args)
+                    except Exception as error:
+                        outcomes.append((None, error))
+                    else:
+                        outcomes.append((result, None))
+                db.commit()
+        except Exception:
+            # Falha no próprio commit do lote: cada escrita é refeita na sua própria transação
+            for write in batch:
+                self._apply_alone(write)
+            return
+
+        self.batches += 1
+        self.writes += len(batch)
+        if METRICS_ENABLED:
+            DB_GROUP_COMMIT_BATCH.observe(len(batch))
+        for write, (result, error) in zip(batch, outcomes):
+            if error is not None:
+                write.future.set_exception(error)
+            else:
+                write.future.set_result(result)
+
+    def _apply_alone(self, write: _Write) -> None:
+        try:
+            with self.session_factory() as db:
+                result = getattr(SQLTaskRepository(db, write.owner_id), write.method)(*write.args)
+        except Exception as error:
+            write.future.set_exception(error)
+        else:
+            write.future.set_result(result)
+
+
+class GroupCommitTaskRepository(SQLTaskRepository):
+    """Leituras na sessão da requisição; escritas pelo escritor de group commit"""
+
+    def __init__(
+        self, db: Session, writer: GroupCommitWriter, owner_id: str = DEFAULT_OWNER, read_db: Session | None = None
+    ):
+        super().__init__(db, owner_id, read_db=read_db)
+        self.writer = writer
+
+    def _write(self, method: str, *args):
+        result = self.writer.submit(self.owner_id, method, *args).result()
+        # A sessão da requisição pode ter objetos carregados antes da escrita
+        self.db.expire_all()
+        return result
+
+    def create(self, task: Task) -> Task:
+        return self._write("create", task)
+
+    def create_idempotent(self, task: Task, key: str, fingerprint: str) -> tuple[Task, bool]:
+        return self._write("create_idempotent", task, key, fingerprint)
+
+    def update(self, task_id: int, task: Task, expected_version: int | None = None) -> Task | None:
+        return self._write("update", task_id, task, expected_version)
+
+    def delete(self, task_id: int) -> bool:
+        return self._write("delete", task_id)
+
+    def bulk_create(self, tasks: list[Task]) -> list[Task]:
+        return self._write("bulk_create", tasks)
+
+    def bulk_update(self, updates: list[tuple[int, Task]]) -> list[Task | None]:
+        return self._write("bulk_update", updates)
+
+    def bulk_delete(self, task_ids: list[int]) -> list[bool]:
+        return self._write("bulk_delete", task_ids)
+
+
+# Um escritor por engine, compartilhado por todas as requisições do processo
+_writers = weakref.WeakKeyDictionary()
+_writers_lock = threading.Lock()
+
+
+def group_commit_writer_for(engine: Engine) -> GroupCommitWriter:
+    with _writers_lock:
+        writer = _writers.get(engine)
+        if writer is None:
+            writer = GroupCommitWriter(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+            _writers[engine] = writer
+        return writer
+
+
+def close_group_commit_writers() -> None:
+    """Aplica as escritas pendentes e encerra as threads escritoras (fim do lifespan)"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
@@ -0,0 +1,39 @@
+"""
+Manutenção periódica do banco, fora das requisições: a cada CHANGE_LOG_COMPACT_INTERVAL uma
+ tarefa do lifespan compacta o log de alterações e remove as chaves de idempotência expiradas
+ em cada banco do processo (o principal e os shards), em uma thread à parte do event loop.
+
+"""
+import asyncio
+import logging
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.infra.database.config import CHANGE_LOG_COMPACT_INTERVAL
+from app.infra.database.repository import SQLTaskRepository
+
+logger = logging.getLogger(__name__)
+
+
+def run_maintenance(engines: list[Engine]) -> None:
+    """Uma rodada de manutenção; a falha em um banco é registrada e não impede os demais"""
+    for engine in engines:
+        try:
+            with Session(engine) as db:
+                SQLTaskRepository(db).run_maintenance()
+        except SQLAlchemyError:
+            # Nova tentativa na próxima rodada
+            logger.exception("Database maintenance failed for %s", engine.url.render_as_string())
+
+
+async def maintenance_loop(
+    engines: list[Engine], stop: asyncio.Event, interval: float = CHANGE_LOG_COMPACT_INTERVAL
+) -> None:
+    """Roda a manutenção a cada interval segundos até stop ser sinalizado; uma rodada em
+    andamento termina antes de o loop sair"""
+    while True:
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+            return
+        except asyncio.TimeoutError:
+            await asyncio.to_thread(run_maintenance, engines)
@@ -0,0 +1,75 @@
+"""
+Atualização do esquema: cria tabelas, colunas e índices que ainda não existem em um banco
+ criado por uma versão anterior da aplicação e remove apenas o que foi substituído
+ (índices e contadores anteriores à separação por dono). Pode ser executada várias vezes.
+
+"""
+from sqlalchemy import delete, insert, inspect, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
+from app.infra.database.config import Base
+from app.infra.database import models  # registra os modelos em Base.metadata
+
+
+def upgrade_schema(engine: Engine) -> None:
+    Base.metadata.create_all(bind=engine)
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        # Bancos anteriores à separação por dono: todas as tarefas passam ao dono padrão
+        owner_added = "owner_id" not in {column["name"] for column in inspector.get_columns("tasks")}
+        for table in Base.metadata.sorted_tables:
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
+
+        existing = {index["name"] for index in inspector.get_indexes("tasks")}
+        for name in models.OBSOLETE_INDEXES:
+            if name in existing:
+                conn.execute(text(f"DROP INDEX {name}"))
+
+        if owner_added:
+            # Os triggers antigos não conhecem owner_id: são recriados (e os totais recontados) abaixo
+            models.drop_triggers(conn, "tasks_stats")
+            models.drop_triggers(conn, "tasks_changes")
+            changes = models.TaskChangeModel.__table__
+            conn.execute(
+                changes.update().where(changes.c.owner_id.is_(None)).values(owner_id=models.DEFAULT_OWNER)
+            )
+
+        # Bancos anteriores à busca textual: cria o índice e indexa as tarefas existentes
+        if models.FTS_TABLE not in inspector.get_table_names():
+            models.install_fts(conn, rebuild=True)
+
+        # Bancos anteriores às estatísticas: cria os triggers e conta as tarefas existentes
+        if models.supports_stats_triggers(conn) and not models.has_stats_triggers(conn):
+            models.install_stats_triggers(conn, recount=True)
+
+        # Os totais e a versão globais deram lugar aos de cada dono em task_owner_stats. A versão
+        # global é o ponto de partida da de cada dono, para que nenhuma ETag já emitida se repita
+        counters = models.TaskCounterModel.__table__
+        stats = models.TaskOwnerStatsModel.__table__
+        legacy_version = conn.scalar(
+            select(counters.c.value).where(counters.c.name == models.LEGACY_COLLECTION_VERSION)
+        )
+        if legacy_version:
+            conn.execute(update(stats).where(stats.c.version < legacy_version).values(version=legacy_version))
+            owners = select(models.TaskModel.owner_id).distinct().where(
+                models.TaskModel.owner_id.not_in(select(stats.c.owner_id))
+            )
+            for owner_id in conn.scalars(owners).all():
+                conn.execute(insert(stats).values(owner_id=owner_id, total=0, completed=0, version=legacy_version))
+        conn.execute(delete(counters).where(counters.c.name.in_(models.LEGACY_COUNTERS)))
+
+        # Bancos anteriores ao feed de mudanças: o log começa a partir daqui
+        for name in (models.CHANGE_SEQ, models.CHANGE_HORIZON):
+            if conn.execute(select(counters.c.value).where(counters.c.name == name)).first() is None:
+                conn.execute(insert(counters).values(name=name, value=0))
+        if models.supports_change_log(conn) and not models.has_change_log(conn):
+            models.install_change_log(conn)
@@ -4,14 +4,335 @@ Classe que representa o modelo relacional da entidade Task no banco de dados,
 
 """
 
-from sqlalchemy import Column, Integer, String, Boolean
-from sqlalchemy.orm import declarative_base
-
-Base = declarative_base()
+from sqlalchemy import (
+    Column, Integer, String, Boolean, DateTime, Index, Text, DDL, case, event, func, insert, select, text, update
+)
+from app.domain.entities import DEFAULT_OWNER
+from app.infra.database.config import Base
 
 class TaskModel(Base):
     __tablename__ = "tasks"
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(100), nullable=False)
     description = Column(String(500), nullable=True)
-    completed = Column(Boolean, default=False)
\ No newline at end of file
+    completed = Column(Boolean, default=False)
+    # Incrementada a cada escrita; base das ETags e do controle otimista de concorrência
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
+    owner_id = Column(String(64), nullable=False, default=DEFAULT_OWNER, server_default=DEFAULT_OWNER)
+
+    # Índices que sustentam a paginação por cursor com filtros, sempre dentro de um dono:
+    # a consulta de um tenant percorre só a faixa dele, qualquer que seja o tamanho dos outros
+    __table_args__ = (
+        Index("ix_tasks_owner_id_id", "owner_id", "id"),
+        Index("ix_tasks_owner_id_completed_id", "owner_id", "completed", "id"),
+        Index("ix_tasks_owner_id_title", "owner_id", "title"),
+    )
+
+
+# Índices substituídos pelas versões por dono; removidos pela migração
+OBSOLETE_INDEXES = ("ix_tasks_completed_id", "ix_tasks_title")
+
+
+class TaskOwnerStatsModel(Base):
+    """Totais de cada dono para as estatísticas, mantidos por triggers (pendentes = total - concluídas),
+    e a versão da coleção do dono"""
+    __tablename__ = "task_owner_stats"
+    owner_id = Column(String(64), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    # Muda a cada escrita do dono (ETag da listagem sem varrer a tabela). Fica na mesma linha dos
+    # totais, que a escrita já trava: não há uma linha global disputada por todos os donos
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class TaskCounterModel(Base):
+    """Contadores agregados da coleção de tarefas, mantidos a cada escrita"""
+    __tablename__ = "task_counters"
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class TaskChangeModel(Base):
+    """Log ordenado de alterações das tarefas (alimentado por triggers), base do feed de mudanças"""
+    __tablename__ = "task_changes"
+    seq = Column(Integer, primary_key=True, autoincrement=False)
+    task_id = Column(Integer, nullable=False)
+    owner_id = Column(String(64), nullable=True)
+    op = Column(String(10), nullable=False)
+    # Estado da tarefa após a escrita; vazio nas exclusões
+    version = Column(Integer, nullable=True)
+    title = Column(String(100), nullable=True)
+    description = Column(String(500), nullable=True)
+    completed = Column(Boolean, nullable=True)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Última alteração de cada tarefa (sincronização incremental) e compactação por idade
+        Index("ix_task_changes_task_id_seq", "task_id", "seq"),
+        Index("ix_task_changes_owner_id_seq", "owner_id", "seq"),
+        Index("ix_task_changes_changed_at", "changed_at"),
+    )
+
+
+class IdempotencyKeyModel(Base):
+    """Resposta original de cada POST /tasks com Idempotency-Key, até expires_at"""
+    __tablename__ = "idempotency_keys"
+    owner_id = Column(String(64), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    task_id = Column(Integer, nullable=True)
+    response = Column(Text, nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        # Remoção das chaves expiradas sem varrer a tabela
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+
+# Último número de sequência do log de alterações
+CHANGE_SEQ = "change_seq"
+# Maior seq já removida pela compactação: tokens de sincronização anteriores expiraram
+CHANGE_HORIZON = "change_horizon"
+# Versão global da coleção, anterior à versão de cada dono em task_owner_stats
+LEGACY_COLLECTION_VERSION = "version"
+# Contadores globais anteriores à separação por dono (totais e versão da coleção); removidos pela migração
+LEGACY_COUNTERS = ("total", "completed", LEGACY_COLLECTION_VERSION)
+
+event.listen(
+    TaskCounterModel.__table__,
+    "after_create",
+    DDL(f"INSERT INTO task_counters (name, value) VALUES ('{CHANGE_SEQ}', 0), ('{CHANGE_HORIZON}', 0)"),
+)
+
+
+# Triggers que mantêm os totais de cada dono na mesma transação de cada escrita,
+# cobrindo também inserções em lote e escritas feitas fora do repositório
+_COMPLETED = "CASE WHEN {row}.completed THEN 1 ELSE 0 END"
+_STATS_ADD = (
+    "INSERT INTO task_owner_stats (owner_id, total, completed) "
+    "VALUES ({row}.owner_id, 1, " + _COMPLETED + ") "
+    "ON CONFLICT (owner_id) DO UPDATE SET total = task_owner_stats.total + 1, "
+    "completed = task_owner_stats.completed + excluded.completed;"
+)
+_STATS_REMOVE = (
+    "UPDATE task_owner_stats SET total = total - 1, completed = completed - " + _COMPLETED + " "
+    "WHERE owner_id = {row}.owner_id;"
+)
+
+STATS_DDL = {
+    "sqlite": [
+        "CREATE TRIGGER IF NOT EXISTS tasks_stats_ai AFTER INSERT ON tasks BEGIN "
+        + _STATS_ADD.format(row="new") + " END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_stats_ad AFTER DELETE ON tasks BEGIN "
+        + _STATS_REMOVE.format(row="old") + " END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_stats_au AFTER UPDATE OF completed, owner_id ON tasks "
+        f"WHEN {_COMPLETED.format(row='new')} <> {_COMPLETED.format(row='old')} "
+        "OR new.owner_id <> old.owner_id BEGIN "
+        + _STATS_REMOVE.format(row="old") + " " + _STATS_ADD.format(row="new") + " END",
+    ],
+    "postgresql": [
+        "CREATE OR REPLACE FUNCTION tasks_stats() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        "BEGIN "
+        "IF TG_OP = 'UPDATE' AND NEW.owner_id = OLD.owner_id "
+        "AND NEW.completed IS NOT DISTINCT FROM OLD.completed THEN RETURN NULL; END IF; "
+        "IF TG_OP <> 'INSERT' THEN " + _STATS_REMOVE.format(row="OLD") + " END IF; "
+        "IF TG_OP <> 'DELETE' THEN " + _STATS_ADD.format(row="NEW") + " END IF; "
+        "RETURN NULL; END $$",
+        "DROP TRIGGER IF EXISTS tasks_stats ON tasks",
+        "CREATE TRIGGER tasks_stats AFTER INSERT OR DELETE OR UPDATE OF completed, owner_id ON tasks "
+        "FOR EACH ROW EXECUTE FUNCTION tasks_stats()",
+    ],
+}
+
+_TRIGGER_NAMES = {
+    "sqlite": "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE :prefix",
+    "postgresql": "SELECT tgname FROM pg_trigger WHERE tgname LIKE :prefix AND NOT tgisinternal",
+}
+
+
+def _trigger_names(connection, prefix: str) -> list[str]:
+    query = _TRIGGER_NAMES.get(connection.dialect.name)
+    if query is None:
+        return []
+    return connection.execute(text(query), {"prefix": f"{prefix}%"}).scalars().all()
+
+
+def _has_triggers(connection, prefix: str) -> bool:
+    return bool(_trigger_names(connection, prefix))
+
+
+def drop_triggers(connection, prefix: str) -> None:
+    """Remove os triggers de tasks cujo nome começa com prefix (para recriá-los em outra versão)"""
+    suffix = " ON tasks" if connection.dialect.name == "postgresql" else ""
+    for name in _trigger_names(connection, prefix):
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name}{suffix}"))
+
+
+def supports_stats_triggers(connection) -> bool:
+    return connection.dialect.name in STATS_DDL
+
+
+def has_stats_triggers(connection) -> bool:
+    return _has_triggers(connection, "tasks_stats")
+
+
+def install_stats_triggers(connection, recount: bool = False) -> bool:
+    """Cria os triggers dos contadores; recount recalcula os totais a partir da tabela"""
+    if not supports_stats_triggers(connection):
+        return False
+    for statement in STATS_DDL[connection.dialect.name]:
+        connection.execute(text(statement))
+    if recount:
+        recount_stats(connection)
+    return True
+
+
+def recount_stats(connection) -> None:
+    """Recalcula os totais de cada dono com um COUNT (usado só na migração de bancos existentes)"""
+    stats = TaskOwnerStatsModel.__table__
+    rows = connection.execute(
+        select(TaskModel.owner_id, func.count(), func.coalesce(func.sum(case((TaskModel.completed, 1), else_=0)), 0))
+        .group_by(TaskModel.owner_id)
+    ).all()
+    # As linhas são regravadas, não recriadas: a versão de cada dono (e as ETags emitidas) se mantém
+    connection.execute(update(stats).values(total=0, completed=0))
+    for owner_id, total, completed in rows:
+        recounted = connection.execute(
+            update(stats).where(stats.c.owner_id == owner_id).values(total=total, completed=completed)
+        )
+        if recounted.rowcount == 0:
+            connection.execute(insert(stats).values(owner_id=owner_id, total=total, completed=completed))
+
+
+# Triggers que registram cada escrita em task_changes. A sequência vem do contador
+# change_seq, cuja linha fica travada do UPDATE até o commit: a ordem das sequências é a
+# ordem dos commits e o leitor do feed nunca "pula" uma alteração. No PostgreSQL a entrada
+# nasce com uma seq provisória (negativa, de uma SEQUENCE, sem trava) e um trigger adiado
+# para o commit troca-a pela definitiva: a linha quente só fica travada no fim da transação,
+# e escritores concorrentes não se serializam durante o restante dela
+_SQLITE_NEXT_SEQ = f"UPDATE task_counters SET value = value + 1 WHERE name = '{CHANGE_SEQ}'; "
+_SQLITE_SEQ = f"(SELECT value FROM task_counters WHERE name = '{CHANGE_SEQ}')"
+
+CHANGES_DDL = {
+    "sqlite": [
+        "CREATE TRIGGER IF NOT EXISTS tasks_changes_ai AFTER INSERT ON tasks BEGIN " + _SQLITE_NEXT_SEQ +
+        "INSERT INTO task_changes (seq, task_id, owner_id, op, version, title, description, completed) "
+        f"VALUES ({_SQLITE_SEQ}, new.id, new.owner_id, 'create', new.version, new.title, new.description, "
+        "new.completed); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_changes_au AFTER UPDATE ON tasks BEGIN " + _SQLITE_NEXT_SEQ +
+        "INSERT INTO task_changes (seq, task_id, owner_id, op, version, title, description, completed) "
+        f"VALUES ({_SQLITE_SEQ}, new.id, new.owner_id, 'update', new.version, new.title, new.description, "
+        "new.completed); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_changes_ad AFTER DELETE ON tasks BEGIN " + _SQLITE_NEXT_SEQ +
+        "INSERT INTO task_changes (seq, task_id, owner_id, op) "
+        f"VALUES ({_SQLITE_SEQ}, old.id, old.owner_id, 'delete'); END",
+    ],
+    "postgresql": [
+        "CREATE SEQUENCE IF NOT EXISTS task_changes_pending",
+        "CREATE OR REPLACE FUNCTION tasks_changes() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        "DECLARE pending_seq integer := -nextval('task_changes_pending'); "
+        "BEGIN "
+        "IF TG_OP = 'DELETE' THEN "
+        "INSERT INTO task_changes (seq, task_id, owner_id, op) VALUES (pending_seq, OLD.id, OLD.owner_id, 'delete'); "
+        "ELSE "
+        "INSERT INTO task_changes (seq, task_id, owner_id, op, version, title, description, completed) "
+        "VALUES (pending_seq, NEW.id, NEW.owner_id, CASE TG_OP WHEN 'INSERT' THEN 'create' ELSE 'update' END, "
+        "NEW.version, NEW.title, NEW.description, NEW.completed); "
+        "END IF; RETURN NULL; END $$",
+        "DROP TRIGGER IF EXISTS tasks_changes ON tasks",
+        "CREATE TRIGGER tasks_changes AFTER INSERT OR UPDATE OR DELETE ON tasks "
+        "FOR EACH ROW EXECUTE FUNCTION tasks_changes()",
+        # Adiado para o commit, na ordem das escritas da transação
+        "CREATE OR REPLACE FUNCTION task_changes_seq() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        "DECLARE next_seq integer; "
+        "BEGIN "
+        f"UPDATE task_counters SET value = value + 1 WHERE name = '{CHANGE_SEQ}' RETURNING value INTO next_seq; "
+        "UPDATE task_changes SET seq = next_seq WHERE seq = NEW.seq; "
+        "RETURN NULL; END $$",
+        "DROP TRIGGER IF EXISTS task_changes_seq ON task_changes",
+        "CREATE CONSTRAINT TRIGGER task_changes_seq AFTER INSERT ON task_changes "
+        "DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION task_changes_seq()",
+    ],
+}
+
+# Triggers que compõem o log em cada banco (bancos anteriores à seq no commit só têm o primeiro)
+CHANGE_LOG_TRIGGERS = {"sqlite": ("tasks_changes",), "postgresql": ("tasks_changes", "task_changes_seq")}
+
+
+def supports_change_log(connection) -> bool:
+    return connection.dialect.name in CHANGES_DDL
+
+
+def has_change_log(connection) -> bool:
+    return all(_has_triggers(connection, name) for name in CHANGE_LOG_TRIGGERS.get(connection.dialect.name, ()))
+
+
+def install_change_log(connection) -> bool:
+    """Cria os triggers do log de alterações"""
+    if not supports_change_log(connection):
+        return False
+    for statement in CHANGES_DDL[connection.dialect.name]:
+        connection.execute(text(statement))
+    return True
+
+
+# Índice de busca textual (SQLite FTS5) sobre title e description, sincronizado por triggers
+FTS_TABLE = "tasks_fts"
+
+FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, description, content='tasks', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+    f"VALUES ('delete', old.id, old.title, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+    f"VALUES ('delete', old.id, old.title, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+]
+
+
+def supports_fts(connection) -> bool:
+    if connection.dialect.name != "sqlite":
+        return False
+    options = connection.exec_driver_sql("PRAGMA compile_options").scalars().all()
+    return "ENABLE_FTS5" in options
+
+
+def install_fts(connection, rebuild: bool = False) -> bool:
+    """Cria o índice FTS5 e seus triggers; rebuild indexa as linhas já existentes"""
+    if not supports_fts(connection):
+        return False
+    for statement in FTS_DDL:
+        connection.execute(text(statement))
+    if rebuild:
+        connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    return True
+
+
+@event.listens_for(TaskModel.__table__, "after_create")
+def _create_fts(target, connection, **kw):
+    install_fts(connection)
+
+
+@event.listens_for(TaskModel.__table__, "after_create")
+def _create_stats_triggers(target, connection, **kw):
+    install_stats_triggers(connection)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_change_log(target, connection, **kw):
+    # Depois de todas as tabelas: os triggers envolvem tasks e task_changes
+    if supports_change_log(connection) and not has_change_log(connection):
+        install_change_log(connection)
+
+
+@event.listens_for(TaskModel.__table__, "before_drop")
+def _drop_fts(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
@@ -1,49 +1,506 @@
 """
-Classe responsável por implementar o repositório de tarefas com SQLite,
+Classe responsável por implementar o repositório de tarefas sobre SQL (SQLite, PostgreSQL, ...),
  conectando o domínio à infraestrutura e garantindo que a lógica de negócios permaneça independente da persistência.
+ Usa RETURNING quando o dialeto suporta, evitando o SELECT extra após cada escrita.
 
 """
-from sqlalchemy.orm import Session
-from app.domain.entities import Task
-from app.infra.database.models import TaskModel
+import threading
+import weakref
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from sqlalchemy import bindparam, case, delete, func, insert, inspect, select, text, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session, aliased
+from app.domain.entities import DEFAULT_OWNER, Task, TaskChange, TaskDelta, TaskPage, TaskStats
+from app.domain.exceptions import IdempotencyKeyInProgressError, IdempotencyKeyReusedError, VersionConflictError
+from app.domain.repositories import TaskRepository
+from app.infra.database.config import CHANGE_LOG_RETENTION_DAYS, IDEMPOTENCY_KEY_TTL
+from app.infra.database.models import (
+    CHANGE_HORIZON, CHANGE_SEQ, CHANGES_DDL, FTS_TABLE, STATS_DDL,
+    IdempotencyKeyModel, TaskChangeModel, TaskCounterModel, TaskModel, TaskOwnerStatsModel,
+)
+from app.infra.search import InvertedIndex, fts5_query
 
-class SQLiteTaskRepository:
-    def __init__(self, db: Session):
+# Campos controlados pelo banco (ou pelo repositório, no caso do dono), nunca copiados da entrada
+SERVER_FIELDS = {"id", "version", "updated_at", "owner_id"}
+
+# Colunas das leituras enxutas, na mesma ordem dos campos de Task
+ROW_COLUMNS = tuple(getattr(TaskModel, name) for name in Task.model_fields)
+
+
+# Índices invertidos dos backends sem FTS, por engine e por dono, com a versão da coleção do dono
+# e a seq do log de alterações até onde estão atualizados: quando o dono escreveu desde a última
+# busca, recebem só as alterações seguintes do log (de qualquer processo), sem ser refeitos
+_fallback_indexes = weakref.WeakKeyDictionary()
+_fallback_lock = threading.Lock()
+# Alterações lidas por consulta ao atualizar um índice invertido
+INDEX_CATCH_UP_BATCH = 1000
+
+# Engines em que a tabela FTS5 existe
+_fts_available = weakref.WeakKeyDictionary()
+
+# Entradas removidas por compactação, no máximo, para não alongar a transação da compactação
+COMPACT_BATCH_SIZE = 10_000
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """Menor string maior que todas as que começam com o prefixo (para busca por faixa no índice)"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _to_change(row: TaskChangeModel) -> TaskChange:
+    task = None
+    if row.op != "delete":
+        task = Task(
+            id=row.task_id,
+            title=row.title,
+            description=row.description,
+            completed=bool(row.completed),
+            version=row.version,
+            updated_at=row.changed_at,
+            owner_id=row.owner_id,
+        )
+    return TaskChange(
+        seq=row.seq, op=row.op, task_id=row.task_id, owner_id=row.owner_id, task=task, changed_at=row.changed_at
+    )
+
+
+def change_log_head(db: Session) -> int:
+    """Última seq do log de alterações, de todos os donos"""
+    counters = TaskCounterModel.__table__
+    return db.scalar(select(counters.c.value).where(counters.c.name == CHANGE_SEQ)) or 0
+
+
+def read_change_log(db: Session, after_seq: int, limit: int) -> list[TaskChange]:
+    """Entradas do log de todos os donos (para o feed, que distribui cada uma ao seu dono)"""
+    rows = db.scalars(
+        select(TaskChangeModel).where(TaskChangeModel.seq > after_seq).order_by(TaskChangeModel.seq).limit(limit)
+    )
+    return [_to_change(row) for row in rows]
+
+
+class SQLTaskRepository(TaskRepository):
+    def __init__(
+        self, db: Session, owner_id: str = DEFAULT_OWNER, autocommit: bool = True, read_db: Session | None = None
+    ):
         self.db = db
+        # Consultas (get_by_id, listagens, busca, stats, exportação) vão à sessão do pool de leitura,
+        # quando há uma; escritas, o log de alterações e as checagens das escritas ficam em db
+        self.read_db = read_db if read_db is not None else db
+        self.owner_id = owner_id
+        # Sem autocommit, as escritas só fazem flush: quem chama decide quando confirmar
+        # a transação (ex.: o escritor de group commit, que confirma várias de uma vez)
+        self.autocommit = autocommit
+        self.dialect = db.get_bind().dialect
+        # Toda consulta fica restrita às tarefas do dono, sempre pelo prefixo dos índices compostos
+        self._owned = TaskModel.owner_id == owner_id
+
+    def _commit(self) -> None:
+        if self.autocommit:
+            self.db.commit()
+        else:
+            self.db.flush()
+
+    def _rollback(self) -> None:
+        # Sem autocommit a transação é de quem chama; as falhas tratadas aqui não escreveram nada
+        if self.autocommit:
+            self.db.rollback()
+
+    def _touch_collection(self) -> None:
+        """Incrementa a versão da coleção do dono na mesma transação da escrita"""
+        stats = TaskOwnerStatsModel.__table__
+        touched = self.db.execute(
+            update(stats).where(stats.c.owner_id == self.owner_id).values(version=stats.c.version + 1)
+        )
+        if touched.rowcount == 0:
+            # Dono sem linha de totais (primeira escrita em dialetos sem os triggers)
+            self.db.execute(insert(stats).values(owner_id=self.owner_id, total=0, completed=0, version=1))
+
+    def run_maintenance(self) -> None:
+        """Compacta o log de alterações e remove as chaves de idempotência expiradas, em uma
+        transação própria; chamado pela manutenção periódica (maintenance.py), nunca pelas escritas"""
+        now = datetime.now(timezone.utc)
+        try:
+            self.compact_changes(now - timedelta(days=CHANGE_LOG_RETENTION_DAYS), commit=False)
+            self.db.execute(delete(IdempotencyKeyModel).where(IdempotencyKeyModel.expires_at < now))
+            self.db.commit()
+        except SQLAlchemyError:
+            self.db.rollback()
+            raise
+
+    def _exists(self, task_id: int) -> bool:
+        return self.db.scalar(select(TaskModel.id).where(self._owned, TaskModel.id == task_id)) is not None
+
+    def collection_version(self) -> int | None:
+        stats = TaskOwnerStatsModel.__table__
+        return self.read_db.scalar(select(stats.c.version).where(stats.c.owner_id == self.owner_id)) or 0
+
+    def stats(self, group_by: str | None = None) -> TaskStats:
+        # Leitura O(1) dos totais do dono mantidos pelos triggers; sem eles (dialetos sem
+        # suporte ou dono sem tarefas), recai em um COUNT sobre a faixa do dono no índice
+        counts = None
+        if self.dialect.name in STATS_DDL:
+            stats = TaskOwnerStatsModel.__table__
+            counts = self.read_db.execute(
+                select(stats.c.total, stats.c.completed).where(stats.c.owner_id == self.owner_id)
+            ).one_or_none()
+        if counts is not None:
+            total, completed = counts
+        else:
+            total, completed = self.read_db.execute(
+                select(func.count(), func.coalesce(func.sum(case((TaskModel.completed, 1), else_=0)), 0))
+                .where(self._owned)
+            ).one()
+        return TaskStats.from_counts(total, completed, group_by)
+
+    def last_change_seq(self) -> int | None:
+        counters = TaskCounterModel.__table__
+        return self.db.scalar(select(counters.c.value).where(counters.c.name == CHANGE_SEQ))
+
+    def changes_since(self, after_seq: int, limit: int) -> list[TaskChange]:
+        # O log é preenchido por triggers na mesma transação de cada escrita (inclusive em lote)
+        rows = self.db.scalars(
+            select(TaskChangeModel)
+            .where(TaskChangeModel.owner_id == self.owner_id, TaskChangeModel.seq > after_seq)
+            .order_by(TaskChangeModel.seq)
+            .limit(limit)
+        )
+        return [_to_change(row) for row in rows]
+
+    def change_horizon(self) -> int:
+        counters = TaskCounterModel.__table__
+        return self.db.scalar(select(counters.c.value).where(counters.c.name == CHANGE_HORIZON)) or 0
+
+    def changes_delta(self, since: int | None, limit: int) -> TaskDelta:
+        if since is None:
+            return TaskDelta(upserts=[], deletes=[], token=self.last_change_seq() or 0)
+        head = self.check_change_token(since)
+
+        # Só a última entrada de cada tarefa alterada: o payload acompanha o número de
+        # tarefas que mudaram, não o número de escritas nem o tamanho da tabela
+        newer = aliased(TaskChangeModel)
+        latest = select(func.max(newer.seq)).where(newer.task_id == TaskChangeModel.task_id).scalar_subquery()
+        rows = self.db.scalars(
+            select(TaskChangeModel)
+            .where(
+                TaskChangeModel.owner_id == self.owner_id, TaskChangeModel.seq > since, TaskChangeModel.seq == latest
+            )
+            .order_by(TaskChangeModel.seq)
+            .limit(limit + 1)
+        ).all()
+
+        has_more = len(rows) > limit
+        changes = [_to_change(row) for row in rows[:limit]]
+        return TaskDelta(
+            upserts=[change.task for change in changes if change.task is not None],
+            deletes=[change.task_id for change in changes if change.task is None],
+            token=changes[-1].seq if has_more else head,
+            has_more=has_more,
+        )
+
+    def compact_changes(self, before: datetime, commit: bool = True) -> int:
+        """Remove as entradas do log anteriores a before (em ordem de seq) e avança o horizonte"""
+        counters = TaskCounterModel.__table__
+        horizon = self.change_horizon()
+        cutoff = self.db.scalar(select(func.max(TaskChangeModel.seq)).where(TaskChangeModel.changed_at < before))
+        if cutoff is None or cutoff <= horizon:
+            return 0
+        cutoff = min(cutoff, horizon + COMPACT_BATCH_SIZE)
+        removed = self.db.execute(delete(TaskChangeModel).where(TaskChangeModel.seq <= cutoff)).rowcount
+        # Nunca recua, mesmo com outro processo compactando ao mesmo tempo
+        self.db.execute(
+            update(counters)
+            .where(counters.c.name == CHANGE_HORIZON, counters.c.value < cutoff)
+            .values(value=cutoff)
+        )
+        if commit:
+            self.db.commit()
+        return removed
+
+    def _insert(self, task: Task) -> Task:
+        task_data = {**task.model_dump(exclude=SERVER_FIELDS), "owner_id": self.owner_id}
+        if self.dialect.insert_returning:
+            db_task = self.db.scalars(insert(TaskModel).values(**task_data).returning(TaskModel)).one()
+            return Task.model_validate(db_task)
 
-    def create(self, task: Task) -> Task:
-        task_data = task.model_dump()
         db_task = TaskModel(**task_data)
         self.db.add(db_task)
-        self.db.commit()
+        self.db.flush()
         self.db.refresh(db_task)
         return Task.model_validate(db_task)
 
+    def create(self, task: Task) -> Task:
+        result = self._insert(task)
+        self._touch_collection()
+        self._commit()
+        return result
+
+    def create_idempotent(self, task: Task, key: str, fingerprint: str) -> tuple[Task, bool]:
+        keys = IdempotencyKeyModel.__table__
+        same_key = (keys.c.owner_id == self.owner_id, keys.c.key == key)
+        now = datetime.now(timezone.utc)
+        # Uma chave expirada ainda não removida não conta como repetição
+        self.db.execute(delete(keys).where(*same_key, keys.c.expires_at < now))
+        try:
+            # A chave é gravada antes da tarefa e pela chave primária: uma requisição concorrente
+            # com a mesma chave espera esta transação e então recebe IntegrityError. O savepoint
+            # mantém a transação utilizável para ler a resposta guardada (no PostgreSQL, o erro a
+            # abortaria), inclusive quando ela é a de um lote do group commit
+            with self.db.begin_nested():
+                self.db.execute(insert(keys).values(
+                    owner_id=self.owner_id, key=key, fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=IDEMPOTENCY_KEY_TTL),
+                ))
+        except IntegrityError:
+            self._rollback()
+            return self._replay(key, fingerprint), True
+
+        result = self._insert(task)
+        self.db.execute(update(keys).where(*same_key).values(task_id=result.id, response=result.model_dump_json()))
+        self._touch_collection()
+        self._commit()
+        return result, False
+
+    def _replay(self, key: str, fingerprint: str) -> Task:
+        keys = IdempotencyKeyModel.__table__
+        stored = self.db.execute(
+            select(keys.c.fingerprint, keys.c.response).where(keys.c.owner_id == self.owner_id, keys.c.key == key)
+        ).one_or_none()
+        if stored is None or stored.response is None:
+            raise IdempotencyKeyInProgressError(key)
+        if stored.fingerprint != fingerprint:
+            raise IdempotencyKeyReusedError(key)
+        return Task.model_validate_json(stored.response)
+
     def get_by_id(self, task_id: int) -> Task | None:
-        db_task = self.db.query(TaskModel).filter(TaskModel.id == task_id).first()
+        db_task = self.read_db.query(TaskModel).filter(self._owned, TaskModel.id == task_id).first()
         return Task.model_validate(db_task) if db_task else None
 
     def list_all(self) -> list[Task]:
-        db_tasks = self.db.query(TaskModel).all()
+        db_tasks = self.read_db.query(TaskModel).filter(self._owned).all()
         return [Task.model_validate(task) for task in db_tasks]
 
-    def update(self, task_id: int, task: Task) -> Task | None:
-        db_task = self.db.query(TaskModel).filter(TaskModel.id == task_id).first()
-        if not db_task:
-            return None
+    def _page_filters(
+        self, after_id: int | None, completed: bool | None, title_prefix: str | None
+    ) -> list:
+        filters = [self._owned]
+        if after_id is not None:
+            filters.append(TaskModel.id > after_id)
+        if completed is not None:
+            filters.append(TaskModel.completed == completed)
+        if title_prefix:
+            # Faixa [prefixo, limite) em vez de LIKE para aproveitar o índice em title
+            filters.append(TaskModel.title >= title_prefix)
+            filters.append(TaskModel.title < _prefix_upper_bound(title_prefix))
+        return filters
 
-        for key, value in task.model_dump(exclude_unset=True).items():
-            setattr(db_task, key, value)
+    def list_page_rows(
+        self,
+        limit: int,
+        after_id: int | None = None,
+        completed: bool | None = None,
+        title_prefix: str | None = None,
+    ) -> tuple[list[dict], int | None]:
+        # SELECT das colunas direto no core: sem objetos ORM, identity map nem validação
+        stmt = (
+            select(*ROW_COLUMNS)
+            .where(*self._page_filters(after_id, completed, title_prefix))
+            .order_by(TaskModel.id)
+            .limit(limit + 1)
+        )
+        rows = [dict(row) for row in self.read_db.execute(stmt).mappings()]
+        next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+        return rows[:limit], next_cursor
 
-        self.db.commit()
-        self.db.refresh(db_task)
+    def iter_all(self, after_id: int | None = None, batch_size: int = 1000) -> Iterator[Task]:
+        # yield_per busca as linhas em lotes por um cursor no servidor, sem materializar a tabela
+        stmt = select(TaskModel).where(self._owned).order_by(TaskModel.id).execution_options(yield_per=batch_size)
+        if after_id is not None:
+            stmt = stmt.where(TaskModel.id > after_id)
+        for db_task in self.read_db.execute(stmt).scalars():
+            yield Task.model_validate(db_task)
+
+    def iter_rows(self, after_id: int | None = None, batch_size: int = 1000) -> Iterator[tuple]:
+        # Só as colunas, em lotes: sem instâncias ORM, identity map nem Task por linha; cada Row
+        # (que se comporta como tupla) é descartada assim que consumida
+        stmt = select(*ROW_COLUMNS).where(self._owned).order_by(TaskModel.id).execution_options(yield_per=batch_size)
+        if after_id is not None:
+            stmt = stmt.where(TaskModel.id > after_id)
+        yield from self.read_db.execute(stmt)
+
+    def search(self, query: str, limit: int, offset: int = 0) -> TaskPage:
+        if self._has_fts():
+            match = fts5_query(query)
+            if match is None:
+                return TaskPage(items=[])
+            # bm25 com peso maior para o título; menor valor = mais relevante
+            stmt = select(TaskModel).from_statement(text(
+                f"SELECT tasks.* FROM {FTS_TABLE} JOIN tasks ON tasks.id = {FTS_TABLE}.rowid "
+                f"WHERE {FTS_TABLE} MATCH :match AND tasks.owner_id = :owner "
+                f"ORDER BY bm25({FTS_TABLE}, 2.0, 1.0), tasks.id LIMIT :limit OFFSET :offset"
+            ))
+            db_tasks = self.read_db.scalars(stmt, {"match": match, "owner": self.owner_id, "limit": limit + 1, "offset": offset}).all()
+            items = [Task.model_validate(db_task) for db_task in db_tasks[:limit]]
+        else:
+            ids = self._fallback_index().search(query, limit + 1, offset)
+            found = {
+                db_task.id: Task.model_validate(db_task)
+                for db_task in self.read_db.scalars(select(TaskModel).where(self._owned, TaskModel.id.in_(ids[:limit])))
+            }
+            items = [found[task_id] for task_id in ids[:limit] if task_id in found]
+            db_tasks = ids
+        next_cursor = offset + limit if len(db_tasks) > limit else None
+        return TaskPage(items=items, next_cursor=next_cursor)
+
+    def _has_fts(self) -> bool:
+        engine = self.read_db.get_bind()
+        if engine not in _fts_available:
+            _fts_available[engine] = inspect(engine).has_table(FTS_TABLE)
+        return _fts_available[engine]
+
+    def _fallback_index(self) -> InvertedIndex:
+        key = self.db.get_bind()
+        with _fallback_lock:
+            indexes = _fallback_indexes.setdefault(key, {})
+            cached = indexes.get(self.owner_id)
+            version = self.collection_version()
+            if cached is not None and cached[0] == version:
+                return cached[2]
+            # Sem log (dialetos sem os triggers) ou com as alterações pendentes já compactadas, refaz
+            if cached is not None and self.dialect.name in CHANGES_DDL and cached[1] >= self.change_horizon():
+                _, position, index = cached
+                while changes := self.changes_since(position, INDEX_CATCH_UP_BATCH):
+                    for change in changes:
+                        if change.task is None:
+                            index.remove(change.task_id)
+                        else:
+                            index.add(change.task)
+                    position = changes[-1].seq
+            else:
+                # Posição lida antes das tarefas e na mesma sessão; reaplicar uma alteração já indexada
+                # não muda nada
+                position = change_log_head(self.read_db)
+                index = InvertedIndex(self.iter_all())
+            indexes[self.owner_id] = (version, position, index)
+            return index
+
+    def update(self, task_id: int, task: Task, expected_version: int | None = None) -> Task | None:
+        # Um único UPDATE ... WHERE id = ? [AND version = ?], sem leitura prévia da linha
+        values = task.model_dump(exclude_unset=True, exclude=SERVER_FIELDS)
+        stmt = (
+            update(TaskModel)
+            .where(self._owned, TaskModel.id == task_id)
+            .values(**values, version=TaskModel.version + 1)
+        )
+        if expected_version is not None:
+            stmt = stmt.where(TaskModel.version == expected_version)
+
+        if self.dialect.update_returning:
+            db_task = self.db.scalars(stmt.returning(TaskModel)).one_or_none()
+            updated = db_task is not None
+            result = Task.model_validate(db_task) if updated else None
+        else:
+            updated = self.db.execute(stmt).rowcount == 1
+            result = None
+
+        if not updated:
+            self._rollback()
+            # Só no caminho de falha: distingue tarefa inexistente de conflito de versão
+            if expected_version is not None and self._exists(task_id):
+                raise VersionConflictError(task_id, expected_version)
+            return None
+
+        self._touch_collection()
+        self._commit()
+        if result is not None:
+            return result
+        # Relida na sessão que escreveu: o pool de leitura pode ainda não ter a alteração
+        db_task = self.db.scalars(select(TaskModel).where(self._owned, TaskModel.id == task_id)).one()
         return Task.model_validate(db_task)
 
     def delete(self, task_id: int) -> bool:
-        db_task = self.db.query(TaskModel).filter(TaskModel.id == task_id).first()
-        if not db_task:
+        # Um único DELETE; o rowcount indica se a tarefa existia
+        result = self.db.execute(delete(TaskModel).where(self._owned, TaskModel.id == task_id))
+        if result.rowcount != 1:
+            self._rollback()
             return False
-
-        self.db.delete(db_task)
-        self.db.commit()
+        self._touch_collection()
+        self._commit()
         return True
+
+    def bulk_create(self, tasks: list[Task]) -> list[Task]:
+        if not tasks:
+            return []
+        rows = [{**task.model_dump(exclude=SERVER_FIELDS), "owner_id": self.owner_id} for task in tasks]
+        if self.dialect.insert_executemany_returning_sort_by_parameter_order:
+            # Um único INSERT executemany com RETURNING, dentro de uma transação
+            stmt = insert(TaskModel).returning(TaskModel, sort_by_parameter_order=True)
+            db_tasks = self.db.scalars(stmt, rows).all()
+        else:
+            db_tasks = [TaskModel(**row) for row in rows]
+            self.db.add_all(db_tasks)
+            self.db.flush()
+        result = [Task.model_validate(db_task) for db_task in db_tasks]
+        self._touch_collection()
+        self._commit()
+        return result
+
+    def bulk_update(self, updates: list[tuple[int, Task]]) -> list[Task | None]:
+        if not updates:
+            return []
+        ids = {task_id for task_id, _ in updates}
+        existing = set(self.db.scalars(select(TaskModel.id).where(self._owned, TaskModel.id.in_(ids))))
+
+        rows = [
+            (task_id, task.model_dump(exclude_unset=True, exclude=SERVER_FIELDS))
+            for task_id, task in updates
+            if task_id in existing
+        ]
+        # Um executemany por sequência de itens com os mesmos campos, na ordem recebida
+        table = TaskModel.__table__
+        for keys, group in groupby(rows, key=lambda row: tuple(sorted(row[1]))):
+            stmt = (
+                update(table)
+                .where(table.c.id == bindparam("_id"))
+                .values({**{key: bindparam(f"_{key}") for key in keys}, "version": table.c.version + 1})
+            )
+            params = [
+                {"_id": task_id, **{f"_{key}": value for key, value in values.items()}}
+                for task_id, values in group
+            ]
+            self.db.execute(stmt, params)
+        if rows:
+            self._touch_collection()
+        self._commit()
+
+        updated = {
+            db_task.id: Task.model_validate(db_task)
+            for db_task in self.db.scalars(select(TaskModel).where(self._owned, TaskModel.id.in_(existing)))
+        }
+        return [updated.get(task_id) for task_id, _ in updates]
+
+    def bulk_delete(self, task_ids: list[int]) -> list[bool]:
+        if not task_ids:
+            return []
+        ids = set(task_ids)
+        stmt = delete(TaskModel).where(self._owned, TaskModel.id.in_(ids))
+        if self.dialect.delete_returning:
+            deleted = set(self.db.scalars(stmt.returning(TaskModel.id)))
+        else:
+            deleted = set(self.db.scalars(select(TaskModel.id).where(self._owned, TaskModel.id.in_(ids))))
+            self.db.execute(stmt)
+        if deleted:
+            self._touch_collection()
+        self._commit()
+
+        # Um id repetido no lote só conta como excluído na primeira ocorrência
+        result = []
+        for task_id in task_ids:
+            result.append(task_id in deleted)
+            deleted.discard(task_id)
+        return result
+
+
+# Nome anterior, mantido por compatibilidade
+SQLiteTaskRepository = SQLTaskRepository
@@ -0,0 +1,78 @@
+"""
+Particionamento opcional por dono: com DATABASE_SHARDS (URLs separadas por vírgula), cada dono
+ tem todas as suas tarefas em um único banco, escolhido por um hash estável do owner_id.
+ Sem a variável, todos os donos ficam no banco de DATABASE_URL.
+
+"""
+import os
+import threading
+from hashlib import blake2b
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.infra.database.config import DB_PROFILE, create_database_engine
+from app.infra.database.migrations import upgrade_schema
+
+
+class ShardRouter:
+    def __init__(self, urls: list[str], profile: str = DB_PROFILE):
+        if not urls:
+            raise ValueError("At least one shard URL is required")
+        self.engines = [create_database_engine(url, profile) for url in urls]
+        self._sessions = [sessionmaker(autocommit=False, autoflush=False, bind=engine) for engine in self.engines]
+
+    def shard_for(self, owner_id: str) -> int:
+        # Hash estável entre processos (ao contrário de hash()): o dono nunca muda de shard
+        digest = blake2b(owner_id.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % len(self.engines)
+
+    def engine_for(self, owner_id: str) -> Engine:
+        return self.engines[self.shard_for(owner_id)]
+
+    def session_for(self, owner_id: str) -> Session:
+        return self._sessions[self.shard_for(owner_id)]()
+
+    def upgrade(self) -> None:
+        for engine in self.engines:
+            upgrade_schema(engine)
+
+    def dispose(self) -> None:
+        for engine in self.engines:
+            engine.dispose()
+
+
+def shard_urls_from_env() -> list[str]:
+    return [url.strip() for url in os.getenv("DATABASE_SHARDS", "").split(",") if url.strip()]
+
+
+# Roteador compartilhado pelo processo (None quando o particionamento está desativado),
+# criado no primeiro uso ou por configure_shards
+_router: ShardRouter | None = None
+_configured = False
+_router_lock = threading.RLock()
+
+
+def configure_shards(urls: list[str]) -> ShardRouter | None:
+    global _router, _configured
+    with _router_lock:
+        previous = _router
+        _router = ShardRouter(urls) if urls else None
+        _configured = True
+    if previous is not None:
+        previous.dispose()
+    return _router
+
+
+def get_shard_router() -> ShardRouter | None:
+    if not _configured:
+        with _router_lock:
+            if not _configured:
+                configure_shards(shard_urls_from_env())
+    return _router
+
+
+def dispose_shards() -> None:
+    global _router, _configured
+    with _router_lock:
+        router, _router, _configured = _router, None, False
+    if router is not None:
+        router.dispose()
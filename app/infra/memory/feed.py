@@ -0,0 +1,36 @@
+"""
+Feed de mudanças do backend em memória: o mesmo ChangeFeed, lendo o log de alterações do
+ MemoryStore em vez da tabela task_changes.
+
+"""
+import threading
+import weakref
+from app.domain.entities import TaskChange
+from app.infra.changes import ChangeFeed
+from app.infra.memory.store import MemoryStore
+
+
+class MemoryChangeFeed(ChangeFeed):
+    def __init__(self, store: MemoryStore, **kwargs):
+        super().__init__(session_factory=None, **kwargs)
+        self.store = store
+
+    def _head(self) -> int:
+        return self.store.seq
+
+    def _read(self, after_seq: int) -> list[TaskChange]:
+        with self.store.lock:
+            return self.store.changes_since(after_seq, self.batch_size)
+
+
+# Um feed por store, compartilhado por todas as conexões do processo
+_feeds = weakref.WeakKeyDictionary()
+_feeds_lock = threading.Lock()
+
+
+def memory_change_feed_for(store: MemoryStore) -> MemoryChangeFeed:
+    with _feeds_lock:
+        feed = _feeds.get(store)
+        if feed is None:
+            feed = _feeds[store] = MemoryChangeFeed(store)
+        return feed
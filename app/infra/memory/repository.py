@@ -0,0 +1,222 @@
+"""
+Repositório de tarefas sobre o MemoryStore: mesmo contrato do SQLTaskRepository (donos, versões,
+ log de alterações, idempotência), com leituras e escritas resolvidas em memória sob o lock do store.
+
+"""
+import time
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from app.domain.entities import DEFAULT_OWNER, Task, TaskChange, TaskDelta, TaskPage, TaskStats
+from app.domain.exceptions import IdempotencyKeyReusedError, VersionConflictError
+from app.domain.repositories import ROW_FIELDS, TaskRepository
+from app.infra.database.config import IDEMPOTENCY_KEY_TTL
+from app.infra.database.repository import SERVER_FIELDS
+from app.infra.memory.store import MemoryStore, TaskRecord, get_memory_store
+
+
+class InMemoryTaskRepository(TaskRepository):
+    def __init__(self, store: MemoryStore | None = None, owner_id: str = DEFAULT_OWNER):
+        self.store = store if store is not None else get_memory_store()
+        self.owner_id = owner_id
+
+    def _new(self, task: Task) -> TaskRecord:
+        return self.store.new_record(self.owner_id, task.model_dump(exclude=SERVER_FIELDS))
+
+    def _updated(self, current: TaskRecord, task: Task) -> TaskRecord:
+        values = task.model_dump(exclude_unset=True, exclude=SERVER_FIELDS)
+        return TaskRecord(**{
+            **current.to_row(), **values,
+            "version": current.version + 1, "updated_at": datetime.now(timezone.utc),
+        })
+
+    def _records(self, ids: list[int]) -> Iterator[TaskRecord]:
+        records = self.store.records
+        return (records[task_id] for task_id in ids)
+
+    def collection_version(self) -> int | None:
+        return self.store.version
+
+    def create(self, task: Task) -> Task:
+        with self.store.lock:
+            record = self._new(task)
+            self.store.apply([{"op": "put", "task": record}])
+        return record.to_task()
+
+    def create_idempotent(self, task: Task, key: str, fingerprint: str) -> tuple[Task, bool]:
+        now = time.time()
+        with self.store.lock:
+            # As escritas são serializadas pelo lock: nunca há outra criação com a mesma chave em andamento
+            stored = self.store.idempotency.get((self.owner_id, key))
+            if stored is not None and stored[2] >= now:
+                if stored[0] != fingerprint:
+                    raise IdempotencyKeyReusedError(key)
+                return Task.model_validate_json(stored[1]), True
+
+            record = self._new(task)
+            self.store.apply([
+                {"op": "put", "task": record},
+                {
+                    "op": "key", "owner_id": self.owner_id, "key": key, "fingerprint": fingerprint,
+                    "response": record.to_task().model_dump_json(), "expires_at": now + IDEMPOTENCY_KEY_TTL,
+                },
+            ])
+        return record.to_task(), False
+
+    def get_by_id(self, task_id: int) -> Task | None:
+        record = self.store.get(self.owner_id, task_id)
+        return record.to_task() if record is not None else None
+
+    def list_all(self) -> list[Task]:
+        with self.store.lock:
+            return [record.to_task() for record in self._records(self.store.owner(self.owner_id).ids)]
+
+    def _page(
+        self, limit: int, after_id: int | None, completed: bool | None, title_prefix: str | None
+    ) -> tuple[list[TaskRecord], int | None]:
+        with self.store.lock:
+            ids = self.store.owner(self.owner_id).ids_after(after_id, completed)
+            if title_prefix:
+                selected = []
+                for record in self._records(ids):
+                    if record.title.startswith(title_prefix):
+                        selected.append(record)
+                        if len(selected) > limit:
+                            break
+            else:
+                # As listas de ids já estão filtradas por completed e em ordem: a página é uma fatia
+                selected = list(self._records(ids[:limit + 1]))
+        next_cursor = selected[limit - 1].id if len(selected) > limit else None
+        return selected[:limit], next_cursor
+
+    def list_page(
+        self,
+        limit: int,
+        after_id: int | None = None,
+        completed: bool | None = None,
+        title_prefix: str | None = None,
+    ) -> TaskPage:
+        records, next_cursor = self._page(limit, after_id, completed, title_prefix)
+        return TaskPage(items=[record.to_task() for record in records], next_cursor=next_cursor)
+
+    def list_page_rows(
+        self,
+        limit: int,
+        after_id: int | None = None,
+        completed: bool | None = None,
+        title_prefix: str | None = None,
+    ) -> tuple[list[dict], int | None]:
+        records, next_cursor = self._page(limit, after_id, completed, title_prefix)
+        return [record.to_row() for record in records], next_cursor
+
+    def iter_rows(self, after_id: int | None = None, batch_size: int = 1000) -> Iterator[tuple]:
+        # O lock é tomado por lote, não durante toda a varredura
+        while True:
+            with self.store.lock:
+                ids = self.store.owner(self.owner_id).ids_after(after_id, None)[:batch_size]
+                rows = [tuple(getattr(record, name) for name in ROW_FIELDS) for record in self._records(ids)]
+            yield from rows
+            if len(ids) < batch_size:
+                return
+            after_id = ids[-1]
+
+    def search(self, query: str, limit: int, offset: int = 0) -> TaskPage:
+        with self.store.lock:
+            ids = self.store.search_index(self.owner_id).search(query, limit + 1, offset)
+            items = [record.to_task() for record in self._records(ids[:limit])]
+        next_cursor = offset + limit if len(ids) > limit else None
+        return TaskPage(items=items, next_cursor=next_cursor)
+
+    def stats(self, group_by: str | None = None) -> TaskStats:
+        with self.store.lock:
+            index = self.store.owner(self.owner_id)
+            total, completed = len(index.ids), len(index.completed_ids)
+        return TaskStats.from_counts(total, completed, group_by)
+
+    def update(self, task_id: int, task: Task, expected_version: int | None = None) -> Task | None:
+        with self.store.lock:
+            current = self.store.get(self.owner_id, task_id)
+            if current is None:
+                return None
+            if expected_version is not None and current.version != expected_version:
+                raise VersionConflictError(task_id, expected_version)
+            record = self._updated(current, task)
+            self.store.apply([{"op": "put", "task": record}])
+        return record.to_task()
+
+    def delete(self, task_id: int) -> bool:
+        with self.store.lock:
+            if self.store.get(self.owner_id, task_id) is None:
+                return False
+            self.store.apply([{"op": "delete", "id": task_id}])
+        return True
+
+    # Os lotes viram uma única gravação no log e uma única versão da coleção
+
+    def bulk_create(self, tasks: list[Task]) -> list[Task]:
+        with self.store.lock:
+            records = [self._new(task) for task in tasks]
+            self.store.apply([{"op": "put", "task": record} for record in records])
+        return [record.to_task() for record in records]
+
+    def bulk_update(self, updates: list[tuple[int, Task]]) -> list[Task | None]:
+        with self.store.lock:
+            # Um id repetido no lote parte do resultado da ocorrência anterior
+            pending: dict[int, TaskRecord] = {}
+            entries, results = [], []
+            for task_id, task in updates:
+                current = pending.get(task_id) or self.store.get(self.owner_id, task_id)
+                if current is None:
+                    results.append(None)
+                    continue
+                record = pending[task_id] = self._updated(current, task)
+                entries.append({"op": "put", "task": record})
+                results.append(record)
+            self.store.apply(entries)
+        # Como no SQL, cada posição devolve o estado final da tarefa
+        return [pending[record.id].to_task() if record is not None else None for record in results]
+
+    def bulk_delete(self, task_ids: list[int]) -> list[bool]:
+        with self.store.lock:
+            deleted = set()
+            for task_id in task_ids:
+                if task_id not in deleted and self.store.get(self.owner_id, task_id) is not None:
+                    deleted.add(task_id)
+            self.store.apply([{"op": "delete", "id": task_id} for task_id in deleted])
+
+        # Um id repetido no lote só conta como excluído na primeira ocorrência
+        result = []
+        for task_id in task_ids:
+            result.append(task_id in deleted)
+            deleted.discard(task_id)
+        return result
+
+    def last_change_seq(self) -> int | None:
+        return self.store.seq
+
+    def changes_since(self, after_seq: int, limit: int) -> list[TaskChange]:
+        with self.store.lock:
+            return self.store.changes_since(after_seq, limit, self.owner_id)
+
+    def change_horizon(self) -> int:
+        return self.store.horizon
+
+    def changes_delta(self, since: int | None, limit: int) -> TaskDelta:
+        with self.store.lock:
+            if since is None:
+                return TaskDelta(upserts=[], deletes=[], token=self.store.seq)
+            head = self.check_change_token(since)
+            # Só a última alteração de cada tarefa, na ordem dessa última alteração
+            latest: dict[int, TaskChange] = {}
+            for change in self.store.changes_since(since, len(self.store.changes), self.owner_id):
+                latest.pop(change.task_id, None)
+                latest[change.task_id] = change
+        changes = list(latest.values())
+
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        return TaskDelta(
+            upserts=[change.task for change in changes if change.task is not None],
+            deletes=[change.task_id for change in changes if change.task is None],
+            token=changes[-1].seq if has_more else head,
+            has_more=has_more,
+        )
@@ -0,0 +1,356 @@
+"""
+Armazenamento de tarefas em memória para implantações efêmeras ou de borda: registros com
+ __slots__ indexados por id, listas ordenadas de ids por dono (todas e por completed) e,
+ opcionalmente, persistência em um log append-only (uma linha JSON por escrita, gravada antes
+ de a escrita valer em memória) com snapshots periódicos, lidos de volta no startup.
+
+Um diretório de dados pertence a um único processo (trava exclusiva no log): use um worker.
+
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from app.domain.entities import Task, TaskChange
+from app.infra.search import InvertedIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+MEMORY_STORE_PATH = os.getenv("MEMORY_STORE_PATH", "")  # vazio = só memória, sem persistência
+MEMORY_STORE_FSYNC = os.getenv("MEMORY_STORE_FSYNC", "True").lower() in ("true", "1", "t")
+# Entradas no log até um novo snapshot (que zera o log)
+MEMORY_SNAPSHOT_EVERY = int(os.getenv("MEMORY_SNAPSHOT_EVERY", "10000"))
+# Alterações mantidas para sincronização incremental e feed; as mais antigas expiram
+MEMORY_CHANGE_LOG_SIZE = int(os.getenv("MEMORY_CHANGE_LOG_SIZE", "100000"))
+
+SNAPSHOT_FILE = "snapshot.json"
+LOG_FILE = "tasks.log"
+# Escritas entre remoções das chaves de idempotência expiradas
+PURGE_EVERY = 1000
+
+
+class TaskRecord:
+    __slots__ = ("id", "title", "description", "completed", "version", "updated_at", "owner_id")
+
+    def __init__(self, id, title, description, completed, version, updated_at, owner_id):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.completed = completed
+        self.version = version
+        self.updated_at = updated_at
+        self.owner_id = owner_id
+
+    def to_row(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def to_task(self) -> Task:
+        # Os valores já foram validados na entrada: sem revalidar a cada leitura
+        return Task.model_construct(**self.to_row())
+
+    def to_json(self) -> dict:
+        return {**self.to_row(), "updated_at": self.updated_at.isoformat()}
+
+    @classmethod
+    def from_json(cls, row: dict) -> "TaskRecord":
+        return cls(**{**row, "updated_at": datetime.fromisoformat(row["updated_at"])})
+
+
+def _encode(value):
+    # Entradas vindas das escritas carregam o próprio TaskRecord; as do log, o dict
+    if isinstance(value, TaskRecord):
+        return value.to_json()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _add_sorted(ids: list[int], task_id: int) -> None:
+    # Ids novos são sempre os maiores: o caso comum é um append
+    if not ids or ids[-1] < task_id:
+        ids.append(task_id)
+    else:
+        insort(ids, task_id)
+
+
+def _remove_sorted(ids: list[int], task_id: int) -> None:
+    index = bisect_left(ids, task_id)
+    if index < len(ids) and ids[index] == task_id:
+        del ids[index]
+
+
+class OwnerIndex:
+    """Ids de um dono em ordem crescente, no total e separados por completed"""
+    __slots__ = ("ids", "completed_ids", "pending_ids", "search")
+
+    def __init__(self):
+        self.ids: list[int] = []
+        self.completed_ids: list[int] = []
+        self.pending_ids: list[int] = []
+        self.search: InvertedIndex | None = None  # criado na primeira busca
+
+    def add(self, record: TaskRecord) -> None:
+        _add_sorted(self.ids, record.id)
+        _add_sorted(self.completed_ids if record.completed else self.pending_ids, record.id)
+        if self.search is not None:
+            self.search.add(record)
+
+    def remove(self, record: TaskRecord) -> None:
+        _remove_sorted(self.ids, record.id)
+        _remove_sorted(self.completed_ids if record.completed else self.pending_ids, record.id)
+        if self.search is not None:
+            self.search.remove(record.id)
+
+    def ids_after(self, after_id: int | None, completed: bool | None) -> list[int]:
+        ids = self.ids if completed is None else self.completed_ids if completed else self.pending_ids
+        return ids if after_id is None else ids[bisect_right(ids, after_id):]
+
+
+class MemoryStore:
+    def __init__(
+        self,
+        path: str | None = None,
+        fsync: bool = MEMORY_STORE_FSYNC,
+        snapshot_every: int = MEMORY_SNAPSHOT_EVERY,
+        change_log_size: int = MEMORY_CHANGE_LOG_SIZE,
+    ):
+        # Um único lock para leituras e escritas: as operações são curtas e todas em memória
+        self.lock = threading.RLock()
+        self.records: dict[int, TaskRecord] = {}
+        self.owners: dict[str, OwnerIndex] = {}
+        self.next_id = 1
+        self.version = 0
+        self.seq = 0
+        self.horizon = 0
+        # Alterações com seqs consecutivas: a de seq s fica em changes[s - horizon - 1]
+        self.changes: list[TaskChange] = []
+        self.change_log_size = change_log_size
+        # (dono, chave) -> (fingerprint, tarefa criada em JSON, expiração em time.time())
+        self.idempotency: dict[tuple[str, str], tuple[str, str, float]] = {}
+
+        self.path = path
+        self.fsync = fsync
+        self.snapshot_every = snapshot_every
+        self._log = None
+        self._log_entries = 0
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._open_log()
+            self._load()
+
+    # ---- leitura ----
+
+    def owner(self, owner_id: str) -> OwnerIndex:
+        index = self.owners.get(owner_id)
+        if index is None:
+            index = self.owners[owner_id] = OwnerIndex()
+        return index
+
+    def get(self, owner_id: str, task_id: int) -> TaskRecord | None:
+        record = self.records.get(task_id)
+        return record if record is not None and record.owner_id == owner_id else None
+
+    def search_index(self, owner_id: str) -> InvertedIndex:
+        index = self.owner(owner_id)
+        if index.search is None:
+            index.search = InvertedIndex(self.records[task_id] for task_id in index.ids)
+        return index.search
+
+    def changes_since(self, after_seq: int, limit: int, owner_id: str | None = None) -> list[TaskChange]:
+        start = max(after_seq - self.horizon, 0)
+        selected = []
+        for change in self.changes[start:]:
+            if owner_id is None or change.owner_id == owner_id:
+                selected.append(change)
+                if len(selected) == limit:
+                    break
+        return selected
+
+    # ---- escrita ----
+
+    def apply(self, entries: list[dict]) -> list[TaskRecord | None]:
+        """Aplica as entradas de uma escrita (put/delete/key) como uma unidade: primeiro no log,
+        depois em memória. Chamar com o lock"""
+        if not entries:
+            return []
+        self._append(entries)
+        now = datetime.now(timezone.utc)
+        results = [self._apply_entry(entry, now) for entry in entries]
+        self.version += 1
+        if self.version % PURGE_EVERY == 0:
+            self.purge_idempotency_keys()
+        if self._log is not None and self._log_entries >= self.snapshot_every:
+            self.snapshot()
+        return results
+
+    def new_record(self, owner_id: str, values: dict) -> TaskRecord:
+        record = TaskRecord(
+            id=self.next_id, title=values["title"], description=values.get("description"),
+            completed=bool(values.get("completed", False)), version=1,
+            updated_at=datetime.now(timezone.utc), owner_id=owner_id,
+        )
+        self.next_id += 1
+        return record
+
+    def _apply_entry(self, entry: dict, now: datetime) -> TaskRecord | None:
+        op = entry["op"]
+        if op == "put":
+            record = entry["task"]
+            if isinstance(record, dict):
+                record = TaskRecord.from_json(record)
+            previous = self.records.get(record.id)
+            if previous is not None:
+                self.owner(previous.owner_id).remove(previous)
+            self.records[record.id] = record
+            self.owner(record.owner_id).add(record)
+            self.next_id = max(self.next_id, record.id + 1)
+            self._record_change("update" if previous is not None else "create", record, now)
+            return record
+        if op == "delete":
+            record = self.records.pop(entry["id"], None)
+            if record is not None:
+                self.owner(record.owner_id).remove(record)
+                self._record_change("delete", record, now)
+            return record
+        if op == "key":
+            self.idempotency[(entry["owner_id"], entry["key"])] = (
+                entry["fingerprint"], entry["response"], entry["expires_at"]
+            )
+        return None
+
+    def _record_change(self, op: str, record: TaskRecord, now: datetime) -> None:
+        self.seq += 1
+        task = record.to_task() if op != "delete" else None
+        self.changes.append(
+            TaskChange(seq=self.seq, op=op, task_id=record.id, owner_id=record.owner_id, task=task, changed_at=now)
+        )
+        # Descarta em blocos para o custo de del ficar amortizado
+        if len(self.changes) > self.change_log_size * 2:
+            dropped = len(self.changes) - self.change_log_size
+            self.horizon = self.changes[dropped - 1].seq
+            del self.changes[:dropped]
+
+    def purge_idempotency_keys(self) -> None:
+        now = time.time()
+        for key in [key for key, (_, _, expires_at) in self.idempotency.items() if expires_at < now]:
+            del self.idempotency[key]
+
+    # ---- persistência ----
+
+    def _open_log(self) -> None:
+        self._log = open(os.path.join(self.path, LOG_FILE), "a+", encoding="utf-8")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._log.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._log.close()
+                self._log = None
+                raise RuntimeError(f"Memory store at {self.path} is already in use by another process")
+
+    def _append(self, entries: list[dict]) -> None:
+        if self._log is None:
+            return
+        self._log.write("".join(json.dumps(entry, separators=(",", ":"), default=_encode) + "\n" for entry in entries))
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self._log_entries += len(entries)
+
+    def _load(self) -> None:
+        snapshot_path = os.path.join(self.path, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, encoding="utf-8") as file:
+                snapshot = json.load(file)
+            for row in snapshot["tasks"]:
+                record = TaskRecord.from_json(row)
+                self.records[record.id] = record
+                self.owner(record.owner_id).add(record)
+            self.idempotency = {(owner, key): tuple(value) for owner, key, *value in snapshot["keys"]}
+            self.next_id, self.version = snapshot["next_id"], snapshot["version"]
+            # O log de alterações não vai para o snapshot: tokens anteriores a ele expiram
+            self.seq = self.horizon = snapshot["seq"]
+
+        self._log.seek(0)
+        now = datetime.now(timezone.utc)
+        valid_size = 0
+        for line in self._log:
+            try:
+                # Sem o "\n" final a entrada não chegou a ser confirmada
+                entry = json.loads(line) if line.endswith("\n") else None
+            except ValueError:
+                entry = None
+            if entry is None:
+                break  # última linha incompleta (queda no meio da escrita)
+            self._apply_entry(entry, now)
+            valid_size += len(line.encode("utf-8"))
+            self._log_entries += 1
+            if entry["op"] != "key":
+                self.version += 1
+        # Descarta a linha incompleta: senão as próximas escritas seriam emendadas a ela e,
+        # no restart seguinte, descartadas junto
+        if os.fstat(self._log.fileno()).st_size != valid_size:
+            self._log.truncate(valid_size)
+            self._log.flush()
+            os.fsync(self._log.fileno())
+
+    def snapshot(self) -> None:
+        """Grava o estado atual (arquivo temporário + rename atômico) e zera o log"""
+        if self.path is None:
+            return
+        with self.lock:
+            self.purge_idempotency_keys()
+            snapshot = {
+                "next_id": self.next_id,
+                "version": self.version,
+                "seq": self.seq,
+                "tasks": [record.to_json() for record in self.records.values()],
+                "keys": [[owner, key, *value] for (owner, key), value in self.idempotency.items()],
+            }
+            temporary = os.path.join(self.path, SNAPSHOT_FILE + ".tmp")
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump(snapshot, file, separators=(",", ":"))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, os.path.join(self.path, SNAPSHOT_FILE))
+            self._log.truncate(0)
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._log_entries = 0
+
+    def close(self) -> None:
+        with self.lock:
+            if self._log is not None:
+                self.snapshot()
+                self._log.close()
+                self._log = None
+
+
+# Store do processo (TASK_BACKEND=memory), criado no primeiro uso ou por configure_memory_store
+_store: MemoryStore | None = None
+_store_lock = threading.Lock()
+
+
+def configure_memory_store(path: str | None = MEMORY_STORE_PATH or None) -> MemoryStore:
+    global _store
+    with _store_lock:
+        previous, _store = _store, None
+        if previous is not None:
+            previous.close()
+        _store = MemoryStore(path)
+        return _store
+
+
+def get_memory_store() -> MemoryStore:
+    store = _store
+    return store if store is not None else configure_memory_store()
+
+
+def close_memory_store() -> None:
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is not None:
+        store.close()
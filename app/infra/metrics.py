@@ -0,0 +1,226 @@
+"""
+Métricas no estilo Prometheus (contadores, gauges e histogramas com rótulos) e a
+ instrumentação de infraestrutura: consultas SQL via eventos da engine, espera por
+ conexão no pool e tempo por camada (use cases / repositório).
+
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() in ("true", "1", "t")
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        # Por rótulo: contagem por bucket (não cumulativa), soma e total
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(labels, list(series[0]), series[1], series[2]) for labels, series in self._series.items()]
+        lines = self.header()
+        for labels, bucket_counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], Iterable[_Metric]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[_Metric]]) -> None:
+        """Coletores geram métricas no momento da leitura (ex.: contadores do cache)"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for metric in collector():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP por rota", ("method", "route", "status")
+))
+HTTP_SERIALIZATION_DURATION = registry.register(Histogram(
+    "http_response_serialization_seconds", "Tempo de serialização do corpo das respostas", ("media_type",)
+))
+DB_QUERY_DURATION = registry.register(Histogram(
+    "db_query_duration_seconds", "Duração das consultas SQL por operação", ("operation",)
+))
+DB_POOL_CHECKOUT_WAIT = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Espera para obter uma conexão do pool"
+))
+DB_GROUP_COMMIT_BATCH = registry.register(Histogram(
+    "db_group_commit_batch_size", "Escritas confirmadas em cada transação do group commit",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+))
+LAYER_DURATION = registry.register(Histogram(
+    "layer_call_duration_seconds", "Duração das chamadas por camada e método", ("layer", "method")
+))
+RATE_LIMIT_DECISIONS = registry.register(Counter(
+    "rate_limit_requests_total", "Requisições avaliadas pelo rate limit por decisão", ("decision",)
+))
+ADMISSION_REJECTED = registry.register(Counter(
+    "admission_rejected_total", "Requisições descartadas pelo controle de concorrência", ("reason",)
+))
+ADMISSION_QUEUE_WAIT = registry.register(Histogram(
+    "admission_queue_wait_seconds", "Espera na fila de admissão antes de ocupar uma vaga"
+))
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """Registra a duração de cada consulta via eventos da engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append((context, time.perf_counter()))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        _, start = conn.info["query_start"].pop()
+        DB_QUERY_DURATION.observe(time.perf_counter() - start, statement.lstrip().split(None, 1)[0].upper())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # Consulta que falhou não chega a after_cursor_execute: a entrada dela sai da pilha aqui
+        # (só ela; erros fora da execução, como na conexão ou na leitura do resultado, não têm entrada)
+        conn = exception_context.connection
+        stack = conn.info.get("query_start") if conn is not None else None
+        if stack and stack[-1][0] is exception_context.execution_context:
+            stack.pop()
+
+    return engine
+
+
+def timed_pool_class(pool_class):
+    """Subclasse do pool que mede a espera em connect() (checkout de conexão)"""
+
+    class TimedPool(pool_class):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return super().connect()
+            finally:
+                DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+class TimedProxy:
+    """Envolve um objeto (use cases, repositório) e registra a duração de cada método chamado"""
+
+    def __init__(self, target, layer: str):
+        self._target = target
+        self._layer = layer
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                LAYER_DURATION.observe(time.perf_counter() - start, self._layer, name)
+
+        return timed
@@ -0,0 +1,263 @@
+"""
+Controle de admissão: token bucket por cliente (com store plugável, do processo ou compartilhado
+ entre workers) e limite de requisições simultâneas com fila limitada, que descarta o excesso
+ em vez de deixar a latência de todos crescer.
+
+"""
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from app.infra.database.config import DATA_DIR
+from app.infra.metrics import (
+    ADMISSION_QUEUE_WAIT, ADMISSION_REJECTED, METRICS_ENABLED, RATE_LIMIT_DECISIONS, Gauge,
+)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "False").lower() in ("true", "1", "t")
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "50"))  # tokens (requisições) por segundo
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "100"))  # capacidade do balde
+
+# Requisições simultâneas na camada de repositório (0 desativa), quantas podem esperar por uma
+# vaga e por quanto tempo (s) antes de receberem 503
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "0"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "1.0"))
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: float, cost: float) -> tuple[float, float]:
+    """Novo saldo do balde e espera (s) até haver tokens para cost; espera 0 = admitido"""
+    tokens = min(burst, tokens + max(now - updated, 0.0) * rate)
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate
+
+
+class RateLimitStore(ABC):
+    """Guarda os baldes por chave; implementações compartilhadas (ex.: Redis) seguem este contrato"""
+
+    # Stores com E/S são chamados fora do event loop
+    blocking = False
+
+    @abstractmethod
+    def acquire(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        """Consome cost tokens do balde da chave; retorna 0 se admitido, senão a espera em segundos"""
+        pass
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Baldes no processo; com vários workers, cada um aplica o limite por conta própria"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens, wait = _refill(tokens, updated, now, rate, burst, cost)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            # Esquecer o balde de um cliente inativo equivale a devolvê-lo cheio
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteRateLimitStore(RateLimitStore):
+    """Baldes compartilhados entre os workers da mesma máquina, como o SQLiteCacheBackend"""
+
+    blocking = True
+    # Baldes já cheios (sem uso há mais que burst / rate) são removidos a cada TRIM_EVERY chamadas
+    TRIM_EVERY = 1000
+
+    def __init__(self, path: str):
+        self._calls = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        now = time.time()  # relógio comum a todos os processos
+        with self._lock:
+            # BEGIN IMMEDIATE: ler e gravar o balde sem que outro worker intercale
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated = row if row is not None else (burst, now)
+                tokens, wait = _refill(tokens, updated, now, rate, burst, cost)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                self._calls += 1
+                if self._calls % self.TRIM_EVERY == 0:
+                    self._conn.execute("DELETE FROM rate_limit_buckets WHERE updated < ?", (now - burst / rate,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+
+def create_rate_limit_store() -> RateLimitStore:
+    """Monta o store a partir de RATE_LIMIT_BACKEND (memory ou sqlite) e RATE_LIMIT_PATH (por
+    padrão, rate_limit.db no diretório de dados)"""
+    backend = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        path = os.getenv("RATE_LIMIT_PATH") or os.path.join(DATA_DIR, "rate_limit.db")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return SQLiteRateLimitStore(path)
+    return MemoryRateLimitStore()
+
+
+class TokenBucketLimiter:
+    def __init__(self, store: RateLimitStore, rate: float = RATE_LIMIT_RATE, burst: float = RATE_LIMIT_BURST):
+        if rate <= 0 or burst < 1:
+            raise ValueError("Rate limit needs rate > 0 and burst >= 1")
+        self.store = store
+        self.rate = rate
+        self.burst = burst
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        wait = self.store.acquire(key, self.rate, self.burst, cost)
+        if METRICS_ENABLED:
+            RATE_LIMIT_DECISIONS.inc("limited" if wait else "allowed")
+        return wait
+
+
+class AdmissionRejected(Exception):
+    """Sem vaga para a requisição: a fila está cheia ou a espera passou do limite"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Server overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """No máximo max_concurrent requisições em andamento e max_queue aguardando (no event loop,
+    sem ocupar threads); as demais são rejeitadas na hora, e as que esperam além de queue_timeout
+    também. release() entrega a vaga direto à próxima da fila, sem passar por um semáforo"""
+
+    def __init__(
+        self,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+    ):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._loop = None
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        # As futures pertencem a um event loop (como no ChangeFeed): estado refeito se o loop mudar
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self.active = loop, 0
+            self._waiters.clear()
+        return loop
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        if METRICS_ENABLED:
+            ADMISSION_REJECTED.inc(reason)
+        return AdmissionRejected(reason, retry_after=max(self.queue_timeout, 1.0))
+
+    async def acquire(self) -> None:
+        loop = self._bind_loop()
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full")
+        granted = loop.create_future()
+        self._waiters.append(granted)
+        start = time.perf_counter()
+        try:
+            # asyncio.wait não cancela a future no timeout: dá para saber se a vaga chegou a ser entregue
+            await asyncio.wait((granted,), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Cancelada (ex.: cliente desconectou) depois de receber a vaga: repassa, senão ela se perde
+            if granted.done() and not granted.cancelled():
+                self.release()
+            else:
+                self._abandon(granted)
+            raise
+        finally:
+            if METRICS_ENABLED:
+                ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - start)
+        if not granted.done():
+            self._abandon(granted)
+            raise self._reject("timeout")
+
+    def _abandon(self, granted: asyncio.Future) -> None:
+        granted.cancel()
+        try:
+            self._waiters.remove(granted)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        while self._waiters:
+            granted = self._waiters.popleft()
+            if not granted.done():
+                granted.set_result(None)  # a vaga passa à próxima da fila; active não muda
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def retry_after_header(seconds: float) -> str:
+    """Retry-After em segundos inteiros, arredondado para cima (nunca 0)"""
+    return str(max(math.ceil(seconds), 1))
+
+
+def admission_metrics(limiter: TokenBucketLimiter | None, concurrency: ConcurrencyLimiter | None) -> list:
+    """Limites configurados e ocupação atual, para um coletor do registry"""
+    metrics = []
+    if limiter is not None:
+        limits = Gauge("rate_limit_config", "Limites do token bucket por cliente", ("parameter",))
+        limits.set(limiter.rate, "rate_per_second")
+        limits.set(limiter.burst, "burst")
+        metrics.append(limits)
+    if concurrency is not None:
+        limits = Gauge("admission_limit", "Limites do controle de concorrência", ("parameter",))
+        limits.set(concurrency.max_concurrent, "max_concurrent")
+        limits.set(concurrency.max_queue, "max_queue")
+        usage = Gauge("admission_requests", "Requisições em andamento e na fila de admissão", ("state",))
+        usage.set(concurrency.active, "active")
+        usage.set(concurrency.waiting, "waiting")
+        metrics += [limits, usage]
+    return metrics
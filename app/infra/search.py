@@ -0,0 +1,108 @@
+"""
+Busca textual em memória: tokenização compartilhada com o FTS5 do SQLite e um índice
+ invertido usado como alternativa nos backends sem busca textual nativa.
+
+"""
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Iterable
+
+from app.domain.entities import Task
+
+_TOKEN = re.compile(r"\w+")
+
+# Peso de um termo no título em relação à descrição
+TITLE_WEIGHT = 2.0
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Minúsculas, sem acentos (como o tokenizer unicode61 remove_diacritics do FTS5)"""
+    if not text:
+        return []
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(char for char in normalized if not unicodedata.combining(char))
+    return _TOKEN.findall(stripped)
+
+
+def fts5_query(query: str) -> str | None:
+    """Converte o texto do usuário em uma consulta FTS5 segura: todos os termos, por prefixo"""
+    tokens = tokenize(query)
+    return " ".join(f'"{token}"*' for token in tokens) if tokens else None
+
+
+class InvertedIndex:
+    """Índice invertido termo -> {id: peso}, com busca por prefixo e ranking tf-idf"""
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        self._postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self._doc_terms: dict[int, set[str]] = {}
+        self._sorted_terms: list[str] | None = None
+        self._lock = threading.RLock()
+        for task in tasks:
+            self.add(task)
+
+    def add(self, task: Task) -> None:
+        with self._lock:
+            self.remove(task.id)
+            weights: dict[str, float] = defaultdict(float)
+            for token in tokenize(task.title):
+                weights[token] += TITLE_WEIGHT
+            for token in tokenize(task.description):
+                weights[token] += 1.0
+            for term, weight in weights.items():
+                if term not in self._postings:
+                    self._sorted_terms = None
+                self._postings[term][task.id] = weight
+            self._doc_terms[task.id] = set(weights)
+
+    def remove(self, task_id: int) -> None:
+        with self._lock:
+            for term in self._doc_terms.pop(task_id, ()):
+                postings = self._postings[term]
+                postings.pop(task_id, None)
+                if not postings:
+                    del self._postings[term]
+                    self._sorted_terms = None
+
+    def _terms_with_prefix(self, prefix: str) -> list[str]:
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        start = bisect_left(self._sorted_terms, prefix)
+        terms = []
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query: str, limit: int, offset: int = 0) -> list[int]:
+        """Ids das tarefas que contêm todos os termos (por prefixo), do mais ao menos relevante"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            total = max(len(self._doc_terms), 1)
+            scores: dict[int, float] | None = None
+            for token in tokens:
+                token_scores: dict[int, float] = {}
+                for term in self._terms_with_prefix(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + total / len(postings))
+                    for task_id, weight in postings.items():
+                        token_scores[task_id] = max(token_scores.get(task_id, 0.0), weight * idf)
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        task_id: score + token_scores[task_id]
+                        for task_id, score in scores.items()
+                        if task_id in token_scores
+                    }
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [task_id for task_id, _ in ranked[offset:offset + limit]]
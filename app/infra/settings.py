@@ -0,0 +1,62 @@
+"""
+Configuração da aplicação reunida em um objeto imutável, passado para create_app: permite
+ montar apps com bancos diferentes (testes, benchmarks) sem depender do ambiente do processo.
+
+"""
+import os
+from dataclasses import dataclass
+from sqlalchemy.engine import make_url
+from app.infra.database.config import DB_PROFILE, SQLALCHEMY_DATABASE_URL, sqlite_read_only_url
+from app.infra.database.sharding import shard_urls_from_env
+
+# "sql": tarefas no banco de DATABASE_URL/DATABASE_SHARDS; "memory": no MemoryStore do processo
+TASK_BACKENDS = ("sql", "memory")
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("true", "1", "t")
+
+
+@dataclass(frozen=True)
+class Settings:
+    database_url: str = SQLALCHEMY_DATABASE_URL
+    database_shards: tuple[str, ...] = ()
+    db_profile: str = DB_PROFILE
+    # Em produção com vários workers, desligue e rode a migração uma vez antes de subi-los
+    # (python -m app.interfaces.cli.migrate)
+    migrate_on_startup: bool = True
+    # Pool separado para as leituras: a réplica em database_read_url ou, com read_pool e sem ela,
+    # conexões somente leitura ao mesmo arquivo SQLite (mode=ro) ou ao mesmo servidor
+    database_read_url: str | None = None
+    read_pool: bool = False
+    task_backend: str = "sql"
+    # Diretório do log e dos snapshots do backend em memória; None = sem persistência
+    memory_store_path: str | None = None
+
+    def __post_init__(self):
+        if self.task_backend not in TASK_BACKENDS:
+            raise ValueError(f"Unknown task backend: {self.task_backend}")
+
+    def read_url(self) -> str | None:
+        """URL do pool de leitura; None quando as leituras usam o pool principal"""
+        if self.database_read_url:
+            return self.database_read_url
+        if not self.read_pool:
+            return None
+        if make_url(self.database_url).get_backend_name() == "sqlite":
+            # Banco em memória não tem como ser aberto por outra conexão
+            return sqlite_read_only_url(self.database_url)
+        return self.database_url
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            database_url=SQLALCHEMY_DATABASE_URL,
+            database_shards=tuple(shard_urls_from_env()),
+            db_profile=DB_PROFILE,
+            migrate_on_startup=_env_flag("MIGRATE_ON_STARTUP", "True"),
+            database_read_url=os.getenv("DATABASE_READ_URL") or None,
+            read_pool=_env_flag("DB_READ_POOL", "False"),
+            task_backend=os.getenv("TASK_BACKEND", "sql").lower(),
+            memory_store_path=os.getenv("MEMORY_STORE_PATH") or None,
+        )
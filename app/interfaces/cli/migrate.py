@@ -0,0 +1,44 @@
+"""
+Migração do esquema como um passo à parte do deploy: roda uma vez, antes de subir os workers
+ (que então usam MIGRATE_ON_STARTUP=false e não repetem as verificações de DDL).
+
+Uso:
+    python -m app.interfaces.cli.migrate [--database-url URL]
+
+"""
+import argparse
+from dataclasses import replace
+from app.infra.database.config import create_database_engine
+from app.infra.database.migrations import upgrade_schema
+from app.infra.database.sharding import ShardRouter
+from app.infra.settings import Settings
+
+
+def migrate(settings: Settings) -> None:
+    engine = create_database_engine(settings.database_url, settings.db_profile)
+    try:
+        upgrade_schema(engine)
+    finally:
+        engine.dispose()
+    if settings.database_shards:
+        router = ShardRouter(list(settings.database_shards), settings.db_profile)
+        try:
+            router.upgrade()
+        finally:
+            router.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Padrão: DATABASE_URL (ou o SQLite local)")
+    args = parser.parse_args()
+
+    settings = Settings.from_env()
+    if args.database_url:
+        settings = replace(settings, database_url=args.database_url)
+    migrate(settings)
+    print(f"Schema up to date: {settings.database_url}")
+
+
+if __name__ == "__main__":
+    main()
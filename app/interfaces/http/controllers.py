@@ -3,49 +3,468 @@ Classe atua como interface adapter da camada HTTP, resposável pela orquestraç
 comunica-se só com a classe task_usecases -> dessa forma se mantém independete da infra
 
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+import anyio
+from hashlib import blake2b
+from collections.abc import AsyncGenerator, AsyncIterator, Iterator
+from fastapi import (
+    APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response, WebSocket, status
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.requests import HTTPConnection
+from fastapi.responses import StreamingResponse
+from pydantic import StrictInt, ValidationError
 from sqlalchemy.orm import Session
-from typing import List
-from app.domain.entities import Task
-from app.infra.database.repository import SQLiteTaskRepository
+from typing import Any, List, Literal, Optional
+from app.domain.entities import DEFAULT_OWNER, STATS_GROUP_FIELDS, Task, TaskDelta, TaskStats
+from app.domain.repositories import ROW_FIELDS
+from app.domain.exceptions import (
+    ChangeLogExpiredError, IdempotencyKeyInProgressError, IdempotencyKeyReusedError, VersionConflictError
+)
+from app.interfaces.http.negotiation import negotiate
+from app.interfaces.http.responses import (
+    EXPORT_FORMATS, JSON_MEDIA_TYPE, LIST_FORMATS, encode_rows, rows_response
+)
+from app.interfaces.http.etags import collection_etag, etag_matches, task_etag, task_version_from_etag
+from app.interfaces.http.schemas import BatchItemResult, BatchResult
+from app.infra.changes import ChangeEvent, ChangeFeed, ChangeFeedOverflow, change_feed_for
+from app.infra.cache import CachedTaskRepository, LRUCache, cache_metrics_collector, create_cache_backend
+from app.infra.metrics import METRICS_ENABLED, TimedProxy, registry
+from app.infra.ratelimit import ADMISSION_MAX_CONCURRENT, AdmissionRejected, ConcurrencyLimiter, retry_after_header
+from app.infra.database.group_commit import (
+    GROUP_COMMIT_ENABLED, GroupCommitTaskRepository, group_commit_writer_for
+)
+from app.infra.database.repository import SQLTaskRepository
+from app.infra.database.sharding import get_shard_router
+from app.infra.memory.feed import memory_change_feed_for
+from app.infra.memory.repository import InMemoryTaskRepository
+from app.infra.memory.store import get_memory_store
 from app.usecases.task_usecases import TaskUseCases
-from app.infra.database.config import get_db
+from app.infra.database.config import (
+    IDEMPOTENCY_CACHE_SIZE, IDEMPOTENCY_KEY_TTL, READ_STICKY_CLIENTS, READ_STICKY_SECONDS, get_db, get_read_db,
+)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+DEFAULT_SEARCH_SIZE = 20
+MAX_BATCH_SIZE = 1000
+CHANGE_PAGE_SIZE = 500
+HEARTBEAT_INTERVAL = 15.0  # segundos sem eventos até enviar um keep-alive
+CHANGES_GONE_DETAIL = "Changes since this token were compacted; resync from GET /tasks"
+OWNER_ID_PATTERN = r"^[A-Za-z0-9_.\-]{1,64}$"
+OVERLOADED_DETAIL = "Server is overloaded; retry later"
+
+# Cache compartilhado por todas as requisições do processo (None quando desativado)
+task_cache = create_cache_backend()
+if task_cache is not None:
+    registry.register_collector(cache_metrics_collector(task_cache))
+
+# Vagas de requisições simultâneas à frente dos repositórios (None quando desativado)
+admission = ConcurrencyLimiter() if ADMISSION_MAX_CONCURRENT > 0 else None
+
+# Respostas recentes de POST /tasks por (dono, Idempotency-Key), à frente da tabela idempotency_keys:
+# retentativas atendidas no mesmo processo nem chegam ao banco
+idempotency_cache = LRUCache(max_size=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_KEY_TTL)
+
+# Donos que fizeram uma requisição de escrita há menos de READ_STICKY_SECONDS: suas leituras vão
+# ao banco principal até a réplica alcançá-lo (None quando desativado)
+recent_writers = LRUCache(max_size=READ_STICKY_CLIENTS, ttl=READ_STICKY_SECONDS) if READ_STICKY_SECONDS > 0 else None
+
+# format da exportação -> media type (o primeiro de cada formato, em EXPORT_FORMATS)
+EXPORT_MEDIA_TYPES = {}
+for _media_type, _format in EXPORT_FORMATS.items():
+    EXPORT_MEDIA_TYPES.setdefault(_format, _media_type)
+NOT_ACCEPTABLE_DETAIL = "None of the media types in Accept is available"
+
+
+def get_owner_id(
+    x_owner_id: Optional[str] = Header(None, pattern=OWNER_ID_PATTERN, description="Dono das tarefas")
+) -> str:
+    return x_owner_id or DEFAULT_OWNER
+
+
+def get_owner_db(owner_id: str = Depends(get_owner_id), db: Session = Depends(get_db)):
+    """Sessão do banco do dono: a do shard dele, com particionamento, ou a sessão padrão"""
+    shard_router = get_shard_router()
+    if shard_router is None:
+        yield db
+        return
+    shard_db = shard_router.session_for(owner_id)
+    try:
+        yield shard_db
+    finally:
+        shard_db.close()
+
+
+async def admit_request(connection: HTTPConnection):
+    """Ocupa uma vaga do controle de concorrência enquanto o handler roda (o corpo em streaming
+    sai depois de liberá-la); WebSockets, conexões longas, não ocupam vaga"""
+    if admission is None or connection.scope["type"] != "http":
+        yield
+        return
+    try:
+        await admission.acquire()
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=OVERLOADED_DETAIL,
+            headers={"Retry-After": retry_after_header(e.retry_after)},
+        )
+    try:
+        yield
+    finally:
+        admission.release()
+
+
+def _read_session(connection: HTTPConnection, read_db: Optional[Session], owner_id: str) -> Optional[Session]:
+    """Sessão de leitura para a requisição, ou None para ler no banco principal: com shards (sem
+    réplicas), em requisições de escrita e, com read-your-writes, logo depois de uma escrita do dono"""
+    if read_db is None or get_shard_router() is not None or connection.scope["type"] != "http":
+        return None
+    if connection.scope["method"] not in ("GET", "HEAD"):
+        if recent_writers is not None:
+            recent_writers.set(owner_id, True)
+        return None
+    if recent_writers is not None and recent_writers.get(owner_id):
+        return None
+    return read_db
+
+
+def _uses_memory_backend(connection: HTTPConnection) -> bool:
+    # Apps sem lifespan (sem settings no state) ficam no backend SQL
+    settings = getattr(connection.app.state, "settings", None)
+    return settings is not None and settings.task_backend == "memory"
+
+
+def _change_feed(connection: HTTPConnection, db: Session) -> ChangeFeed:
+    if _uses_memory_backend(connection):
+        return memory_change_feed_for(get_memory_store())
+    return change_feed_for(db.get_bind())
+
+
+def _request_fingerprint(task: Task) -> str:
+    """Identifica o conteúdo da requisição para detectar uma chave reutilizada com outro corpo"""
+    return blake2b(task.model_dump_json().encode(), digest_size=16).hexdigest()
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or 'body'}: {err['msg']}" for err in error.errors()
+    )
+
+
+def _negotiate_media_type(accept: Optional[str], formats: dict[str, str]) -> str:
+    media_type = negotiate(accept, list(formats))
+    if media_type is None:
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=NOT_ACCEPTABLE_DETAIL)
+    return media_type
+
+
+def _export_stream(rows: Iterator[tuple], fmt: str, *sessions: Optional[Session]) -> Iterator[bytes]:
+    """Serializa as linhas em lotes, sem Task por linha; as sessões são fechadas só ao fim do streaming"""
+    try:
+        yield from encode_rows(rows, ROW_FIELDS, fmt)
+    finally:
+        for db in sessions:
+            if db is not None:
+                db.close()
+
+
+def _last_event_id(header: Optional[str]) -> Optional[int]:
+    try:
+        return int(header) if header is not None else None
+    except ValueError:
+        return None
+
+
+async def _change_batches(
+    feed: ChangeFeed, usecases: TaskUseCases, after_seq: Optional[int], db: Session, owner_id: str
+) -> AsyncGenerator[list[ChangeEvent], None]:
+    """Alcança o log a partir de after_seq e depois segue o feed ao vivo; lotes vazios são keep-alives.
+    A assinatura é feita antes da leitura de alcance, então nenhuma alteração fica no meio"""
+    subscription = await feed.subscribe(owner_id)
+    try:
+        last_seq = subscription.start_seq if after_seq is None else after_seq
+        while True:
+            changes = await run_in_threadpool(usecases.list_changes, last_seq, CHANGE_PAGE_SIZE)
+            if changes:
+                last_seq = changes[-1].seq
+                yield [ChangeEvent.from_change(change) for change in changes]
+            if len(changes) < CHANGE_PAGE_SIZE:
+                break
+        # Ao vivo não há mais consultas por assinante: a conexão volta ao pool
+        await run_in_threadpool(db.close)
+
+        while True:
+            events = [event for event in await subscription.get(HEARTBEAT_INTERVAL) if event.seq > last_seq]
+            if events:
+                last_seq = events[-1].seq
+            yield events
+    except ChangeFeedOverflow:
+        return
+    finally:
+        feed.unsubscribe(subscription)
+        db.close()
+
+
+async def _sse_stream(batches: AsyncGenerator[list[ChangeEvent], None]) -> AsyncIterator[bytes]:
+    try:
+        async for events in batches:
+            if not events:
+                yield b": keep-alive\n\n"
+                continue
+            yield b"".join(
+                b"id: %d\nevent: %s\ndata: %s\n\n" % (event.seq, event.op.encode(), event.data)
+                for event in events
+            )
+    finally:
+        # Fecha a assinatura já na desconexão, sem depender do coletor de lixo
+        await batches.aclose()
+
 
 class TaskController:
     def __init__(self, router: APIRouter):
         self.router = router
         self._register_routes()
+        self._register_batch_routes()
 
     def _register_routes(self):
+        # Os handlers são síncronos de propósito: o FastAPI os executa no threadpool,
+        # então as chamadas bloqueantes à Session do SQLAlchemy não travam o event loop.
         @self.router.post(
             "/tasks",
             response_model=Task,
             status_code=status.HTTP_201_CREATED,
             summary="Criação de nova tarefa",
-            description="Cria uma nova tarefa com título, descrição e status de conclusão."
+            description=(
+                "Cria uma nova tarefa com título, descrição e status de conclusão. "
+                "Com Idempotency-Key, repetições da mesma requisição devolvem a tarefa já criada "
+                "(com Idempotent-Replayed: true) em vez de criar outra."
+            ),
+            responses={
+                409: {"description": "A request with the same Idempotency-Key is still in progress"},
+                422: {"description": "Idempotency-Key already used with a different request body"},
+            }
         )
-        async def create_task(
+        def create_task(
             task: Task,
+            response: Response,
+            idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255),
+            owner_id: str = Depends(get_owner_id),
             usecases: TaskUseCases = Depends(self._get_usecases)
         ):
             try:
-                return usecases.create_task(task)
+                if idempotency_key is None:
+                    created = usecases.create_task(task)
+                else:
+                    created = self._create_once(usecases, task, owner_id, idempotency_key, response)
+                response.headers["ETag"] = task_etag(created)
+                return created
             except ValueError as e:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=str(e)
                 )
+            except IdempotencyKeyReusedError as e:
+                raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+            except IdempotencyKeyInProgressError as e:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+        # Registradas antes de /tasks/{task_id} para que "search", "stats", "changes", "export" e "events" não sejam lidos como id
+        @self.router.get(
+            "/tasks/search",
+            response_model=List[Task],
+            summary="Buscar tarefas por texto",
+            description=(
+                "Busca por palavras (e prefixos) no título e na descrição, ordenada por relevância. "
+                "Use o cabeçalho X-Next-Offset como offset para obter a próxima página."
+            )
+        )
+        def search_tasks(
+            request: Request,
+            response: Response,
+            q: str = Query(..., min_length=1, max_length=200),
+            limit: int = Query(DEFAULT_SEARCH_SIZE, ge=1, le=MAX_PAGE_SIZE),
+            offset: int = Query(0, ge=0),
+            usecases: TaskUseCases = Depends(self._get_usecases)
+        ):
+            page = usecases.search_tasks(q, limit, offset)
+            if page.next_cursor is not None:
+                next_url = request.url.include_query_params(offset=page.next_cursor)
+                response.headers["X-Next-Offset"] = str(page.next_cursor)
+                response.headers["Link"] = f'<{next_url}>; rel="next"'
+            return page.items
+
+        @self.router.get(
+            "/tasks/stats",
+            response_model=TaskStats,
+            response_model_exclude_none=True,
+            summary="Estatísticas agregadas das tarefas",
+            description=(
+                "Total, concluídas e pendentes, lidos de contadores mantidos a cada escrita "
+                "(sem varrer a tabela). group_by=completed inclui a contagem por grupo."
+            ),
+            responses={
+                304: {"description": "Not modified (If-None-Match)"}
+            }
+        )
+        def get_task_stats(
+            request: Request,
+            response: Response,
+            group_by: Optional[Literal[STATS_GROUP_FIELDS]] = Query(None),
+            if_none_match: Optional[str] = Header(None),
+            owner_id: str = Depends(get_owner_id),
+            usecases: TaskUseCases = Depends(self._get_usecases)
+        ):
+            # Painéis consultam com frequência: com a ETag da coleção o 304 nem lê os contadores
+            version = usecases.get_collection_version()
+            if version is not None:
+                etag = collection_etag(version, f"{owner_id}/stats?{request.query_params}")
+                if etag_matches(if_none_match, etag):
+                    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+                response.headers["ETag"] = etag
+            return usecases.get_task_stats(group_by)
+
+        @self.router.get(
+            "/tasks/export",
+            summary="Exportar todas as tarefas em streaming",
+            description=(
+                "Emite as tarefas em ordem de id à medida que são lidas do banco "
+                "(NDJSON, array JSON, JSON colunar por lote ou MessagePack). O formato vem de format "
+                "ou, sem ele, do Accept. Use after_id para retomar uma exportação."
+            ),
+            response_class=StreamingResponse,
+            responses={
+                406: {"description": "No export format in Accept is available"}
+            }
+        )
+        def export_tasks(
+            format: Optional[str] = Query(None, pattern=f"^({'|'.join(EXPORT_MEDIA_TYPES)})$"),
+            after_id: Optional[int] = Query(None, ge=0),
+            accept: Optional[str] = Header(None),
+            db: Session = Depends(get_owner_db),
+            read_db: Optional[Session] = Depends(get_read_db),
+            usecases: TaskUseCases = Depends(self._get_usecases)
+        ):
+            if format is None:
+                format = EXPORT_FORMATS[_negotiate_media_type(accept, EXPORT_FORMATS)]
+            rows = usecases.export_task_rows(after_id=after_id)
+            return StreamingResponse(
+                _export_stream(rows, format, db, read_db),
+                media_type=EXPORT_MEDIA_TYPES[format],
+                headers={"Vary": "Accept"},
+            )
+
+        @self.router.get(
+            "/tasks/changes",
+            response_model=TaskDelta,
+            summary="Sincronização incremental",
+            description=(
+                "Sem since, devolve só o token atual: guarde-o e baixe a lista completa em GET /tasks. "
+                "Com since, devolve o estado atual das tarefas criadas/alteradas e os ids excluídos "
+                "desde o token, e o próximo token (repita enquanto has_more). "
+                "410 indica token expirado: refaça a sincronização completa."
+            ),
+            responses={
+                410: {"description": "Token older than the retained change log"}
+            }
+        )
+        def sync_tasks(
+            since: Optional[int] = Query(None, ge=0),
+            limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+            usecases: TaskUseCases = Depends(self._get_usecases)
+        ):
+            try:
+                return usecases.sync_tasks(since, limit)
+            except ChangeLogExpiredError:
+                raise HTTPException(status_code=status.HTTP_410_GONE, detail=CHANGES_GONE_DETAIL)
+
+        @self.router.get(
+            "/tasks/events",
+            summary="Feed de alterações (Server-Sent Events)",
+            description=(
+                "Emite cada criação, atualização e exclusão como um evento SSE (id = seq). "
+                "Com since (ou Last-Event-ID) envia antes as alterações perdidas; sem ele, só as novas."
+            ),
+            response_class=StreamingResponse,
+        )
+        async def task_events(
+            request: Request,
+            since: Optional[int] = Query(None, ge=0),
+            last_event_id: Optional[str] = Header(None),
+            db: Session = Depends(get_owner_db),
+            owner_id: str = Depends(get_owner_id),
+            usecases: TaskUseCases = Depends(self._get_usecases)
+        ):
+            after_seq = since if since is not None else _last_event_id(last_event_id)
+            if after_seq is not None:
+                try:
+                    await run_in_threadpool(usecases.check_change_token, after_seq)
+                except ChangeLogExpiredError:
+                    db.close()
+                    raise HTTPException(status_code=status.HTTP_410_GONE, detail=CHANGES_GONE_DETAIL)
+            batches = _change_batches(_change_feed(request, db), usecases, after_seq, db, owner_id)
+            return StreamingResponse(
+                _sse_stream(batches),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        @self.router.websocket("/tasks/events")
+        async def task_events_ws(
+            websocket: WebSocket,
+            since: Optional[int] = Query(None, ge=0),
+            db: Session = Depends(get_owner_db),
+            owner_id: str = Depends(get_owner_id),
+            usecases: TaskUseCases = Depends(self._get_usecases)
+        ):
+            """Mesmo feed via WebSocket: uma mensagem de texto (TaskChange em JSON) por alteração"""
+            await websocket.accept()
+            if since is not None:
+                try:
+                    await run_in_threadpool(usecases.check_change_token, since)
+                except ChangeLogExpiredError:
+                    # 4410: equivalente ao 410 do HTTP (token compactado ou desconhecido)
+                    db.close()
+                    await websocket.close(code=4410, reason=CHANGES_GONE_DETAIL)
+                    return
+            batches = _change_batches(_change_feed(websocket, db), usecases, since, db, owner_id)
+
+            disconnected = False
+
+            try:
+                async with anyio.create_task_group() as task_group:
+                    async def wait_disconnect():
+                        nonlocal disconnected
+                        while (await websocket.receive())["type"] != "websocket.disconnect":
+                            pass
+                        disconnected = True
+                        task_group.cancel_scope.cancel()
+
+                    task_group.start_soon(wait_disconnect)
+                    async for events in batches:
+                        for event in events:
+                            await websocket.send_text(event.data.decode())
+                    task_group.cancel_scope.cancel()
+            finally:
+                await batches.aclose()
+
+            # O feed descartou o cliente por lentidão: 1013 para que reconecte com since = último seq
+            if not disconnected:
+                await websocket.close(code=1013)
 
         @self.router.get(
             "/tasks/{task_id}",
             response_model=Task,
             summary="Obter uma tarefa pelo ID",
             responses={
+                304: {"description": "Not modified (If-None-Match)"},
                 404: {"description": "Task not found"}
             }
         )
-        async def get_task(
+        def get_task(
             task_id: int,
+            response: Response,
+            if_none_match: Optional[str] = Header(None),
             usecases: TaskUseCases = Depends(self._get_usecases)
         ):
             task = usecases.get_task_by_id(task_id)
@@ -54,37 +473,104 @@ class TaskController:
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Task not found"
                 )
+            etag = task_etag(task)
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            response.headers["ETag"] = etag
             return task
 
         @self.router.get(
             "/tasks",
             response_model=List[Task],
-            summary="Listar todas as tarefas"
+            summary="Listar tarefas com paginação por cursor",
+            description=(
+                "Lista tarefas ordenadas por id. Use o cabeçalho X-Next-Cursor "
+                "(ou o Link rel=next) como after_id para obter a próxima página. "
+                "Pelo Accept, a página também sai em JSON colunar "
+                "(application/vnd.todo.columnar+json) ou MessagePack (application/msgpack)."
+            ),
+            responses={
+                304: {"description": "Not modified (If-None-Match)"},
+                406: {"description": "No media type in Accept is available"},
+            }
         )
-        async def list_tasks(
+        def list_tasks(
+            request: Request,
+            limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+            after_id: Optional[int] = Query(None, ge=0),
+            completed: Optional[bool] = None,
+            title_prefix: Optional[str] = Query(None, min_length=1, max_length=100),
+            if_none_match: Optional[str] = Header(None),
+            accept: Optional[str] = Header(None),
+            owner_id: str = Depends(get_owner_id),
             usecases: TaskUseCases = Depends(self._get_usecases)
         ):
-            return usecases.list_tasks()
+            media_type = _negotiate_media_type(accept, LIST_FORMATS)
+            # A versão é lida antes da página: se houver escrita no meio, a ETag fica
+            # mais antiga que os dados e o cliente apenas revalida de novo
+            headers = {"Vary": "Accept"}
+            version = usecases.get_collection_version()
+            if version is not None:
+                # Cada formato é uma representação diferente, com a sua própria ETag
+                representation = "" if media_type == JSON_MEDIA_TYPE else f"#{media_type}"
+                etag = collection_etag(version, f"{owner_id}?{request.query_params}{representation}")
+                if etag_matches(if_none_match, etag):
+                    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Vary": "Accept"})
+                headers["ETag"] = etag
+
+            rows, next_cursor = usecases.list_tasks_rows(
+                limit, after_id=after_id, completed=completed, title_prefix=title_prefix
+            )
+            if next_cursor is not None:
+                next_url = request.url.include_query_params(after_id=next_cursor)
+                headers["X-Next-Cursor"] = str(next_cursor)
+                headers["Link"] = f'<{next_url}>; rel="next"'
+            # Leitura enxuta: as linhas já vêm do banco no formato de Task, então a resposta
+            # é montada aqui e o FastAPI não as valida/serializa de novo contra response_model
+            return rows_response(rows, ROW_FIELDS, media_type, headers)
 
         @self.router.put(
             "/tasks/{task_id}",
             response_model=Task,
             summary="Atualizar uma tarefa",
+            description=(
+                "Envie a ETag da tarefa em If-Match para só atualizar se ninguém a "
+                "alterou desde a leitura (controle otimista de concorrência)."
+            ),
             responses={
-                404: {"description": "Task not found"}
+                404: {"description": "Task not found"},
+                412: {"description": "Task changed since the given ETag (If-Match)"}
             }
         )
-        async def update_task(
+        def update_task(
             task_id: int,
             task: Task,
+            response: Response,
+            if_match: Optional[str] = Header(None),
             usecases: TaskUseCases = Depends(self._get_usecases)
         ):
-            updated_task = usecases.update_task(task_id, task)
+            expected_version = None
+            try:
+                if if_match and if_match.strip() != "*":
+                    expected_version = task_version_from_etag(if_match, task_id)
+                updated_task = usecases.update_task(task_id, task, expected_version=expected_version)
+            except (ValueError, VersionConflictError):
+                raise HTTPException(
+                    status_code=status.HTTP_412_PRECONDITION_FAILED,
+                    detail="Task was modified by another request"
+                )
             if not updated_task:
+                if if_match and if_match.strip() == "*":
+                    # If-Match: * exige uma representação atual; sem ela, a precondição falha (RFC 9110)
+                    raise HTTPException(
+                        status_code=status.HTTP_412_PRECONDITION_FAILED,
+                        detail="Task does not exist"
+                    )
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Task not found"
                 )
+            response.headers["ETag"] = task_etag(updated_task)
             return updated_task
 
         @self.router.delete(
@@ -95,7 +581,7 @@ class TaskController:
                 404: {"description": "Task not found"}
             }
         )
-        async def delete_task(
+        def delete_task(
             task_id: int,
             usecases: TaskUseCases = Depends(self._get_usecases)
         ):
@@ -106,8 +592,129 @@ class TaskController:
                 )
             return None
 
-    def _get_usecases(self, db: Session = Depends(get_db)):
-        return TaskUseCases(SQLiteTaskRepository(db))
+    def _register_batch_routes(self):
+        # Cada item é validado isoladamente para que um item inválido não derrube o lote
+
+        @self.router.post(
+            "/tasks:batch",
+            response_model=BatchResult,
+            summary="Criar tarefas em lote",
+            description="Cria várias tarefas em uma única transação, com resultado por item."
+        )
+        def batch_create_tasks(
+            items: List[Any] = Body(..., max_length=MAX_BATCH_SIZE),
+            usecases: TaskUseCases = Depends(self._get_usecases)
+        ):
+            results: list[BatchItemResult | None] = [None] * len(items)
+            valid: list[tuple[int, Task]] = []
+            for index, item in enumerate(items):
+                try:
+                    valid.append((index, Task.model_validate(item)))
+                except ValidationError as e:
+                    results[index] = BatchItemResult(
+                        index=index, status=422, error=_validation_message(e)
+                    )
+
+            created = usecases.bulk_create_tasks([task for _, task in valid])
+            for (index, _), task in zip(valid, created):
+                results[index] = BatchItemResult(index=index, status=201, id=task.id, task=task)
+            return BatchResult(results=results)
+
+        @self.router.patch(
+            "/tasks:batch",
+            response_model=BatchResult,
+            summary="Atualizar tarefas em lote",
+            description="Cada item deve conter o id e os campos da tarefa a atualizar."
+        )
+        def batch_update_tasks(
+            items: List[Any] = Body(..., max_length=MAX_BATCH_SIZE),
+            usecases: TaskUseCases = Depends(self._get_usecases)
+        ):
+            results: list[BatchItemResult | None] = [None] * len(items)
+            valid: list[tuple[int, tuple[int, Task]]] = []
+            for index, item in enumerate(items):
+                task_id = item.get("id") if isinstance(item, dict) else None
+                # type() e não isinstance: bool é subclasse de int, e {"id": true} não é a tarefa 1
+                if type(task_id) is not int:
+                    error = "id: Field required" if task_id is None else "id: Input should be a valid integer"
+                    results[index] = BatchItemResult(index=index, status=422, error=error)
+                    continue
+                try:
+                    valid.append((index, (task_id, Task.model_validate(item))))
+                except ValidationError as e:
+                    results[index] = BatchItemResult(
+                        index=index, status=422, id=task_id, error=_validation_message(e)
+                    )
+
+            updated = usecases.bulk_update_tasks([update for _, update in valid])
+            for (index, (task_id, _)), task in zip(valid, updated):
+                if task is None:
+                    results[index] = BatchItemResult(
+                        index=index, status=404, id=task_id, error="Task not found"
+                    )
+                else:
+                    results[index] = BatchItemResult(index=index, status=200, id=task_id, task=task)
+            return BatchResult(results=results)
+
+        @self.router.delete(
+            "/tasks:batch",
+            response_model=BatchResult,
+            summary="Excluir tarefas em lote",
+            description="Recebe uma lista de ids e os exclui em uma única instrução."
+        )
+        def batch_delete_tasks(
+            task_ids: List[StrictInt] = Body(..., max_length=MAX_BATCH_SIZE),
+            usecases: TaskUseCases = Depends(self._get_usecases)
+        ):
+            deleted = usecases.bulk_delete_tasks(task_ids)
+            return BatchResult(results=[
+                BatchItemResult(index=index, status=204, id=task_id)
+                if ok else
+                BatchItemResult(index=index, status=404, id=task_id, error="Task not found")
+                for index, (task_id, ok) in enumerate(zip(task_ids, deleted))
+            ])
+
+    @staticmethod
+    def _create_once(usecases: TaskUseCases, task: Task, owner_id: str, key: str, response: Response) -> Task:
+        fingerprint = _request_fingerprint(task)
+        cache_key = f"{owner_id}:{key}"
+        cached = idempotency_cache.get(cache_key)
+        if cached is not None:
+            if cached[0] != fingerprint:
+                raise IdempotencyKeyReusedError(key)
+            created, replayed = cached[1], True
+        else:
+            created, replayed = usecases.create_task_once(task, key, fingerprint)
+            idempotency_cache.set(cache_key, (fingerprint, created))
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return created
+
+    def _get_usecases(
+        self,
+        connection: HTTPConnection,
+        _admitted: None = Depends(admit_request),
+        db: Session = Depends(get_owner_db),
+        owner_id: str = Depends(get_owner_id),
+        read_db: Optional[Session] = Depends(get_read_db),
+    ):
+        if _uses_memory_backend(connection):
+            # Já em memória: o cache de tarefas só duplicaria os registros
+            repository = InMemoryTaskRepository(get_memory_store(), owner_id)
+        else:
+            read_db = _read_session(connection, read_db, owner_id)
+            if GROUP_COMMIT_ENABLED:
+                repository = GroupCommitTaskRepository(
+                    db, group_commit_writer_for(db.get_bind()), owner_id, read_db=read_db
+                )
+            else:
+                repository = SQLTaskRepository(db, owner_id, read_db=read_db)
+            if task_cache is not None:
+                # Leituras da réplica usam o cache, mas não o preenchem
+                repository = CachedTaskRepository(repository, task_cache, populate=read_db is None)
+        if METRICS_ENABLED:
+            return TimedProxy(TaskUseCases(TimedProxy(repository, "repository")), "usecase")
+        return TaskUseCases(repository)
 
 
 # Uso:
@@ -0,0 +1,36 @@
+"""
+Funções de apoio às requisições condicionais (ETag / If-None-Match) da camada HTTP
+
+"""
+import hashlib
+import re
+from app.domain.entities import Task
+
+_TASK_ETAG = re.compile(r'^"t(\d+)-v(\d+)"$')
+
+
+def task_etag(task: Task) -> str:
+    return f'"t{task.id}-v{task.version}"'
+
+
+def task_version_from_etag(etag: str, task_id: int) -> int:
+    """Extrai a versão de uma ETag de tarefa; ValueError se ela não for desta tarefa. Aceita a forma
+    fraca (W/) que a compressão dá à ETag: a versão identifica o estado em qualquer codificação"""
+    match = _TASK_ETAG.match(etag.strip().removeprefix("W/"))
+    if not match or int(match.group(1)) != task_id:
+        raise ValueError(f"ETag {etag} does not identify task {task_id}")
+    return int(match.group(2))
+
+
+def collection_etag(version: int, query: str) -> str:
+    """ETag da listagem: versão da coleção combinada com os parâmetros da consulta"""
+    digest = hashlib.blake2b(query.encode(), digest_size=8).hexdigest()
+    return f'"c{version}-{digest}"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """Comparação fraca do If-None-Match (RFC 9110): ignora o prefixo W/ e aceita "*" """
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
@@ -0,0 +1,51 @@
+"""
+Negociação de conteúdo (RFC 9110 §12.5): escolhe, entre as opções oferecidas pelo servidor,
+ a melhor para um cabeçalho Accept ou Accept-Encoding, respeitando os pesos q.
+
+"""
+from collections.abc import Iterator, Sequence
+
+
+def _parse(header: str) -> Iterator[tuple[str, float]]:
+    for part in header.split(","):
+        value, *params = [item.strip() for item in part.split(";")]
+        weight = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(number)
+                except ValueError:
+                    weight = 0.0
+        if value:
+            yield value.lower(), weight
+
+
+def _specificity(media_range: str, offer: str) -> int | None:
+    """Quão específica é a faixa que casa com a opção (maior vence); None se não casa"""
+    if media_range == offer:
+        return 2
+    if media_range.endswith("/*") and media_range != "*/*" and offer.startswith(media_range[:-1]):
+        return 1
+    if media_range in ("*", "*/*"):
+        return 0
+    return None
+
+
+def negotiate(header: str | None, offered: Sequence[str]) -> str | None:
+    """Opção com o maior q; em empate, a que vem antes em offered (preferência do servidor).
+    Sem cabeçalho, a primeira opção; None se nenhuma for aceitável (q=0 ou ausente)"""
+    if not header:
+        return offered[0] if offered else None
+    ranges = list(_parse(header))
+    best, best_weight = None, 0.0
+    for offer in offered:
+        # Vale o q da faixa mais específica que casa: "gzip;q=0, *" exclui só o gzip
+        matched, weight = -1, 0.0
+        for media_range, range_weight in ranges:
+            specificity = _specificity(media_range, offer)
+            if specificity is not None and specificity > matched:
+                matched, weight = specificity, range_weight
+        if weight > best_weight:
+            best, best_weight = offer, weight
+    return best
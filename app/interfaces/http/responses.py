@@ -0,0 +1,141 @@
+"""
+Classes de resposta JSON da API: codificação com orjson quando instalado (bem mais rápida que
+ o json da biblioteca padrão e com suporte nativo a datetime), com fallback para o json padrão.
+ As listagens também podem sair em JSON colunar ou MessagePack (msgpack opcional), via Accept.
+
+"""
+import json
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import date, datetime
+from itertools import islice
+from fastapi.responses import JSONResponse, Response
+from app.infra.metrics import HTTP_SERIALIZATION_DURATION, METRICS_ENABLED
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depende do ambiente
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Um objeto {campo: [valores]} por resposta (ou por lote, na exportação): sem repetir as chaves
+COLUMNAR_MEDIA_TYPE = "application/vnd.todo.columnar+json"
+COLUMNAR_NDJSON_MEDIA_TYPE = "application/vnd.todo.columnar+x-ndjson"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Formatos das linhas por media type, na ordem de preferência do servidor (o primeiro é o padrão)
+LIST_FORMATS = {JSON_MEDIA_TYPE: "json", COLUMNAR_MEDIA_TYPE: "columnar"}
+EXPORT_FORMATS = {
+    NDJSON_MEDIA_TYPE: "ndjson",
+    JSON_MEDIA_TYPE: "json",
+    COLUMNAR_NDJSON_MEDIA_TYPE: "columnar",
+}
+if msgpack is not None:
+    LIST_FORMATS[MSGPACK_MEDIA_TYPE] = "msgpack"
+    LIST_FORMATS["application/x-msgpack"] = "msgpack"
+    EXPORT_FORMATS[MSGPACK_MEDIA_TYPE] = "msgpack"
+    EXPORT_FORMATS["application/x-msgpack"] = "msgpack"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_json_default,
+    ).encode("utf-8")
+
+
+def _packb(content) -> bytes:
+    # Datas como texto ISO 8601, como no JSON
+    return msgpack.packb(content, default=_json_default, use_bin_type=True)
+
+
+def _columns(rows: Sequence[Sequence], fields: Sequence[str]) -> dict[str, list]:
+    if not rows:
+        return {field: [] for field in fields}
+    return dict(zip(fields, map(list, zip(*rows))))
+
+
+def render_rows(rows: list[dict], fields: Sequence[str], fmt: str) -> bytes:
+    """Corpo de uma listagem já em dicts no formato pedido (json, columnar ou msgpack)"""
+    if fmt == "columnar":
+        return _dumps({field: [row[field] for row in rows] for field in fields})
+    if fmt == "msgpack":
+        return _packb(rows)
+    return _dumps(rows)
+
+
+def rows_response(rows: list[dict], fields: Sequence[str], media_type: str, headers: dict) -> Response:
+    start = time.perf_counter()
+    body = render_rows(rows, fields, LIST_FORMATS[media_type])
+    if METRICS_ENABLED:
+        HTTP_SERIALIZATION_DURATION.observe(time.perf_counter() - start, media_type)
+    return Response(body, media_type=media_type, headers=headers)
+
+
+def encode_rows(
+    rows: Iterable[Sequence], fields: Sequence[str], fmt: str = "json", batch_size: int = 1000
+) -> Iterator[bytes]:
+    """Codifica linhas (valores na ordem de fields) direto em bytes, um pedaço por lote: array JSON
+    (fmt="json"), um objeto por linha (fmt="ndjson"), um objeto colunar por lote e linha
+    (fmt="columnar") ou um mapa MessagePack por linha, em sequência (fmt="msgpack").
+    Só o lote corrente existe ao mesmo tempo, então a memória não cresce com o tamanho da tabela"""
+    rows = iter(rows)
+    separator = b"["
+    packer = msgpack.Packer(default=_json_default, use_bin_type=True) if fmt == "msgpack" else None
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        if fmt == "columnar":
+            yield _dumps(_columns(batch, fields)) + b"\n"
+            continue
+        items = [dict(zip(fields, row)) for row in batch]
+        if fmt == "ndjson":
+            yield b"".join(_dumps(item) + b"\n" for item in items)
+        elif fmt == "msgpack":
+            yield b"".join(packer.pack(item) for item in items)
+        else:
+            # Uma chamada ao encoder por lote; os colchetes do lote são trocados pelo separador
+            yield separator + _dumps(items)[1:-1]
+            separator = b","
+    if fmt == "json":
+        yield b"[]" if separator == b"[" else b"]"
+
+
+class FastJSONResponse(JSONResponse):
+    """Aceita o conteúdo já pronto (dicts/listas com datetime) e o codifica direto em bytes"""
+
+    def render(self, content) -> bytes:
+        return _dumps(content)
+
+
+class TimedJSONResponse(FastJSONResponse):
+    """FastJSONResponse que registra o tempo gasto na codificação do corpo"""
+
+    def render(self, content) -> bytes:
+        start = time.perf_counter()
+        try:
+            return super().render(content)
+        finally:
+            HTTP_SERIALIZATION_DURATION.observe(time.perf_counter() - start, self.media_type)
+
+
+# Classe usada pela app e pelas rotas que montam a resposta diretamente
+APIJSONResponse = TimedJSONResponse if METRICS_ENABLED else FastJSONResponse
@@ -0,0 +1,20 @@
+"""
+Modelos de entrada e saída específicos da camada HTTP (operações em lote),
+ mantidos fora do domínio por descreverem apenas o formato das requisições e respostas
+
+"""
+from pydantic import BaseModel
+from typing import Optional
+from app.domain.entities import Task
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: int
+    task: Optional[Task] = None
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BatchResult(BaseModel):
+    results: list[BatchItemResult]
@@ -2,27 +2,100 @@
 Responsável por gerenciar a persistência das tarefas isolando os detalhes do banco de dados e 
 fornecendo uma interface clara para a camada de negócio.
 
+A app é montada por create_app(settings): a engine é criada no lifespan, não na importação,
+ e a migração do esquema pode ser feita uma única vez fora dos workers (MIGRATE_ON_STARTUP=false).
+
 """
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.responses import PlainTextResponse, RedirectResponse
-from app.infra.database.config import engine
-from app.infra.database.models import Base
+from app.infra.database.config import CHANGE_LOG_COMPACT_INTERVAL, configure_database, dispose_database
+from app.infra.database.group_commit import close_group_commit_writers
+from app.infra.database.maintenance import maintenance_loop
+from app.infra.database.migrations import upgrade_schema
+from app.infra.database.sharding import configure_shards, dispose_shards
+from app.infra.memory.store import close_memory_store, configure_memory_store
+from app.infra.metrics import METRICS_ENABLED, registry
+from app.infra.ratelimit import RATE_LIMIT_ENABLED, TokenBucketLimiter, admission_metrics, create_rate_limit_store
+from app.infra.settings import Settings
+from app.interfaces.http import controllers
 from app.interfaces.http.controllers import router
+from app.interfaces.http.responses import APIJSONResponse
+from app.interfaces.web.middleware import CompressionMiddleware, MetricsMiddleware, RateLimitMiddleware
+
+# Baldes por cliente compartilhados pelas apps do processo (None quando desativado)
+rate_limiter = TokenBucketLimiter(create_rate_limit_store()) if RATE_LIMIT_ENABLED else None
+# Lidos na coleta: valem os limitadores em uso naquele momento
+registry.register_collector(lambda: admission_metrics(rate_limiter, controllers.admission))
+
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    settings = settings or Settings.from_env()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        engine = configure_database(settings.database_url, settings.db_profile, settings.read_url())
+        shards = configure_shards(list(settings.database_shards))
+        if settings.task_backend == "memory":
+            # Carrega o último snapshot e refaz o log antes de aceitar requisições
+            configure_memory_store(settings.memory_store_path)
+        elif settings.migrate_on_startup:
+            # Cria tabelas, colunas e triggers ausentes (desenvolvimento e instância única)
+            upgrade_schema(engine)
+            if shards is not None:
+                shards.upgrade()
+        app.state.settings = settings
+        stop_maintenance = asyncio.Event()
+        maintenance = None
+        if settings.task_backend != "memory" and CHANGE_LOG_COMPACT_INTERVAL > 0:
+            # Compactação do log e limpeza das chaves expiradas em segundo plano, fora das escritas
+            engines = [engine, *(shards.engines if shards is not None else ())]
+            maintenance = asyncio.create_task(maintenance_loop(engines, stop_maintenance))
+        yield
+        stop_maintenance.set()
+        if maintenance is not None:
+            await maintenance
+        # Confirma as escritas ainda na fila antes de fechar as conexões
+        close_group_commit_writers()
+        close_memory_store()
+        dispose_shards()
+        dispose_database()
+
+    app = FastAPI(
+        title="ToDo API",
+        description="API para gerenciamento de tarefas.",
+        version="1.0.0",
+        docs_url="/docs",
+        openapi_url="/openapi.json",
+        default_response_class=APIJSONResponse,
+        lifespan=lifespan,
+    )
+
+    app.include_router(router)
+
+    # Por dentro da compressão: um 429 sai antes de qualquer trabalho com o corpo
+    if rate_limiter is not None:
+        app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
+    # Adicionada antes da de métricas, fica por dentro dela: a latência medida inclui a compressão
+    app.add_middleware(CompressionMiddleware)
+
+    if METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+        def metrics():
+            return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
-# Cria tabelas (apenas para desenvolvimento)
-Base.metadata.create_all(bind=engine)
+    @app.get("/", response_class=PlainTextResponse)
+    async def root():
+        return RedirectResponse(url="/docs")
+        ##return "ToDo API está rodando! Acesse http://127.0.0.1:8000/docs para ver a documentação."
 
-app = FastAPI(
-    title="ToDo API",
-    description="API para gerenciamento de tarefas.",
-    version="1.0.0",
-    docs_url="/docs",
-    openapi_url="/openapi.json"
-)
+    return app
 
-app.include_router(router)
 
-@app.get("/", response_class=PlainTextResponse)
-async def root():
-    return RedirectResponse(url="/docs")
-    ##return "ToDo API está rodando! Acesse http://127.0.0.1:8000/docs para ver a documentação."
\ No newline at end of file
+# Instância usada por "uvicorn app.interfaces.web.fastapi_app:app"; com outras configurações,
+# use "uvicorn --factory app.interfaces.web.fastapi_app:create_app" ou create_app(Settings(...))
+app = create_app()
@@ -0,0 +1,248 @@
+"""
+Middlewares ASGI da aplicação web; implementados direto sobre ASGI (sem BaseHTTPMiddleware)
+ para manter o custo por requisição baixo e não interferir em respostas em streaming.
+
+"""
+import hashlib
+import os
+import time
+import zlib
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from app.infra.metrics import HTTP_REQUEST_DURATION
+from app.infra.ratelimit import TokenBucketLimiter, retry_after_header
+from app.interfaces.http.negotiation import negotiate
+from app.interfaces.http.responses import APIJSONResponse
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depende do ambiente
+    zstandard = None
+
+
+class MetricsMiddleware:
+    """Histograma de latência por método, rota (template do path) e status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # O roteador do FastAPI grava a rota encontrada no scope
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start, scope["method"], route_path, str(status_code)
+            )
+
+
+# Codificações na ordem de preferência do servidor (vazio desativa a compressão); br e zstd só
+# valem com os pacotes brotli e zstandard instalados
+COMPRESSION_ENCODINGS = [
+    name.strip() for name in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if name.strip()
+]
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes; menores vão sem compressão
+COMPRESSION_LEVELS = {
+    "gzip": int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+    "br": int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4")),
+    "zstd": int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3")),
+}
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = cabeçalho gzip
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+
+COMPRESSORS = {"gzip": _GzipCompressor}
+if brotli is not None:
+    COMPRESSORS["br"] = _BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS["zstd"] = _ZstdCompressor
+
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "text/event-stream":
+        # Cada evento precisa chegar na hora; o feed tem o próprio keep-alive
+        return False
+    return (
+        media_type.startswith("text/")
+        or media_type.endswith(("json", "ndjson", "msgpack"))
+        or media_type in ("application/javascript", "application/xml")
+    )
+
+
+class CompressionMiddleware:
+    """Comprime as respostas com a codificação negociada pelo Accept-Encoding. Respostas inteiras
+    abaixo de minimum_size passam sem compressão; em streaming (ex.: exportação) cada pedaço é
+    comprimido e descarregado (sync flush) assim que sai, sem acumular o corpo. Toda resposta que
+    poderia ser comprimida leva Vary: Accept-Encoding, comprimida ou não, e a ETag de um corpo
+    comprimido passa a ser fraca: os bytes diferem dos da versão sem compressão"""
+
+    def __init__(
+        self,
+        app,
+        encodings: list[str] | None = None,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        levels: dict[str, int] | None = None,
+    ):
+        self.app = app
+        names = COMPRESSION_ENCODINGS if encodings is None else encodings
+        self.encodings = [name for name in names if name in COMPRESSORS]
+        self.minimum_size = minimum_size
+        self.levels = {**COMPRESSION_LEVELS, **(levels or {})}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        encoding = None
+        if scope["method"] != "HEAD":
+            accept_encoding = Headers(scope=scope).get("accept-encoding")
+            # Sem Accept-Encoding o cliente não pediu compressão: a resposta segue sem compressão
+            encoding = negotiate(accept_encoding, self.encodings) if accept_encoding else None
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", []))
+                headers = MutableHeaders(raw=message["headers"])
+                compressible = _compressible(headers.get("content-type", ""))
+                # O 304 repete o Vary da resposta completa que ele substitui
+                if compressible or message["status"] == 304:
+                    headers.add_vary_header("Accept-Encoding")
+                if (
+                    encoding is None
+                    or not compressible
+                    or message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                # Segurado até o primeiro pedaço do corpo: só então se sabe se vale comprimir
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                headers = MutableHeaders(raw=start_message["headers"])
+                compressor = COMPRESSORS[encoding](self.levels[encoding])
+                headers["Content-Encoding"] = encoding
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+                if more_body:
+                    # Tamanho final desconhecido: a resposta segue em chunked
+                    if "content-length" in headers:
+                        del headers["content-length"]
+                else:
+                    body = compressor.compress(body, final=True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body, "more_body": False})
+                    return
+                await send(start_message)
+
+            await send({
+                "type": "http.response.body",
+                "body": compressor.compress(body, final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_wrapper)
+
+
+RATE_LIMIT_DETAIL = "Too many requests"
+
+
+def client_key(scope) -> str:
+    """Chave do balde: a API key (só o hash, para não guardar o segredo) ou o IP do cliente"""
+    api_key = Headers(scope=scope).get("x-api-key")
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:32]
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class RateLimitMiddleware:
+    """Token bucket por cliente nas rotas da API (prefix); sem tokens, responde 429 com
+    Retry-After antes de a requisição chegar aos handlers"""
+
+    def __init__(self, app, limiter: TokenBucketLimiter, prefix: str = "/api/"):
+        self.app = app
+        self.limiter = limiter
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+        key = client_key(scope)
+        if self.limiter.store.blocking:
+            # Store com E/S (ex.: SQLite compartilhado) não pode travar o event loop
+            wait = await run_in_threadpool(self.limiter.acquire, key)
+        else:
+            wait = self.limiter.acquire(key)
+        if wait:
+            response = APIJSONResponse(
+                {"detail": RATE_LIMIT_DETAIL}, status_code=429, headers={"Retry-After": retry_after_header(wait)}
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -4,7 +4,8 @@ a persistência para o repositório,
  garantindo um ponto centralizado e claro para executar as regras de negócio.
 
 """
-from app.domain.entities import Task
+from collections.abc import Iterator
+from app.domain.entities import Task, TaskChange, TaskDelta, TaskPage, TaskStats
 from app.domain.repositories import TaskRepository
 
 class TaskUseCases:
@@ -14,17 +15,59 @@ class TaskUseCases:
     def create_task(self, task: Task) -> Task:
         return self.repository.create(task)
 
+    def create_task_once(self, task: Task, key: str, fingerprint: str) -> tuple[Task, bool]:
+        return self.repository.create_idempotent(task, key, fingerprint)
+
     def get_task_by_id(self, task_id: int) -> Task | None:
         return self.repository.get_by_id(task_id)
 
     def list_tasks(self) -> list[Task]:
         return self.repository.list_all()
 
-    def update_task(self, task_id: int, task: Task) -> Task | None:
-        existing_task = self.repository.get_by_id(task_id)
-        if not existing_task:
-            return None
-        return self.repository.update(task_id, task)
+    def get_collection_version(self) -> int | None:
+        return self.repository.collection_version()
+
+    def list_tasks_rows(
+        self,
+        limit: int,
+        after_id: int | None = None,
+        completed: bool | None = None,
+        title_prefix: str | None = None,
+    ) -> tuple[list[dict], int | None]:
+        return self.repository.list_page_rows(
+            limit, after_id=after_id, completed=completed, title_prefix=title_prefix
+        )
+
+    def search_tasks(self, query: str, limit: int, offset: int = 0) -> TaskPage:
+        return self.repository.search(query, limit, offset)
+
+    def get_task_stats(self, group_by: str | None = None) -> TaskStats:
+        return self.repository.stats(group_by)
+
+    def list_changes(self, after_seq: int, limit: int) -> list[TaskChange]:
+        return self.repository.changes_since(after_seq, limit)
+
+    def check_change_token(self, since: int) -> None:
+        """Levanta ChangeLogExpiredError se since estiver fora do log retido, como em sync_tasks"""
+        self.repository.check_change_token(since)
+
+    def sync_tasks(self, since: int | None, limit: int) -> TaskDelta:
+        return self.repository.changes_delta(since, limit)
+
+    def export_task_rows(self, after_id: int | None = None) -> Iterator[tuple]:
+        return self.repository.iter_rows(after_id=after_id)
+
+    def update_task(self, task_id: int, task: Task, expected_version: int | None = None) -> Task | None:
+        return self.repository.update(task_id, task, expected_version=expected_version)
 
     def delete_task(self, task_id: int) -> bool:
-        return self.repository.delete(task_id)
\ No newline at end of file
+        return self.repository.delete(task_id)
+
+    def bulk_create_tasks(self, tasks: list[Task]) -> list[Task]:
+        return self.repository.bulk_create(tasks)
+
+    def bulk_update_tasks(self, updates: list[tuple[int, Task]]) -> list[Task | None]:
+        return self.repository.bulk_update(updates)
+
+    def bulk_delete_tasks(self, task_ids: list[int]) -> list[bool]:
+        return self.repository.bulk_delete(task_ids)
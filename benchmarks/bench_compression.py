@@ -0,0 +1,66 @@
+"""
+Benchmark de tamanho e custo das respostas grandes: a exportação de N tarefas codificada em
+cada formato (NDJSON, JSON colunar, MessagePack) e comprimida em streaming com cada codificação
+disponível (gzip; br e zstd com os pacotes brotli e zstandard), pelos mesmos compressores da
+CompressionMiddleware.
+
+Uso:
+    python -m benchmarks.bench_compression --rows 100000
+
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.repositories import ROW_FIELDS
+from app.infra.database.config import create_database_engine
+from app.infra.database.repository import SQLTaskRepository
+from app.interfaces.http.responses import EXPORT_FORMATS, encode_rows
+from app.interfaces.web.middleware import COMPRESSION_LEVELS, COMPRESSORS
+from benchmarks.seed import seed
+
+
+def encode(rows: list[tuple], fmt: str) -> tuple[list[bytes], float]:
+    start = time.perf_counter()
+    chunks = list(encode_rows(rows, ROW_FIELDS, fmt))
+    return chunks, time.perf_counter() - start
+
+
+def compress(chunks: list[bytes], encoding: str) -> tuple[int, float]:
+    start = time.perf_counter()
+    compressor = COMPRESSORS[encoding](COMPRESSION_LEVELS[encoding])
+    size = sum(len(compressor.compress(chunk, final=False)) for chunk in chunks)
+    size += len(compressor.compress(b"", final=True))
+    return size, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'compression.db')}"
+        seed(database_url, args.rows)
+        engine = create_database_engine(database_url)
+        with sessionmaker(bind=engine)() as db:
+            rows = [tuple(row) for row in SQLTaskRepository(db).iter_rows()]
+        engine.dispose()
+
+    print(f"{'formato':>10} {'codificação':>12} {'bytes/linha':>12} {'MB/s (entrada)':>15}")
+    for fmt in dict.fromkeys(EXPORT_FORMATS.values()):
+        if fmt == "json":
+            continue  # mesmo tamanho do NDJSON
+        chunks, elapsed = encode(rows, fmt)
+        raw_size = sum(map(len, chunks))
+        print(f"{fmt:>10} {'identity':>12} {raw_size / args.rows:>12.1f} {raw_size / elapsed / 2**20:>15.0f}")
+        for encoding in COMPRESSORS:
+            size, elapsed = compress(chunks, encoding)
+            print(f"{fmt:>10} {encoding:>12} {size / args.rows:>12.1f} {raw_size / elapsed / 2**20:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
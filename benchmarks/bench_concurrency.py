@@ -0,0 +1,49 @@
+"""
+Benchmark de concorrência: mede a latência (p50/p99) das requisições à API
+com um número crescente de requisições simultâneas, usando SQLite em arquivo.
+
+Uso:
+    python -m benchmarks.bench_concurrency --requests 400 --concurrency 1 8 32 64
+
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+from benchmarks.harness import LatencyRecorder, in_process_client, run_concurrently, timed_request
+
+
+async def run_level(database_url: str, total: int, concurrency: int) -> dict:
+    recorder = LatencyRecorder()
+    async with in_process_client(database_url) as client:
+        jobs = [
+            timed_request(client, recorder, "POST", "/api/v1/tasks", json={"title": f"Task {i}"})
+            if i % 4 == 0 else
+            timed_request(client, recorder, "GET", "/api/v1/tasks", params={"limit": 50})
+            for i in range(total)
+        ]
+        await run_concurrently(jobs, concurrency)
+    recorder.stop()
+    return {"concurrency": concurrency, **recorder.summary()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        print(f"{'concorrência':>12} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+        for level in args.concurrency:
+            result = asyncio.run(run_level(database_url, args.requests, level))
+            print(
+                f"{result['concurrency']:>12} {result['throughput_rps']:>10.1f} "
+                f"{result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
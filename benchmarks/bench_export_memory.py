@@ -0,0 +1,87 @@
+"""
+Benchmark de memória e vazão da leitura completa da tabela (ex.: job administrativo que exporta
+todas as tarefas de uma vez), com o corpo codificado em bytes JSON e descartado como num streaming:
+
+- list_all: lista inteira de Task (instâncias ORM + pydantic), depois serializada;
+- iter_all: streaming com yield_per, mas ainda um TaskModel e um Task por linha (export antigo);
+- iter_rows: tuplas de colunas com yield_per codificadas em lote por encode_rows (export atual).
+
+Cada modo roda duas vezes: uma cronometrada e outra sob tracemalloc para o pico de memória
+alocada pelo Python (o tracemalloc deixa a execução mais lenta).
+
+Uso:
+    python -m benchmarks.bench_export_memory --rows 1000000
+
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.repositories import ROW_FIELDS
+from app.infra.database.config import create_database_engine
+from app.infra.database.repository import SQLTaskRepository
+from app.interfaces.http.responses import encode_rows
+from benchmarks.seed import seed
+
+MODES = ("list_all", "iter_all", "iter_rows")
+
+
+def export(mode: str, repo: SQLTaskRepository) -> int:
+    """Bytes do corpo gerado pelo modo; cada pedaço é descartado logo após ser gerado"""
+    size = 0
+    if mode == "list_all":
+        tasks = repo.list_all()
+        for task in tasks:
+            size += len(task.model_dump_json()) + 1
+    elif mode == "iter_all":
+        for task in repo.iter_all():
+            size += len(task.model_dump_json()) + 1
+    else:
+        for chunk in encode_rows(repo.iter_rows(), ROW_FIELDS, "ndjson"):
+            size += len(chunk)
+    return size
+
+
+def run_mode(mode: str, session_factory, rows: int) -> dict:
+    with session_factory() as db:
+        start = time.perf_counter()
+        export(mode, SQLTaskRepository(db))
+        elapsed = time.perf_counter() - start
+
+    with session_factory() as db:
+        tracemalloc.start()
+        export(mode, SQLTaskRepository(db))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {"rows_per_s": rows / elapsed, "peak_mb": peak / 2**20}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'export.db')}"
+        seed(database_url, args.rows)
+        engine = create_database_engine(database_url)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        print(f"{'modo':>10} {'linhas/s':>10} {'pico (MB)':>10} {'KB/linha':>9}")
+        for mode in args.modes:
+            result = run_mode(mode, session_factory, args.rows)
+            print(
+                f"{mode:>10} {result['rows_per_s']:>10.0f} {result['peak_mb']:>10.1f} "
+                f"{result['peak_mb'] * 1024 / args.rows:>9.3f}"
+            )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark do group commit (app/infra/database/group_commit.py): escritores concorrentes criando
+tarefas com um commit por escrita (repositório direto) e com o escritor único que confirma
+as escritas em lote, sobre SQLite em arquivo com o perfil indicado.
+
+Uso:
+    python -m benchmarks.bench_group_commit --writes 4000 --threads 16 --profile performance
+
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.entities import Task
+from app.infra.database.config import Base, SQLITE_PROFILES, create_sqlite_engine
+from app.infra.database.group_commit import GroupCommitTaskRepository, GroupCommitWriter
+from app.infra.database.repository import SQLTaskRepository
+
+
+def run_mode(mode: str, directory: str, profile: str, writes: int, threads: int, max_batch: int) -> dict:
+    engine = create_sqlite_engine(f"sqlite:///{os.path.join(directory, mode + '.db')}", profile)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    writer = GroupCommitWriter(session_factory, max_batch=max_batch) if mode == "group" else None
+
+    def write(count: int):
+        with session_factory() as db:
+            repo = GroupCommitTaskRepository(db, writer) if writer else SQLTaskRepository(db)
+            for i in range(count):
+                repo.create(Task(title=f"Task {i}"))
+
+    per_thread = writes // threads
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(write, [per_thread] * threads))
+    elapsed = time.perf_counter() - start
+
+    result = {"mode": mode, "writes_per_s": per_thread * threads / elapsed, "avg_batch": 1.0}
+    if writer:
+        writer.close()
+        result["avg_batch"] = writer.writes / max(writer.batches, 1)
+    engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writes", type=int, default=4000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--profile", choices=list(SQLITE_PROFILES), default="performance")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'modo':>8} {'escritas/s':>12} {'lote médio':>12}")
+        for mode in ("direct", "group"):
+            result = run_mode(mode, tmp, args.profile, args.writes, args.threads, args.max_batch)
+            print(f"{result['mode']:>8} {result['writes_per_s']:>12.0f} {result['avg_batch']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark do backend em memória (app/infra/memory): as mesmas operações (criar, ler por id,
+listar páginas, atualizar) no SQLTaskRepository sobre SQLite em arquivo e no InMemoryTaskRepository
+só em memória, com log sem fsync e com log + fsync a cada escrita.
+
+Uso:
+    python -m benchmarks.bench_memory_repository --tasks 5000 --profile performance
+
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.entities import Task
+from app.infra.database.config import Base, SQLITE_PROFILES, create_sqlite_engine
+from app.infra.database.repository import SQLTaskRepository
+from app.infra.memory.repository import InMemoryTaskRepository
+from app.infra.memory.store import MemoryStore
+
+PAGE_SIZE = 50
+
+
+def run_operations(repo, tasks: int) -> dict:
+    """Operações por segundo (páginas por segundo em list_page)"""
+    rates = {}
+
+    start = time.perf_counter()
+    ids = [repo.create(Task(title=f"Task {i}", completed=i % 2 == 0)).id for i in range(tasks)]
+    rates["create"] = tasks / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for task_id in ids:
+        repo.get_by_id(task_id)
+    rates["get"] = tasks / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    pages = 0
+    for completed in (None, True):
+        cursor = None
+        while True:
+            rows, cursor = repo.list_page_rows(PAGE_SIZE, after_id=cursor, completed=completed)
+            pages += 1
+            if cursor is None:
+                break
+    rates["list_page"] = pages / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for task_id in ids:
+        repo.update(task_id, Task(title="Atualizada"))
+    rates["update"] = tasks / (time.perf_counter() - start)
+    return rates
+
+
+def run_mode(mode: str, directory: str, profile: str, tasks: int) -> dict:
+    if mode == "sqlite":
+        engine = create_sqlite_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}", profile)
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(autocommit=False, autoflush=False, bind=engine)() as db:
+            result = run_operations(SQLTaskRepository(db), tasks)
+        engine.dispose()
+        return result
+
+    path = os.path.join(directory, mode) if mode != "memory" else None
+    store = MemoryStore(path, fsync=mode == "memory+fsync")
+    result = run_operations(InMemoryTaskRepository(store), tasks)
+    store.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--profile", choices=list(SQLITE_PROFILES), default="performance")
+    args = parser.parse_args()
+
+    operations = ("create", "get", "list_page", "update")
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'modo (ops/s)':>14} " + " ".join(f"{operation:>10}" for operation in operations))
+        for mode in ("sqlite", "memory", "memory+log", "memory+fsync"):
+            result = run_mode(mode, tmp, args.profile, args.tasks)
+            print(f"{mode:>14} " + " ".join(f"{result[operation]:>10.0f}" for operation in operations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark do custo por linha da listagem (GET /tasks): compara o caminho antigo
+(ORM -> Task.model_validate -> revalidação/serialização do FastAPI contra response_model)
+com a leitura enxuta (SELECT de colunas no core -> dicts -> orjson), isolando a camada de
+repositório + serialização e medindo também a varredura completa da API por cursor.
+
+Uso:
+    python -m benchmarks.bench_serialization --rows 100000 --page-size 1000
+
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.entities import Task
+from app.infra.database.config import create_database_engine
+from app.infra.database.repository import SQLTaskRepository
+from app.interfaces.http.responses import FastJSONResponse
+from benchmarks.harness import in_process_client
+from benchmarks.seed import seed
+
+TASK_LIST = TypeAdapter(list[Task])
+
+
+def legacy_page(repo: SQLTaskRepository, limit: int, after_id: int | None) -> tuple[bytes, int | None]:
+    """Reproduz o que a rota fazia antes: Task por linha e o response_model validado de novo"""
+    rows, next_cursor = repo.list_page_rows(limit, after_id=after_id)
+    tasks = [Task.model_validate(row) for row in rows]
+    content = TASK_LIST.validate_python([task.model_dump() for task in tasks])
+    body = JSONResponse(jsonable_encoder(content)).body
+    return body, next_cursor
+
+
+def lean_page(repo: SQLTaskRepository, limit: int, after_id: int | None) -> tuple[bytes, int | None]:
+    rows, next_cursor = repo.list_page_rows(limit, after_id=after_id)
+    return FastJSONResponse(rows).body, next_cursor
+
+
+def walk(render, session_factory, rows: int, page_size: int) -> float:
+    """Microssegundos por linha para percorrer a tabela inteira com o renderizador dado"""
+    with session_factory() as db:
+        repo = SQLTaskRepository(db)
+        start = time.perf_counter()
+        after_id = None
+        while True:
+            _, after_id = render(repo, page_size, after_id)
+            if after_id is None:
+                break
+        return (time.perf_counter() - start) / rows * 1e6
+
+
+async def walk_api(database_url: str, rows: int, page_size: int) -> float:
+    async with in_process_client(database_url) as client:
+        start = time.perf_counter()
+        params = {"limit": page_size}
+        while True:
+            response = await client.get("/api/v1/tasks", params=params)
+            response.raise_for_status()
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            params["after_id"] = cursor
+        return (time.perf_counter() - start) / rows * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'serialization.db')}"
+        seed(database_url, args.rows)
+        engine = create_database_engine(database_url)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        print(f"{'caminho':>24} {'µs/linha':>10}")
+        for name, render in (("legado (ORM + pydantic)", legacy_page), ("enxuto (core + orjson)", lean_page)):
+            print(f"{name:>24} {walk(render, session_factory, args.rows, args.page_size):>10.2f}")
+        print(f"{'GET /tasks (API)':>24} {asyncio.run(walk_api(database_url, args.rows, args.page_size)):>10.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
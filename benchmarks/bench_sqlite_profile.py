@@ -0,0 +1,77 @@
+"""
+Benchmark dos perfis de SQLite (config.SQLITE_PROFILES): compara a vazão de escrita
+(um commit por tarefa, como no repositório), de leitura e de escritores concorrentes.
+
+Uso:
+    python -m benchmarks.bench_sqlite_profile --writes 2000 --reads 5000 --threads 4
+
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.entities import Task
+from app.infra.database.config import Base, SQLITE_PROFILES, create_sqlite_engine
+from app.infra.database.repository import SQLTaskRepository
+
+
+def run_profile(profile: str, directory: str, writes: int, reads: int, threads: int) -> dict:
+    engine = create_sqlite_engine(f"sqlite:///{os.path.join(directory, profile + '.db')}", profile)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def write(count: int):
+        with session_factory() as db:
+            repo = SQLTaskRepository(db)
+            for i in range(count):
+                repo.create(Task(title=f"Task {i}"))
+
+    start = time.perf_counter()
+    write(writes)
+    write_rate = writes / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with session_factory() as db:
+        repo = SQLTaskRepository(db)
+        for i in range(reads):
+            repo.get_by_id(i % writes + 1)
+    read_rate = reads / (time.perf_counter() - start)
+
+    per_thread = writes // threads
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(write, [per_thread] * threads))
+    concurrent_rate = per_thread * threads / (time.perf_counter() - start)
+
+    engine.dispose()
+    return {
+        "profile": profile,
+        "writes_per_s": write_rate,
+        "reads_per_s": read_rate,
+        "concurrent_writes_per_s": concurrent_rate,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'perfil':>12} {'escritas/s':>12} {'leituras/s':>12} {'escritas conc./s':>18}")
+        for profile in SQLITE_PROFILES:
+            result = run_profile(profile, tmp, args.writes, args.reads, args.threads)
+            print(
+                f"{result['profile']:>12} {result['writes_per_s']:>12.0f} "
+                f"{result['reads_per_s']:>12.0f} {result['concurrent_writes_per_s']:>18.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark de partida a frio: cada rodada é um processo Python novo que mede o tempo de importação
+da app (app.interfaces.web.fastapi_app) e o tempo até a primeira resposta (lifespan + GET /tasks),
+com a migração no startup e com o banco já migrado (MIGRATE_ON_STARTUP=false).
+
+Uso:
+    python -m benchmarks.bench_startup --runs 5
+
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Executado no processo filho: só a biblioteca padrão antes do relógio começar
+CHILD = """
+import json, time
+start = time.perf_counter()
+from app.interfaces.web.fastapi_app import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client_ready = time.perf_counter()
+with TestClient(app) as client:
+    assert client.get("/api/v1/tasks").status_code == 200
+    first = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "first_request_s": first - client_ready}))
+"""
+
+
+def run_once(database_url: str, migrate: bool) -> dict:
+    env = {**os.environ, "DATABASE_URL": database_url, "MIGRATE_ON_STARTUP": str(migrate).lower()}
+    env.pop("TESTING", None)
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD], env=env, check=True, capture_output=True, text=True)
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        subprocess.run(
+            [sys.executable, "-m", "app.interfaces.cli.migrate", "--database-url", database_url],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        print(f"{'modo':>20} {'import (ms)':>12} {'1ª resposta (ms)':>17} {'processo (ms)':>14}")
+        for label, migrate in (("migração no startup", True), ("já migrado", False)):
+            runs = [run_once(database_url, migrate) for _ in range(args.runs)]
+            print(
+                f"{label:>20} "
+                f"{statistics.median(r['import_s'] for r in runs) * 1000:>12.0f} "
+                f"{statistics.median(r['first_request_s'] for r in runs) * 1000:>17.0f} "
+                f"{statistics.median(r['process_s'] for r in runs) * 1000:>14.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
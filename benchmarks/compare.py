@@ -0,0 +1,65 @@
+"""
+Compara dois arquivos de resultados de benchmarks.run e aponta regressões:
+ queda de vazão ou aumento do p99 acima do limite (padrão 10%). Sai com código 1 se houver.
+
+Uso:
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+"""
+import argparse
+import json
+import sys
+
+
+def _flatten(scenarios: dict, prefix: str = "") -> dict[str, dict]:
+    """Cenários podem ter sub-resultados (ex.: large_list.filtered)"""
+    flat = {}
+    for name, value in scenarios.items():
+        key = f"{prefix}{name}"
+        if "throughput_rps" in value:
+            flat[key] = value
+        else:
+            flat.update(_flatten(value, f"{key}."))
+    return flat
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list[dict]:
+    base = _flatten(baseline["scenarios"])
+    cand = _flatten(candidate["scenarios"])
+    rows = []
+    for name in sorted(base.keys() & cand.keys()):
+        before, after = base[name], cand[name]
+        throughput = (after["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] if before["throughput_rps"] else 0.0
+        p99 = (after["p99_ms"] - before["p99_ms"]) / before["p99_ms"] if before["p99_ms"] else 0.0
+        rows.append({
+            "scenario": name,
+            "throughput_change": throughput,
+            "p99_change": p99,
+            "regression": throughput < -threshold or p99 > threshold,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows = compare(baseline, candidate, args.threshold)
+    print(f"{baseline['meta'].get('commit')} -> {candidate['meta'].get('commit')}")
+    print(f"{'cenário':<32} {'vazão':>9} {'p99':>9}")
+    for row in rows:
+        flag = "  REGRESSÃO" if row["regression"] else ""
+        print(f"{row['scenario']:<32} {row['throughput_change']:>+9.1%} {row['p99_change']:>+9.1%}{flag}")
+    sys.exit(1 if any(row["regression"] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
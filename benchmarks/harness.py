@@ -0,0 +1,166 @@
+"""
+Infraestrutura comum dos benchmarks: alvos (app em processo ou via uvicorn), coleta de
+latências com percentis e gravação de resultados em JSON comparáveis entre commits.
+
+"""
+import asyncio
+import contextlib
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import httpx
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Percentil pelo método nearest-rank"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+@dataclass
+class LatencyRecorder:
+    samples: list[float] = field(default_factory=list)
+    errors: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    finished: float | None = None
+
+    def record(self, seconds: float, ok: bool = True) -> None:
+        self.samples.append(seconds)
+        if not ok:
+            self.errors += 1
+
+    def stop(self) -> None:
+        self.finished = time.perf_counter()
+
+    def summary(self) -> dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        count = len(self.samples)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 4),
+            "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(self.samples) / count * 1000, 3) if count else 0.0,
+            "p50_ms": round(percentile(self.samples, 50) * 1000, 3),
+            "p90_ms": round(percentile(self.samples, 90) * 1000, 3),
+            "p99_ms": round(percentile(self.samples, 99) * 1000, 3),
+            "max_ms": round(max(self.samples, default=0.0) * 1000, 3),
+        }
+
+
+async def timed_request(client: httpx.AsyncClient, recorder: LatencyRecorder, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        ok = response.status_code < 500
+    except httpx.HTTPError:
+        response, ok = None, False
+    recorder.record(time.perf_counter() - start, ok)
+    return response
+
+
+async def run_concurrently(jobs, concurrency: int) -> None:
+    """Executa as corrotinas de jobs com no máximo `concurrency` em andamento"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def guarded(job):
+        async with semaphore:
+            await job
+
+    await asyncio.gather(*(guarded(job) for job in jobs))
+
+
+def in_process_client(database_url: str) -> httpx.AsyncClient:
+    """Cliente ligado diretamente à app real (app.interfaces.web.fastapi_app:app), com get_db
+    apontando para o banco do benchmark"""
+    from sqlalchemy.orm import sessionmaker
+    from app.infra.database.config import create_database_engine, get_db
+    from app.infra.database.migrations import upgrade_schema
+    from app.interfaces.web.fastapi_app import app
+
+    engine = create_database_engine(database_url)
+    upgrade_schema(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def bench_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = bench_get_db
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def uvicorn_server(database_url: str, workers: int = 1, env: dict | None = None):
+    """Sobe a app real com uvicorn em uma porta livre e devolve a URL base"""
+    port = _free_port()
+    process_env = {**os.environ, "DATABASE_URL": database_url, "MIGRATE_ON_STARTUP": "false", **(env or {})}
+    process_env.pop("TESTING", None)
+    # Migração uma única vez, antes dos workers (como em um deploy)
+    subprocess.run(
+        [sys.executable, "-m", "app.interfaces.cli.migrate", "--database-url", database_url],
+        env=process_env, check=True, stdout=subprocess.DEVNULL,
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.interfaces.web.fastapi_app:app",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=process_env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"{base_url}/openapi.json", timeout=1)
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("uvicorn did not start")
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path: str, scenarios: dict, parameters: dict) -> dict:
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": parameters,
+        },
+        "scenarios": scenarios,
+    }
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    return results
@@ -0,0 +1,177 @@
+"""
+Suíte de benchmarks da API: executa cenários contra a app real, em processo (ASGI) ou
+ via uvicorn, sobre SQLite real, e grava vazão e percentis de latência em JSON.
+
+Cenários:
+    crud_mix            mistura de leituras por id, listagens, criações, atualizações e exclusões
+    large_list          percorre a tabela inteira por cursor e consulta com filtros
+    concurrent_writers  criações e atualizações simultâneas
+    replay              reproduz um arquivo de tráfego JSONL (--traffic)
+
+Uso:
+    python -m benchmarks.run --rows 10000 --output results.json
+    python -m benchmarks.run --target uvicorn --workers 2 --scenarios crud_mix concurrent_writers
+    python -m benchmarks.run --scenarios replay --traffic benchmarks/traffic/sample.jsonl
+    python -m benchmarks.compare baseline.json results.json
+
+Formato do arquivo de tráfego (uma requisição por linha):
+    {"method": "GET", "path": "/api/v1/tasks", "params": {"limit": 50}}
+    {"method": "POST", "path": "/api/v1/tasks", "json": {"title": "New"}, "headers": {}}
+
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import tempfile
+
+import httpx
+
+from benchmarks.harness import (
+    LatencyRecorder,
+    in_process_client,
+    run_concurrently,
+    timed_request,
+    uvicorn_server,
+    write_results,
+)
+from benchmarks.seed import seed
+
+API = "/api/v1/tasks"
+
+
+async def crud_mix(client: httpx.AsyncClient, rows: int, requests: int, concurrency: int) -> dict:
+    recorder = LatencyRecorder()
+    rng = random.Random(42)
+
+    async def one(i: int):
+        roll = rng.random()
+        task_id = rng.randint(1, rows)
+        if roll < 0.50:
+            await timed_request(client, recorder, "GET", f"{API}/{task_id}")
+        elif roll < 0.70:
+            await timed_request(client, recorder, "GET", API, params={"limit": 50, "after_id": task_id})
+        elif roll < 0.85:
+            await timed_request(client, recorder, "POST", API, json={"title": f"Mix {i}"})
+        elif roll < 0.95:
+            await timed_request(client, recorder, "PUT", f"{API}/{task_id}", json={"title": f"Mix {i}", "completed": True})
+        else:
+            await timed_request(client, recorder, "DELETE", f"{API}/{task_id}")
+
+    await run_concurrently([one(i) for i in range(requests)], concurrency)
+    recorder.stop()
+    return recorder.summary()
+
+
+async def large_list(client: httpx.AsyncClient, rows: int, requests: int, concurrency: int, page_size: int = 1000) -> dict:
+    pages = LatencyRecorder()
+    after_id = None
+    while True:
+        params = {"limit": page_size}
+        if after_id is not None:
+            params["after_id"] = after_id
+        response = await timed_request(client, pages, "GET", API, params=params)
+        if response is None or "X-Next-Cursor" not in response.headers:
+            break
+        after_id = response.headers["X-Next-Cursor"]
+    pages.stop()
+
+    filtered = LatencyRecorder()
+    queries = [{"completed": "true", "limit": 100}, {"title_prefix": "Task 99", "limit": 100}]
+    jobs = [timed_request(client, filtered, "GET", API, params=queries[i % 2]) for i in range(requests)]
+    await run_concurrently(jobs, concurrency)
+    filtered.stop()
+    return {"full_scan_pages": pages.summary(), "filtered": filtered.summary()}
+
+
+async def concurrent_writers(client: httpx.AsyncClient, rows: int, requests: int, concurrency: int) -> dict:
+    recorder = LatencyRecorder()
+    rng = random.Random(7)
+
+    def job(i: int):
+        if i % 2:
+            return timed_request(client, recorder, "POST", API, json={"title": f"Writer {i}"})
+        return timed_request(client, recorder, "PUT", f"{API}/{rng.randint(1, rows)}", json={"title": f"Writer {i}"})
+
+    await run_concurrently([job(i) for i in range(requests)], concurrency)
+    recorder.stop()
+    return recorder.summary()
+
+
+def load_traffic(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def replay(client: httpx.AsyncClient, traffic: list[dict], concurrency: int) -> dict:
+    recorder = LatencyRecorder()
+    jobs = [
+        timed_request(
+            client, recorder, entry.get("method", "GET"), entry["path"],
+            params=entry.get("params"), json=entry.get("json"), headers=entry.get("headers"),
+        )
+        for entry in traffic
+    ]
+    await run_concurrently(jobs, concurrency)
+    recorder.stop()
+    return recorder.summary()
+
+
+async def run_scenarios(client: httpx.AsyncClient, args) -> dict:
+    results = {}
+    async with client:
+        for name in args.scenarios:
+            if name == "replay":
+                results[name] = await replay(client, load_traffic(args.traffic), args.concurrency)
+            else:
+                scenario = SCENARIOS[name]
+                results[name] = await scenario(client, args.rows, args.requests, args.concurrency)
+            print(f"{name}: {json.dumps(results[name])}")
+    return results
+
+
+SCENARIOS = {
+    "crud_mix": crud_mix,
+    "large_list": large_list,
+    "concurrent_writers": concurrent_writers,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=[*SCENARIOS, "replay"])
+    parser.add_argument("--target", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="workers do uvicorn")
+    parser.add_argument("--rows", type=int, default=10_000, help="linhas semeadas antes dos cenários")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--traffic", help="arquivo JSONL para o cenário replay")
+    parser.add_argument("--database-url", help="banco já semeado; por padrão cria um SQLite temporário")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+    if "replay" in args.scenarios and not args.traffic:
+        parser.error("replay requires --traffic")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url
+        if database_url is None:
+            database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            seed(database_url, args.rows)
+
+        with contextlib.ExitStack() as stack:
+            if args.target == "uvicorn":
+                base_url = stack.enter_context(uvicorn_server(database_url, args.workers))
+                client = httpx.AsyncClient(base_url=base_url, timeout=60)
+            else:
+                client = in_process_client(database_url)
+            scenarios = asyncio.run(run_scenarios(client, args))
+
+    parameters = {key: value for key, value in vars(args).items() if key != "output"}
+    write_results(args.output, scenarios, parameters)
+    print(f"Resultados gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
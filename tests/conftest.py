@@ -0,0 +1,20 @@
+"""
+Configuração compartilhada dos testes: nenhum teste toca o banco padrão (app/sqlite_db/tasks.db)
+ nem os demais arquivos locais da aplicação; tudo fica em um diretório temporário por sessão.
+
+"""
+import os
+import shutil
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix="todo-tests-")
+
+
+def pytest_configure(config):
+    # Antes da coleta: os módulos da app leem DATA_DIR e DATABASE_URL na importação
+    os.environ["DATA_DIR"] = _data_dir
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_data_dir, 'tasks.db')}"
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_data_dir, ignore_errors=True)
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import Mock
-from app.domain.entities import Task
+from app.domain.entities import Task, TaskChange
+from app.domain.exceptions import ChangeLogExpiredError, IdempotencyKeyReusedError
 from app.domain.repositories import TaskRepository
 
 
@@ -8,6 +9,7 @@ from app.domain.repositories import TaskRepository
 class TestConcreteRepo(TaskRepository):
     def __init__(self):
         self.tasks = {}
+        self.keys = {}
         self.next_id = 1
 
     def create(self, task: Task) -> Task:
@@ -45,6 +47,16 @@ class TestConcreteRepo(TaskRepository):
     def list_all(self) -> list[Task]:
         return list(self.tasks.values())
 
+    def create_idempotent(self, task: Task, key: str, fingerprint: str) -> tuple[Task, bool]:
+        if key in self.keys:
+            stored_fingerprint, task_id = self.keys[key]
+            if stored_fingerprint != fingerprint:
+                raise IdempotencyKeyReusedError(key)
+            return self.tasks[task_id], True
+        created = self.create(task)
+        self.keys[key] = (fingerprint, created.id)
+        return created, False
+
 
 # Fixtures
 @pytest.fixture
@@ -194,3 +206,93 @@ def test_repository_contract():
     assert hasattr(mock_repo, 'create')
     assert hasattr(mock_repo, 'get_by_id')
     assert hasattr(mock_repo, 'list_all')
+
+
+def test_default_list_page(repo):
+    for i in range(3):
+        repo.create(Task(title=f"Task {i}", completed=i % 2 == 0))
+
+    page = repo.list_page(limit=1, completed=True)
+    assert [t.title for t in page.items] == ["Task 0"]
+    assert page.next_cursor == page.items[0].id
+
+    page = repo.list_page(limit=1, after_id=page.next_cursor, completed=True)
+    assert [t.title for t in page.items] == ["Task 2"]
+    assert page.next_cursor is None
+
+
+def test_default_list_page_rows(repo):
+    repo.create(Task(title="Task 0"))
+    repo.create(Task(title="Task 1"))
+
+    rows, next_cursor = repo.list_page_rows(limit=1)
+    assert [row["title"] for row in rows] == ["Task 0"]
+    assert next_cursor == rows[0]["id"]
+
+
+def test_default_search(repo):
+    repo.create(Task(title="Buy milk", description="at the market"))
+    repo.create(Task(title="Call the market"))
+
+    page = repo.search("mark", limit=1)
+    assert [t.title for t in page.items] == ["Buy milk"]
+    assert page.next_cursor == 1
+    assert repo.search("milk call", limit=10).items == []
+
+
+def test_default_stats(repo):
+    repo.create(Task(title="Done", completed=True))
+    repo.create(Task(title="Todo"))
+
+    stats = repo.stats(group_by="completed")
+    assert (stats.total, stats.completed, stats.pending) == (2, 1, 1)
+    assert [(g.value, g.count) for g in stats.groups] == [(True, 1), (False, 1)]
+
+    with pytest.raises(ValueError):
+        repo.stats(group_by="title")
+
+
+def test_default_change_log_is_empty(repo):
+    repo.create(Task(title="Sem log"))
+    assert repo.last_change_seq() is None
+    assert repo.changes_since(0, limit=10) == []
+
+
+# 🔄 O delta genérico fica só com a última alteração de cada tarefa
+def test_default_changes_delta(monkeypatch):
+    repo = TestConcreteRepo()
+    done = repo.create(Task(title="Feita"))
+    log = [
+        TaskChange(seq=1, op="create", task_id=done.id, owner_id="default", task=done, changed_at=None),
+        TaskChange(seq=2, op="create", task_id=2, owner_id="default", task=Task(id=2, title="Apagada"), changed_at=None),
+        TaskChange(seq=3, op="update", task_id=done.id, owner_id="default", task=done, changed_at=None),
+        TaskChange(seq=4, op="delete", task_id=2, owner_id="default", task=None, changed_at=None),
+    ]
+    monkeypatch.setattr(repo, "last_change_seq", lambda: 4)
+    monkeypatch.setattr(repo, "changes_since", lambda after, limit: [c for c in log if c.seq > after][:limit])
+
+    assert repo.changes_delta(None, 10).token == 4
+    delta = repo.changes_delta(0, 10)
+    assert [t.id for t in delta.upserts] == [done.id] and delta.deletes == [2] and delta.token == 4
+    page = repo.changes_delta(0, 1)
+    assert page.has_more and page.token == 3
+    with pytest.raises(ChangeLogExpiredError):
+        repo.changes_delta(5, 10)
+
+    # A mesma regra atende o feed: tokens de 0 até a última seq valem, o resto expirou
+    assert repo.check_change_token(0) == repo.check_change_token(4) == 4
+    monkeypatch.setattr(repo, "change_horizon", lambda: 2)
+    for since in (1, 5):
+        with pytest.raises(ChangeLogExpiredError):
+            repo.check_change_token(since)
+
+
+def test_create_idempotent_is_part_of_the_contract(repo):
+    class WithoutIdempotency(TaskRepository):
+        create = get_by_id = list_all = update = delete = TestConcreteRepo.create
+
+    with pytest.raises(TypeError):
+        WithoutIdempotency()
+
+    task, replayed = repo.create_idempotent(Task(title="Uma vez"), "key-1", "fp")
+    assert repo.create_idempotent(Task(title="Uma vez"), "key-1", "fp") == (task, True) and not replayed
@@ -0,0 +1,33 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+from app.infra.database import config
+from app.infra.settings import Settings
+from app.interfaces.cli.migrate import migrate
+from app.interfaces.web.fastapi_app import create_app
+
+
+# 🏭 A engine nasce no lifespan, com o banco das configurações, e é liberada no fim
+def test_create_app_uses_settings_in_lifespan(tmp_path):
+    db_file = tmp_path / "nested" / "app.db"
+    app = create_app(Settings(database_url=f"sqlite:///{db_file}"))
+    assert not db_file.exists()
+
+    with TestClient(app) as client:
+        assert client.post("/api/v1/tasks", json={"title": "Pelo factory"}).status_code == 201
+        assert [t["title"] for t in client.get("/api/v1/tasks").json()] == ["Pelo factory"]
+        assert config.get_engine().url.database == str(db_file)
+
+    assert db_file.exists()
+    assert config._engine is None
+
+
+# 🧰 Com a migração feita antes, os workers sobem sem DDL
+def test_app_without_startup_migration(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    migrate(Settings(database_url=url))
+    engine = create_engine(url)
+    assert {"tasks", "task_counters", "task_changes", "idempotency_keys"} <= set(inspect(engine).get_table_names())
+    engine.dispose()
+
+    with TestClient(create_app(Settings(database_url=url, migrate_on_startup=False))) as client:
+        assert client.post("/api/v1/tasks", json={"title": "Já migrado"}).status_code == 201
@@ -0,0 +1,34 @@
+from benchmarks.compare import compare
+from benchmarks.harness import LatencyRecorder, percentile
+
+
+def test_percentile_nearest_rank():
+    samples = [0.001 * i for i in range(1, 101)]
+    assert percentile(samples, 50) == 0.05
+    assert percentile(samples, 99) == 0.099
+    assert percentile([0.2, 0.1], 50) == 0.1
+    assert percentile([], 99) == 0.0
+
+
+def test_recorder_summary_counts_errors():
+    recorder = LatencyRecorder()
+    recorder.record(0.010)
+    recorder.record(0.030, ok=False)
+    recorder.stop()
+
+    summary = recorder.summary()
+    assert summary["requests"] == 2
+    assert summary["errors"] == 1
+    assert summary["max_ms"] == 30.0
+
+
+def test_compare_flags_regressions():
+    def result(rps, p99):
+        return {"throughput_rps": rps, "p99_ms": p99}
+
+    baseline = {"scenarios": {"crud_mix": result(100, 10), "large_list": {"filtered": result(50, 20)}}}
+    candidate = {"scenarios": {"crud_mix": result(98, 10.5), "large_list": {"filtered": result(30, 20)}}}
+
+    rows = {row["scenario"]: row for row in compare(baseline, candidate, threshold=0.10)}
+    assert rows["crud_mix"]["regression"] is False
+    assert rows["large_list.filtered"]["regression"] is True
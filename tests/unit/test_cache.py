@@ -0,0 +1,117 @@
+import pytest
+from unittest.mock import create_autospec
+from app.domain.entities import Task
+from app.domain.repositories import TaskRepository
+from app.infra.cache import (
+    CachedTaskRepository, LRUCache, SQLiteCacheBackend, cache_metrics_collector, create_cache_backend,
+)
+
+
+@pytest.fixture
+def inner_repo():
+    return create_autospec(TaskRepository, instance=True)
+
+
+@pytest.fixture
+def cache():
+    return LRUCache(max_size=2, ttl=None)
+
+
+@pytest.fixture
+def repo(inner_repo, cache):
+    return CachedTaskRepository(inner_repo, cache)
+
+
+# 🧠 Testes do LRU
+def test_lru_evicts_least_recently_used(cache):
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"hits": 3, "misses": 1, "evictions": 1}
+
+
+def test_lru_expires_by_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.infra.cache.time.monotonic", lambda: now[0])
+    cache = LRUCache(max_size=10, ttl=5)
+    cache.set("a", 1)
+
+    now[0] += 10
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sqlite_backend_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    writer = SQLiteCacheBackend(path)
+    reader = SQLiteCacheBackend(path)
+
+    writer.set("task:1", Task(id=1, title="Shared"))
+    assert reader.get("task:1").title == "Shared"
+
+    writer.delete("task:1")
+    assert reader.get("task:1") is None
+    assert reader.stats() == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+# 🔐 O arquivo compartilhado guarda JSON, no diretório de dados por padrão
+def test_sqlite_backend_stores_json_in_data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.infra.cache.DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("TASK_CACHE_BACKEND", "sqlite")
+    monkeypatch.delenv("TASK_CACHE_PATH", raising=False)
+    cache = create_cache_backend()
+    cache.set("task:1", Task(id=1, title="Shared"))
+
+    (value,) = cache._conn.execute("SELECT value FROM cache").fetchone()
+    assert Task.model_validate_json(value) == Task(id=1, title="Shared")
+    assert (tmp_path / "data" / "task_cache.db").exists()
+
+
+# 🔁 Testes do repositório com cache
+def test_get_by_id_read_through(repo, inner_repo):
+    inner_repo.get_by_id.return_value = Task(id=1, title="Cached")
+
+    assert repo.get_by_id(1).title == "Cached"
+    assert repo.get_by_id(1).title == "Cached"
+    inner_repo.get_by_id.assert_called_once_with(1)
+
+
+def test_get_by_id_missing_is_not_cached(repo, inner_repo):
+    inner_repo.get_by_id.return_value = None
+
+    assert repo.get_by_id(99) is None
+    assert repo.get_by_id(99) is None
+    assert inner_repo.get_by_id.call_count == 2
+
+
+def test_writes_invalidate(repo, inner_repo):
+    inner_repo.get_by_id.return_value = Task(id=1, title="Old")
+    repo.get_by_id(1)
+
+    repo.update(1, Task(title="New"))
+    repo.get_by_id(1)
+    repo.delete(1)
+    repo.get_by_id(1)
+    repo.bulk_delete([1])
+    repo.get_by_id(1)
+
+    assert inner_repo.get_by_id.call_count == 4
+
+
+# 🎚️ Cache opt-in: sem TASK_CACHE_BACKEND, nenhum backend é criado
+def test_cache_is_opt_in(monkeypatch):
+    monkeypatch.delenv("TASK_CACHE_BACKEND", raising=False)
+    assert create_cache_backend() is None
+
+    monkeypatch.setenv("TASK_CACHE_BACKEND", "memory")
+    monkeypatch.setenv("TASK_CACHE_TTL", "5")
+    cache = create_cache_backend()
+    assert isinstance(cache, LRUCache) and cache.ttl == 5
+    cache.get("a")
+    names = [metric.name for metric in cache_metrics_collector(cache)()]
+    assert names == ["task_cache_events_total", "task_cache_entries"]
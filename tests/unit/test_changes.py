@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.domain.entities import Task
+from app.infra.changes import ChangeEvent, ChangeFeed, ChangeFeedOverflow, Subscription
+from app.infra.database.config import Base
+from app.infra.database.repository import SQLTaskRepository
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+# 📡 Um único leitor distribui o mesmo lote para todos os assinantes
+def test_feed_fans_out_new_changes(session_factory):
+    with session_factory() as db:
+        SQLTaskRepository(db).create(Task(title="Before"))
+
+    async def scenario():
+        feed = ChangeFeed(session_factory, poll_interval=0.01)
+        first, second = await feed.subscribe(), await feed.subscribe()
+        assert first.start_seq == second.start_seq == 1
+
+        with session_factory() as db:
+            SQLTaskRepository(db).create(Task(title="After"))
+
+        batches = [await first.get(timeout=2), await second.get(timeout=2)]
+        feed.unsubscribe(first)
+        feed.unsubscribe(second)
+        await asyncio.sleep(0.05)
+        return feed, batches
+
+    feed, batches = asyncio.run(scenario())
+    assert batches[0] is batches[1]
+    assert [(event.seq, event.op) for event in batches[0]] == [(2, "create")]
+    assert b'"title":"After"' in batches[0][0].data
+    assert feed.subscriber_count == 0
+
+
+# 🐢 Assinante lento é descartado depois de consumir o que já estava na fila
+def test_subscription_overflow():
+    async def scenario():
+        subscription = Subscription(start_seq=0, max_pending=1)
+        subscription.publish([ChangeEvent(1, "create", b"{}")])
+        subscription.publish([ChangeEvent(2, "create", b"{}")])
+        assert [event.seq for event in await subscription.get(timeout=1)] == [1]
+        with pytest.raises(ChangeFeedOverflow):
+            await subscription.get(timeout=1)
+
+    asyncio.run(scenario())
+
+
+def test_subscription_timeout_returns_empty_batch():
+    async def scenario():
+        return await Subscription(start_seq=0, max_pending=1).get(timeout=0.01)
+
+    assert asyncio.run(scenario()) == []
+
+
+# 🏢 Cada assinante recebe só as alterações do seu dono
+def test_feed_routes_changes_by_owner(session_factory):
+    async def scenario():
+        feed = ChangeFeed(session_factory, poll_interval=0.01)
+        acme, globex = await feed.subscribe("acme"), await feed.subscribe("globex")
+
+        with session_factory() as db:
+            SQLTaskRepository(db, "acme").create(Task(title="Só da acme"))
+            SQLTaskRepository(db, "globex").create(Task(title="Só da globex"))
+
+        batches = [await acme.get(timeout=2), await globex.get(timeout=2)]
+        feed.unsubscribe(acme)
+        feed.unsubscribe(globex)
+        await asyncio.sleep(0.05)
+        return batches
+
+    acme_events, globex_events = asyncio.run(scenario())
+    assert [(e.seq, e.owner_id) for e in acme_events] == [(1, "acme")]
+    assert [(e.seq, e.owner_id) for e in globex_events] == [(2, "globex")]
+
+
+# 🪵 Falha na leitura do log é registrada e o leitor segue da mesma posição
+def test_feed_logs_read_errors_and_recovers(session_factory, caplog):
+    async def scenario():
+        feed = ChangeFeed(session_factory, poll_interval=0.01)
+        read, failures = feed._read, []
+
+        def flaky_read(after_seq):
+            if not failures:
+                failures.append(after_seq)
+                raise RuntimeError("database is down")
+            return read(after_seq)
+
+        feed._read = flaky_read
+        subscription = await feed.subscribe()
+        with session_factory() as db:
+            SQLTaskRepository(db).create(Task(title="Depois da falha"))
+        events = await subscription.get(timeout=2)
+        feed.unsubscribe(subscription)
+        await asyncio.sleep(0.05)
+        return events
+
+    with caplog.at_level("ERROR", logger="app.infra.changes"):
+        events = asyncio.run(scenario())
+    assert [event.seq for event in events] == [1]
+    assert "Change feed read failed after seq 0" in caplog.text
+    assert "database is down" in caplog.text
@@ -0,0 +1,143 @@
+import gzip
+import zlib
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from app.interfaces.http.negotiation import negotiate
+from app.interfaces.web.middleware import CompressionMiddleware
+
+BIG = "tarefa " * 1000
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, encodings=["zstd", "br", "gzip"], minimum_size=500)
+
+
+@app.get("/big")
+def big():
+    return {"text": BIG}
+
+
+@app.get("/small")
+def small():
+    return {"text": "curta"}
+
+
+@app.api_route("/tagged", methods=["GET", "HEAD"])
+def tagged():
+    return PlainTextResponse(BIG, headers={"ETag": '"t1-v2"'})
+
+
+@app.get("/not-modified")
+def not_modified():
+    return Response(status_code=304, headers={"ETag": '"t1-v2"'})
+
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse((f'{{"line":{i}}}\n'.encode() for i in range(100)), media_type="application/x-ndjson")
+
+
+@app.get("/events")
+def events():
+    return StreamingResponse(iter([b"data: 1\n\n"] * 100), media_type="text/event-stream")
+
+
+@app.get("/png")
+def png():
+    return PlainTextResponse(b"\x89PNG" * 500, media_type="image/png")
+
+
+client = TestClient(app)
+
+
+def get(path: str, accept_encoding: str | None = "gzip"):
+    # O httpx descomprime sozinho; stream=True preserva os bytes como chegaram
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding or ""}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+# ⚖️ Negociação por q, com a preferência do servidor nos empates
+def test_negotiate():
+    assert negotiate("gzip, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("gzip;q=1, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate("*;q=0.1, gzip;q=0", ["gzip"]) is None
+    assert negotiate("deflate", ["gzip"]) is None
+    assert negotiate(None, ["application/json", "application/msgpack"]) == "application/json"
+    assert negotiate("application/*;q=0.5, application/msgpack", ["application/json", "application/msgpack"]) == "application/msgpack"
+    assert negotiate("text/*, */*;q=0", ["application/json"]) is None
+
+
+# 🗜️ Corpos grandes saem comprimidos, com Content-Length e Vary corretos
+def test_large_response_is_gzipped():
+    response, raw = get("/big")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw) < len(BIG)
+    assert BIG in gzip.decompress(raw).decode()
+
+
+def test_small_or_unrequested_responses_are_untouched():
+    response, raw = get("/small")
+    assert "content-encoding" not in response.headers and b"curta" in raw
+    response, raw = get("/big", accept_encoding=None)
+    assert "content-encoding" not in response.headers
+    response, _ = get("/big", accept_encoding="gzip;q=0")
+    assert "content-encoding" not in response.headers
+    response, _ = get("/png")
+    assert "content-encoding" not in response.headers
+
+
+# 🏷️ Vary em toda resposta comprimível, comprimida ou não; ETag fraca só no corpo comprimido
+def test_vary_and_etag_follow_the_encoding():
+    for path, accept_encoding in [("/small", "gzip"), ("/big", None), ("/big", "gzip;q=0"), ("/not-modified", "gzip")]:
+        response, _ = get(path, accept_encoding)
+        assert response.headers["vary"] == "Accept-Encoding"
+    response, _ = get("/png")
+    assert "vary" not in response.headers
+
+    response, _ = get("/tagged")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"t1-v2"'
+    response, _ = get("/tagged", accept_encoding=None)
+    assert response.headers["etag"] == '"t1-v2"'
+
+    response = client.head("/tagged", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == '"t1-v2"'
+
+
+# 🌊 Streaming: cada pedaço é comprimido e descarregado, sem esperar o fim
+def test_streaming_response_is_compressed_incrementally():
+    response, raw = get("/stream")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert lines[0] == '{"line":0}' and len(lines) == 100
+
+    decompressor = zlib.decompressobj(31)
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        first = next(response.iter_raw())
+    # O primeiro pedaço já descomprime sozinho (sync flush)
+    assert decompressor.decompress(first).startswith(b'{"line":0}')
+
+
+def test_event_stream_is_not_compressed():
+    response, _ = get("/events")
+    assert "content-encoding" not in response.headers
+
+
+def test_brotli_when_installed():
+    brotli = pytest.importorskip("brotli")
+    response, raw = get("/big", accept_encoding="br, gzip")
+    assert response.headers["content-encoding"] == "br"
+    assert BIG in brotli.decompress(raw).decode()
+
+
+def test_zstd_when_installed():
+    zstandard = pytest.importorskip("zstandard")
+    response, raw = get("/stream", accept_encoding="zstd")
+    assert response.headers["content-encoding"] == "zstd"
+    text = zstandard.ZstdDecompressor().decompressobj().decompress(raw).decode()
+    assert len(text.splitlines()) == 100
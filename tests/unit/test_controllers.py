@@ -1,10 +1,12 @@
+import asyncio
+import json
 import pytest
 from fastapi import FastAPI, APIRouter
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.infra.database.config import Base, get_db
-from app.interfaces.http.controllers import TaskController
+from app.interfaces.http.controllers import TaskController, idempotency_cache, task_cache
 
 pytestmark = pytest.mark.usefixtures("clear_tables")
 
@@ -46,6 +48,10 @@ client = TestClient(app)
 def clear_tables():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # Os ids se repetem entre testes, então o cache do processo também é limpo
+    if task_cache is not None:
+        task_cache.clear()
+    idempotency_cache.clear()
 
 @pytest.mark.usefixtures("clear_tables")
 # 🚥 Testes de criação
@@ -127,3 +133,395 @@ def test_delete_task_success():
 def test_delete_task_not_found():
     response = client.delete("/api/v1/tasks/999")
     assert response.status_code == 404
+
+@pytest.mark.usefixtures("clear_tables")
+# 📄 Testes de listagem paginada
+def test_list_tasks_paginated():
+    for i in range(3):
+        client.post("/api/v1/tasks", json={"title": f"Task {i}", "completed": i == 1})
+
+    response = client.get("/api/v1/tasks", params={"limit": 2})
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()] == ["Task 0", "Task 1"]
+    cursor = response.headers["X-Next-Cursor"]
+    assert 'rel="next"' in response.headers["Link"]
+
+    response = client.get("/api/v1/tasks", params={"limit": 2, "after_id": cursor})
+    assert [t["title"] for t in response.json()] == ["Task 2"]
+    assert "X-Next-Cursor" not in response.headers
+
+@pytest.mark.usefixtures("clear_tables")
+def test_list_tasks_same_shape_as_get():
+    created = client.post("/api/v1/tasks", json={"title": "Única", "description": "ação"}).json()
+
+    response = client.get("/api/v1/tasks")
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [client.get(f"/api/v1/tasks/{created['id']}").json()]
+    assert "ETag" in response.headers
+
+@pytest.mark.usefixtures("clear_tables")
+def test_list_tasks_filters():
+    client.post("/api/v1/tasks", json={"title": "Alpha", "completed": True})
+    client.post("/api/v1/tasks", json={"title": "Beta"})
+
+    response = client.get("/api/v1/tasks", params={"completed": "true"})
+    assert [t["title"] for t in response.json()] == ["Alpha"]
+
+    response = client.get("/api/v1/tasks", params={"title_prefix": "Be"})
+    assert [t["title"] for t in response.json()] == ["Beta"]
+
+@pytest.mark.usefixtures("clear_tables")
+# 🧾 Negociação do formato pelo Accept
+def test_list_tasks_columnar_via_accept():
+    client.post("/api/v1/tasks", json={"title": "A", "completed": True})
+    client.post("/api/v1/tasks", json={"title": "B"})
+    as_json = client.get("/api/v1/tasks")
+
+    response = client.get("/api/v1/tasks", headers={"Accept": "application/vnd.todo.columnar+json"})
+    assert response.headers["content-type"] == "application/vnd.todo.columnar+json"
+    assert response.headers["Vary"] == "Accept"
+    columns = response.json()
+    assert columns["title"] == ["A", "B"] and columns["completed"] == [True, False]
+    assert [dict(zip(columns, values)) for values in zip(*columns.values())] == as_json.json()
+    # Cada representação tem a sua ETag
+    assert response.headers["ETag"] != as_json.headers["ETag"]
+
+@pytest.mark.usefixtures("clear_tables")
+def test_list_tasks_msgpack_via_accept():
+    msgpack = pytest.importorskip("msgpack")
+    client.post("/api/v1/tasks", json={"title": "A"})
+    response = client.get("/api/v1/tasks", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == client.get("/api/v1/tasks").json()
+
+@pytest.mark.usefixtures("clear_tables")
+def test_list_tasks_not_acceptable():
+    assert client.get("/api/v1/tasks", headers={"Accept": "text/csv"}).status_code == 406
+    # JSON com peso menor ainda é aceitável
+    response = client.get("/api/v1/tasks", headers={"Accept": "text/csv, application/json;q=0.1"})
+    assert response.status_code == 200
+
+@pytest.mark.usefixtures("clear_tables")
+def test_list_tasks_invalid_limit():
+    response = client.get("/api/v1/tasks", params={"limit": 0})
+    assert response.status_code == 422
+
+@pytest.mark.usefixtures("clear_tables")
+# 📤 Testes de exportação
+def test_export_tasks_ndjson():
+    ids = [client.post("/api/v1/tasks", json={"title": f"Task {i}"}).json()["id"] for i in range(3)]
+
+    response = client.get("/api/v1/tasks/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [t["id"] for t in lines] == ids
+
+    response = client.get("/api/v1/tasks/export", params={"after_id": ids[0]})
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ids[1:]
+
+@pytest.mark.usefixtures("clear_tables")
+def test_export_tasks_json_array():
+    response = client.get("/api/v1/tasks/export", params={"format": "json"})
+    assert response.json() == []
+
+    client.post("/api/v1/tasks", json={"title": "Only"})
+    response = client.get("/api/v1/tasks/export", params={"format": "json"})
+    assert [t["title"] for t in response.json()] == ["Only"]
+
+@pytest.mark.usefixtures("clear_tables")
+def test_export_format_from_accept():
+    for i in range(3):
+        client.post("/api/v1/tasks", json={"title": f"Task {i}"})
+
+    response = client.get("/api/v1/tasks/export", headers={"Accept": "application/json"})
+    assert [t["title"] for t in response.json()] == ["Task 0", "Task 1", "Task 2"]
+
+    response = client.get("/api/v1/tasks/export", headers={"Accept": "application/vnd.todo.columnar+x-ndjson"})
+    assert response.headers["content-type"].startswith("application/vnd.todo.columnar+x-ndjson")
+    assert json.loads(response.text.splitlines()[0])["title"] == ["Task 0", "Task 1", "Task 2"]
+
+    # format explícito vence o Accept
+    response = client.get("/api/v1/tasks/export", params={"format": "ndjson"}, headers={"Accept": "application/json"})
+    assert len(response.text.splitlines()) == 3
+    assert client.get("/api/v1/tasks/export", headers={"Accept": "image/png"}).status_code == 406
+
+@pytest.mark.usefixtures("clear_tables")
+# 📦 Testes de operações em lote
+def test_batch_create_with_invalid_item():
+    response = client.post("/api/v1/tasks:batch", json=[
+        {"title": "First"},
+        {"title": "   "},
+        {"title": "Third", "completed": True},
+    ])
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [201, 422, 201]
+    assert results[0]["task"]["title"] == "First"
+    assert "Title cannot be empty" in results[1]["error"]
+    assert len(client.get("/api/v1/tasks").json()) == 2
+
+@pytest.mark.usefixtures("clear_tables")
+def test_batch_update_and_delete():
+    task_id = client.post("/api/v1/tasks", json={"title": "Old"}).json()["id"]
+
+    response = client.patch("/api/v1/tasks:batch", json=[
+        {"id": task_id, "title": "New", "completed": True},
+        {"id": 999, "title": "Missing"},
+        {"title": "No id"},
+        {"id": True, "title": "Bool id"},
+    ])
+    assert [r["status"] for r in response.json()["results"]] == [200, 404, 422, 422]
+    assert response.json()["results"][3]["error"] == "id: Input should be a valid integer"
+    assert client.get(f"/api/v1/tasks/{task_id}").json()["title"] == "New"
+
+    # true não é o id 1
+    assert client.request("DELETE", "/api/v1/tasks:batch", json=[True]).status_code == 422
+
+    response = client.request("DELETE", "/api/v1/tasks:batch", json=[task_id, 999])
+    assert [r["status"] for r in response.json()["results"]] == [204, 404]
+    assert client.get(f"/api/v1/tasks/{task_id}").status_code == 404
+
+@pytest.mark.usefixtures("clear_tables")
+# 🏷️ Testes de requisições condicionais
+def test_get_task_not_modified():
+    created = client.post("/api/v1/tasks", json={"title": "Cached"})
+    etag = created.headers["ETag"]
+
+    response = client.get(f"/api/v1/tasks/{created.json()['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    client.put(f"/api/v1/tasks/{created.json()['id']}", json={"title": "Changed"})
+    response = client.get(f"/api/v1/tasks/{created.json()['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+@pytest.mark.usefixtures("clear_tables")
+def test_list_tasks_not_modified():
+    client.post("/api/v1/tasks", json={"title": "One"})
+    etag = client.get("/api/v1/tasks").headers["ETag"]
+
+    assert client.get("/api/v1/tasks", headers={"If-None-Match": etag}).status_code == 304
+    # Outra consulta tem outra ETag
+    assert client.get("/api/v1/tasks", params={"limit": 1}, headers={"If-None-Match": etag}).status_code == 200
+
+    client.post("/api/v1/tasks", json={"title": "Two"})
+    response = client.get("/api/v1/tasks", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+@pytest.mark.usefixtures("clear_tables")
+# 🔒 Testes de If-Match
+def test_update_task_if_match():
+    created = client.post("/api/v1/tasks", json={"title": "Shared"})
+    task_id, etag = created.json()["id"], created.headers["ETag"]
+
+    response = client.put(f"/api/v1/tasks/{task_id}", json={"title": "Mine"}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+    # A ETag fraca que a compressão devolve identifica a mesma versão
+    response = client.put(f"/api/v1/tasks/{task_id}", json={"title": "Mine"}, headers={"If-Match": 'W/' + response.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.json()["version"] == 3
+
+    # A mesma ETag agora está desatualizada
+    response = client.put(f"/api/v1/tasks/{task_id}", json={"title": "Theirs"}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert client.get(f"/api/v1/tasks/{task_id}").json()["title"] == "Mine"
+
+    response = client.put(f"/api/v1/tasks/{task_id}", json={"title": "Bad"}, headers={"If-Match": '"t999-v1"'})
+    assert response.status_code == 412
+
+    # If-Match: * vale para qualquer versão, mas só se a tarefa existir
+    response = client.put(f"/api/v1/tasks/{task_id}", json={"title": "Any"}, headers={"If-Match": "*"})
+    assert response.status_code == 200
+    response = client.put("/api/v1/tasks/999", json={"title": "Ghost"}, headers={"If-Match": "*"})
+    assert response.status_code == 412
+    assert client.put("/api/v1/tasks/999", json={"title": "Ghost"}).status_code == 404
+
+@pytest.mark.usefixtures("clear_tables")
+# 🔎 Testes de busca
+def test_search_tasks():
+    client.post("/api/v1/tasks", json={"title": "Estudar FastAPI", "description": "rotas e dependências"})
+    client.post("/api/v1/tasks", json={"title": "Estudar SQL"})
+    client.post("/api/v1/tasks", json={"title": "Correr"})
+
+    response = client.get("/api/v1/tasks/search", params={"q": "estud", "limit": 1})
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert response.headers["X-Next-Offset"] == "1"
+
+    response = client.get("/api/v1/tasks/search", params={"q": "dependencias"})
+    assert [t["title"] for t in response.json()] == ["Estudar FastAPI"]
+
+    assert client.get("/api/v1/tasks/search").status_code == 422
+
+@pytest.mark.usefixtures("clear_tables")
+# 📊 Testes de estatísticas
+def test_task_stats():
+    client.post("/api/v1/tasks", json={"title": "Done", "completed": True})
+    created = client.post("/api/v1/tasks", json={"title": "Todo"}).json()
+
+    response = client.get("/api/v1/tasks/stats")
+    assert response.status_code == 200
+    assert response.json() == {"total": 2, "completed": 1, "pending": 1}
+
+    response = client.get("/api/v1/tasks/stats", params={"group_by": "completed"})
+    assert response.json()["groups"] == [{"value": True, "count": 1}, {"value": False, "count": 1}]
+
+    etag = response.headers["ETag"]
+    response = client.get("/api/v1/tasks/stats", params={"group_by": "completed"}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.put(f"/api/v1/tasks/{created['id']}", json={"title": "Todo", "completed": True})
+    response = client.get("/api/v1/tasks/stats", params={"group_by": "completed"}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["completed"] == 2
+
+    assert client.get("/api/v1/tasks/stats", params={"group_by": "title"}).status_code == 422
+
+@pytest.mark.usefixtures("clear_tables")
+# 📡 Testes do feed de alterações
+def test_task_events_websocket_catch_up_and_live():
+    created = client.post("/api/v1/tasks", json={"title": "Antes"}).json()
+
+    with client.websocket_connect("/api/v1/tasks/events?since=0") as websocket:
+        first = websocket.receive_json()
+        assert (first["seq"], first["op"], first["task"]["title"]) == (1, "create", "Antes")
+
+        client.delete(f"/api/v1/tasks/{created['id']}")
+        live = websocket.receive_json()
+        assert (live["seq"], live["op"], live["task_id"], live["task"]) == (2, "delete", created["id"], None)
+
+def test_sse_stream_format():
+    from app.infra.changes import ChangeEvent
+    from app.interfaces.http.controllers import _sse_stream
+
+    async def batches():
+        yield [ChangeEvent(7, "update", b'{"seq":7}'), ChangeEvent(8, "delete", b'{"seq":8}')]
+        yield []
+
+    async def collect():
+        return [chunk async for chunk in _sse_stream(batches())]
+
+    assert asyncio.run(collect()) == [
+        b'id: 7\nevent: update\ndata: {"seq":7}\n\nid: 8\nevent: delete\ndata: {"seq":8}\n\n',
+        b": keep-alive\n\n",
+    ]
+
+# 🔌 Fechar o stream SSE (desconexão) fecha na hora o gerador de lotes, e com ele a assinatura
+def test_sse_stream_closes_batches():
+    from app.interfaces.http.controllers import _sse_stream
+    closed = []
+
+    async def batches():
+        try:
+            while True:
+                yield []
+        finally:
+            closed.append(True)
+
+    async def disconnect():
+        stream = _sse_stream(batches())
+        assert await stream.__anext__() == b": keep-alive\n\n"
+        await stream.aclose()
+        assert closed == [True]  # antes do fim do loop, sem esperar o coletor de lixo
+
+    asyncio.run(disconnect())
+
+@pytest.mark.usefixtures("clear_tables")
+# 🔄 Testes de sincronização incremental
+def test_sync_tasks_flow():
+    created = client.post("/api/v1/tasks", json={"title": "Antes"}).json()
+    token = client.get("/api/v1/tasks/changes").json()["token"]
+
+    client.put(f"/api/v1/tasks/{created['id']}", json={"title": "Depois"})
+    other = client.post("/api/v1/tasks", json={"title": "Outra"}).json()
+    client.delete(f"/api/v1/tasks/{other['id']}")
+
+    response = client.get("/api/v1/tasks/changes", params={"since": token})
+    assert response.status_code == 200
+    body = response.json()
+    assert [t["title"] for t in body["upserts"]] == ["Depois"]
+    assert body["deletes"] == [other["id"]]
+    assert body["has_more"] is False
+
+    response = client.get("/api/v1/tasks/changes", params={"since": body["token"] + 100})
+    assert response.status_code == 410
+
+@pytest.mark.usefixtures("clear_tables")
+def test_task_events_gone_after_compaction():
+    from datetime import datetime, timedelta, timezone
+    from app.infra.database.repository import SQLTaskRepository
+
+    client.post("/api/v1/tasks", json={"title": "Antiga"})
+    with TestingSessionLocal() as db:
+        SQLTaskRepository(db).compact_changes(datetime.now(timezone.utc) + timedelta(days=1))
+
+    assert client.get("/api/v1/tasks/events", params={"since": 0}).status_code == 410
+    assert client.get("/api/v1/tasks/changes", params={"since": 0}).status_code == 410
+
+@pytest.mark.usefixtures("clear_tables")
+def test_task_events_reject_unknown_tokens_like_changes():
+    from starlette.websockets import WebSocketDisconnect
+
+    client.post("/api/v1/tasks", json={"title": "Única"})
+    assert client.get("/api/v1/tasks/changes", params={"since": 5}).status_code == 410
+    assert client.get("/api/v1/tasks/events", params={"since": 5}).status_code == 410
+    assert client.get("/api/v1/tasks/events", headers={"Last-Event-ID": "5"}).status_code == 410
+    with client.websocket_connect("/api/v1/tasks/events?since=5") as websocket:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 4410
+
+# 🏢 Testes de isolamento por dono (X-Owner-Id)
+@pytest.mark.usefixtures("clear_tables")
+def test_owner_header_isolates_tasks():
+    acme = {"X-Owner-Id": "acme"}
+    created = client.post("/api/v1/tasks", json={"title": "Da acme"}, headers=acme).json()
+    client.post("/api/v1/tasks", json={"title": "Do dono padrão"})
+
+    assert created["owner_id"] == "acme"
+    assert [t["title"] for t in client.get("/api/v1/tasks", headers=acme).json()] == ["Da acme"]
+    assert [t["title"] for t in client.get("/api/v1/tasks").json()] == ["Do dono padrão"]
+    assert client.get(f"/api/v1/tasks/{created['id']}").status_code == 404
+    assert client.get("/api/v1/tasks/stats", headers=acme).json()["total"] == 1
+
+    # ETags da coleção não se confundem entre donos
+    assert client.get("/api/v1/tasks", headers=acme).headers["etag"] != client.get("/api/v1/tasks").headers["etag"]
+    assert client.get("/api/v1/tasks", headers={"X-Owner-Id": "acme corp"}).status_code == 422
+
+# 🔁 Testes de Idempotency-Key
+@pytest.mark.usefixtures("clear_tables")
+def test_create_task_with_idempotency_key():
+    headers = {"Idempotency-Key": "retry-123"}
+    first = client.post("/api/v1/tasks", json={"title": "Uma vez"}, headers=headers)
+    assert first.status_code == 201 and "idempotent-replayed" not in first.headers
+
+    # Retentativa atendida pelo cache do processo e, sem ele, pela tabela
+    for clear in (False, True):
+        if clear:
+            idempotency_cache.clear()
+        retry = client.post("/api/v1/tasks", json={"title": "Uma vez"}, headers=headers)
+        assert retry.status_code == 201
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert retry.json() == first.json()
+    assert len(client.get("/api/v1/tasks").json()) == 1
+
+    reused = client.post("/api/v1/tasks", json={"title": "Outra"}, headers=headers)
+    assert reused.status_code == 422
+
+@pytest.mark.usefixtures("clear_tables")
+def test_concurrent_requests_with_same_idempotency_key():
+    from concurrent.futures import ThreadPoolExecutor
+
+    def post(_):
+        return client.post("/api/v1/tasks", json={"title": "Concorrente"}, headers={"Idempotency-Key": "same"})
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(post, range(8)))
+    assert {r.status_code for r in responses} == {201}
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert len(client.get("/api/v1/tasks").json()) == 1
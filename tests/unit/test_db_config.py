@@ -22,3 +22,44 @@ def test_database_connection():
 def test_create_tables():
     # Testa a criação de tabelas (em banco de memória)
     create_tables()
+
+
+def test_performance_profile_pragmas(tmp_path):
+    from sqlalchemy import text
+    from app.infra.database.config import create_sqlite_engine
+
+    file_engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'perf.db'}", profile="performance")
+    with file_engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+    file_engine.dispose()
+
+
+def test_pragma_override_from_env(monkeypatch):
+    from app.infra.database.config import sqlite_pragmas
+
+    monkeypatch.setenv("SQLITE_BUSY_TIMEOUT", "250")
+    assert sqlite_pragmas("performance")["busy_timeout"] == "250"
+    assert sqlite_pragmas("default") == {"busy_timeout": "250"}
+
+
+def test_unknown_profile():
+    import pytest
+    from app.infra.database.config import sqlite_pragmas
+
+    with pytest.raises(ValueError):
+        sqlite_pragmas("turbo")
+
+
+def test_create_database_engine_sqlite_file(tmp_path):
+    from app.infra.database.config import DB_POOL_SIZE, create_database_engine
+
+    db_file = tmp_path / "nested" / "tasks.db"
+    file_engine = create_database_engine(f"sqlite:///{db_file}")
+    with file_engine.connect():
+        pass
+
+    assert db_file.exists()
+    assert file_engine.pool.size() == DB_POOL_SIZE
+    file_engine.dispose()
@@ -0,0 +1,97 @@
+import os
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.domain.entities import Task
+from app.domain.exceptions import VersionConflictError
+from app.infra.database.config import Base
+from app.infra.database.group_commit import GroupCommitTaskRepository, GroupCommitWriter
+from app.infra.database.repository import SQLTaskRepository
+
+
+# Arquivo SQLite temporário, ou TEST_DATABASE_URL (ex.: PostgreSQL no CI)
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    if TEST_DATABASE_URL:
+        engine = create_engine(TEST_DATABASE_URL)
+    else:
+        engine = create_engine(f"sqlite:///{tmp_path / 'group.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def writer(session_factory):
+    writer = GroupCommitWriter(session_factory, max_batch=64, max_delay=0.05)
+    yield writer
+    writer.close()
+
+
+# 📦 Escritas concorrentes saem em poucos commits e cada uma recebe o seu resultado
+def test_concurrent_writes_share_commits(session_factory, writer):
+    start = threading.Barrier(8)
+
+    def create(i: int) -> Task:
+        with session_factory() as db:
+            start.wait()
+            return GroupCommitTaskRepository(db, writer).create(Task(title=f"Task {i}"))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        created = list(pool.map(create, range(8)))
+
+    assert sorted(t.title for t in created) == [f"Task {i}" for i in range(8)]
+    assert writer.writes == 8 and writer.batches < 8
+    with session_factory() as db:
+        # Ler depois da resposta sempre encontra a escrita já confirmada
+        assert {t.id for t in SQLTaskRepository(db).list_all()} == {t.id for t in created}
+        assert SQLTaskRepository(db).collection_version() == 8
+
+
+# 🧱 A falha de uma escrita não desfaz as outras do mesmo lote
+def test_failed_write_is_isolated(session_factory, writer):
+    with session_factory() as db:
+        repo = GroupCommitTaskRepository(db, writer)
+        task = repo.create(Task(title="A"))
+        with pytest.raises(VersionConflictError):
+            repo.update(task.id, Task(title="B"), expected_version=99)
+
+    ok = writer.submit("default", "create", Task(title="Ok"))
+    broken = writer.submit("default", "missing_method")
+    assert ok.result(timeout=5).title == "Ok"
+    with pytest.raises(AttributeError):
+        broken.result(timeout=5)
+
+    with session_factory() as db:
+        assert sorted(t.title for t in SQLTaskRepository(db).list_all()) == ["A", "Ok"]
+
+
+# 🔁 Um IntegrityError no lote (mesma Idempotency-Key duas vezes) desfaz só o seu savepoint
+def test_integrity_error_does_not_redo_the_batch(session_factory, writer):
+    writes, batches = writer.writes, writer.batches
+    # Enviadas dentro do max_delay do escritor: entram no mesmo lote
+    first = writer.submit("default", "create_idempotent", Task(title="Uma vez"), "key-1", "fp")
+    second = writer.submit("default", "create_idempotent", Task(title="Uma vez"), "key-1", "fp")
+    ok = writer.submit("default", "create", Task(title="Outra"))
+    (created, replayed), (again, replayed_again) = first.result(timeout=5), second.result(timeout=5)
+    assert ok.result(timeout=5).title == "Outra"
+    assert (replayed, replayed_again) == (False, True) and again == created
+    # Aplicadas no lote, sem o refazer escrita por escrita
+    assert (writer.writes - writes, writer.batches - batches) == (3, 1)
+
+
+def test_reads_after_write_see_new_state(session_factory, writer):
+    with session_factory() as db:
+        repo = GroupCommitTaskRepository(db, writer, owner_id="acme")
+        task = repo.create(Task(title="Antes"))
+        assert repo.get_by_id(task.id).title == "Antes"
+        repo.update(task.id, Task(title="Depois"))
+        assert repo.get_by_id(task.id).title == "Depois"
+        assert repo.delete(task.id) is True
+        assert repo.get_by_id(task.id) is None
@@ -0,0 +1,196 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.domain.entities import Task
+from app.domain.exceptions import ChangeLogExpiredError, IdempotencyKeyReusedError, VersionConflictError
+from app.domain.repositories import ROW_FIELDS
+from app.infra.memory.repository import InMemoryTaskRepository
+from app.infra.memory.store import LOG_FILE, MemoryStore
+from app.infra.settings import Settings
+from app.interfaces.web.fastapi_app import create_app
+
+
+@pytest.fixture
+def store():
+    return MemoryStore()
+
+
+@pytest.fixture
+def repo(store):
+    return InMemoryTaskRepository(store)
+
+
+def test_crud(repo):
+    task = repo.create(Task(title="Memória", description="Sem banco"))
+    assert task.id == 1 and task.version == 1 and task.owner_id == "default"
+    assert repo.get_by_id(task.id).description == "Sem banco"
+
+    updated = repo.update(task.id, Task(title="Atualizada"))
+    assert (updated.title, updated.description, updated.version) == ("Atualizada", "Sem banco", 2)
+    with pytest.raises(VersionConflictError):
+        repo.update(task.id, Task(title="Velha"), expected_version=1)
+
+    assert repo.delete(task.id) is True
+    assert repo.delete(task.id) is False
+    assert repo.get_by_id(task.id) is None
+    assert repo.update(task.id, Task(title="X")) is None
+    assert repo.collection_version() == 3
+
+
+# 📑 Páginas por cursor saem das listas de ids já separadas por completed
+def test_pages_and_stats(repo):
+    repo.bulk_create([Task(title=f"Task {i}", completed=i % 2 == 0) for i in range(10)])
+    page = repo.list_page(3, completed=True)
+    assert [t.title for t in page.items] == ["Task 0", "Task 2", "Task 4"]
+    assert repo.list_page(3, after_id=page.next_cursor, completed=True).next_cursor is None
+
+    rows, cursor = repo.list_page_rows(4, title_prefix="Task 1")
+    assert [row["title"] for row in rows] == ["Task 1"] and cursor is None
+
+    repo.update(1, Task(title="Task 0", completed=False))
+    stats = repo.stats(group_by="completed")
+    assert (stats.total, stats.completed) == (10, 4)
+    assert [t.id for t in repo.list_page(10, completed=False).items] == [1, 2, 4, 6, 8, 10]
+
+
+def test_iter_rows_in_batches(repo):
+    repo.bulk_create([Task(title=f"Task {i}") for i in range(5)])
+    rows = list(repo.iter_rows(after_id=1, batch_size=2))
+    assert [dict(zip(ROW_FIELDS, row)) for row in rows] == [t.model_dump() for t in repo.list_all()[1:]]
+
+
+def test_bulk_operations(repo):
+    a, b = repo.bulk_create([Task(title="A"), Task(title="B")])
+    updated = repo.bulk_update([(a.id, Task(title="A2")), (99, Task(title="X")), (a.id, Task(completed=True, title="A3"))])
+    assert updated[1] is None
+    assert (updated[2].title, updated[2].completed, updated[2].version) == ("A3", True, 3)
+    assert repo.bulk_delete([b.id, b.id, 99]) == [True, False, False]
+    assert [t.title for t in repo.list_all()] == ["A3"]
+
+
+# 👥 Cada dono só enxerga as próprias tarefas
+def test_owners_are_isolated(store):
+    acme, other = InMemoryTaskRepository(store, "acme"), InMemoryTaskRepository(store, "other")
+    task = acme.create(Task(title="Relatório anual"))
+    assert other.get_by_id(task.id) is None
+    assert other.delete(task.id) is False
+    assert other.list_all() == [] and other.stats().total == 0
+    assert [t.id for t in acme.search("relat", 10).items] == [task.id]
+    assert other.search("relat", 10).items == []
+    assert other.changes_since(0, 10) == []
+
+
+def test_search_index_follows_writes(repo):
+    task = repo.create(Task(title="Comprar pão"))
+    assert [t.id for t in repo.search("pao", 10).items] == [task.id]
+    repo.update(task.id, Task(title="Comprar leite"))
+    assert repo.search("pao", 10).items == []
+    assert [t.title for t in repo.search("leite", 10).items] == ["Comprar leite"]
+
+
+def test_changes_and_delta(store, repo):
+    a = repo.create(Task(title="A"))
+    token = repo.changes_delta(None, 10).token
+    repo.update(a.id, Task(title="A2"))
+    b = repo.create(Task(title="B"))
+    repo.delete(b.id)
+    assert [c.op for c in repo.changes_since(0, 10)] == ["create", "update", "create", "delete"]
+
+    delta = repo.changes_delta(token, 10)
+    assert [t.title for t in delta.upserts] == ["A2"] and delta.deletes == [b.id]
+    assert delta.token == repo.last_change_seq() and not delta.has_more
+
+    page = repo.changes_delta(token, 1)
+    assert page.has_more and page.upserts[0].title == "A2"
+    with pytest.raises(ChangeLogExpiredError):
+        repo.changes_delta(repo.last_change_seq() + 1, 10)
+
+
+def test_change_log_is_bounded():
+    store = MemoryStore(change_log_size=2)
+    repo = InMemoryTaskRepository(store)
+    for i in range(6):
+        repo.create(Task(title=f"T{i}"))
+    assert store.horizon > 0
+    assert [c.seq for c in repo.changes_since(store.horizon, 10)] == list(range(store.horizon + 1, 7))
+    with pytest.raises(ChangeLogExpiredError):
+        repo.changes_delta(0, 10)
+
+
+def test_create_idempotent(repo):
+    task, replayed = repo.create_idempotent(Task(title="Uma vez"), "key-1", "fp")
+    again, replayed_again = repo.create_idempotent(Task(title="Uma vez"), "key-1", "fp")
+    assert (replayed, replayed_again) == (False, True) and again.id == task.id
+    with pytest.raises(IdempotencyKeyReusedError):
+        repo.create_idempotent(Task(title="Outra"), "key-1", "other")
+    assert len(repo.list_all()) == 1
+
+
+# 💾 O log é refeito ao reabrir; o snapshot o zera sem perder nada
+def test_persistence_replays_log_and_snapshot(tmp_path):
+    store = MemoryStore(str(tmp_path), fsync=False, snapshot_every=4)
+    repo = InMemoryTaskRepository(store, "acme")
+    first = repo.create(Task(title="Primeira"))
+    repo.create_idempotent(Task(title="Com chave"), "key-1", "fp")
+    repo.update(first.id, Task(title="Primeira v2", completed=True))
+    version = store.version
+    assert (tmp_path / "snapshot.json").exists() and (tmp_path / LOG_FILE).stat().st_size == 0
+    repo.delete(repo.create(Task(title="Temporária")).id)
+    store._log.close()  # simula uma queda: sem o snapshot do close
+
+    reopened = MemoryStore(str(tmp_path), fsync=False)
+    repo = InMemoryTaskRepository(reopened, "acme")
+    assert [(t.title, t.version) for t in repo.list_all()] == [("Primeira v2", 2), ("Com chave", 1)]
+    assert repo.stats().completed == 1
+    assert repo.create_idempotent(Task(title="Com chave"), "key-1", "fp")[1] is True
+    assert repo.create(Task(title="Nova")).id == 4
+    assert reopened.version > version
+    reopened.close()
+
+    # Depois do close tudo está no snapshot
+    assert (tmp_path / LOG_FILE).stat().st_size == 0
+    assert len(InMemoryTaskRepository(MemoryStore(str(tmp_path)), "acme").list_all()) == 3
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    store = MemoryStore(str(tmp_path), fsync=False)
+    InMemoryTaskRepository(store).create(Task(title="Inteira"))
+    store._log.write('{"op":"put","task":{"id":2,')
+    store._log.close()
+
+    recovered = MemoryStore(str(tmp_path), fsync=False)
+    repo = InMemoryTaskRepository(recovered)
+    assert [t.title for t in repo.list_all()] == ["Inteira"]
+
+    # Escritas depois da recuperação não se emendam à linha descartada
+    repo.create(Task(title="Depois 1"))
+    repo.create(Task(title="Depois 2"))
+    recovered._log.close()
+    reopened = InMemoryTaskRepository(MemoryStore(str(tmp_path), fsync=False))
+    assert [t.title for t in reopened.list_all()] == ["Inteira", "Depois 1", "Depois 2"]
+
+
+def test_data_directory_is_locked(tmp_path):
+    store = MemoryStore(str(tmp_path), fsync=False)
+    with pytest.raises(RuntimeError):
+        MemoryStore(str(tmp_path))
+    store.close()
+
+
+# 🚀 A API inteira sobre o backend em memória, sobrevivendo a um restart
+def test_app_with_memory_backend(tmp_path):
+    settings = Settings(database_url=f"sqlite:///{tmp_path / 'unused.db'}", task_backend="memory",
+                        memory_store_path=str(tmp_path / "store"))
+    with TestClient(create_app(settings)) as client:
+        created = client.post("/api/v1/tasks", json={"title": "Em memória"}, headers={"X-Owner-Id": "acme"})
+        assert created.status_code == 201
+        assert client.get("/api/v1/tasks").json() == []
+
+    with TestClient(create_app(settings)) as client:
+        tasks = client.get("/api/v1/tasks", headers={"X-Owner-Id": "acme"}).json()
+        assert [t["title"] for t in tasks] == ["Em memória"]
+    assert not (tmp_path / "unused.db").exists()
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        Settings(task_backend="redis")
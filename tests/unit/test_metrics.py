@@ -0,0 +1,129 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+from app.infra.metrics import (
+    DB_POOL_CHECKOUT_WAIT,
+    DB_QUERY_DURATION,
+    HTTP_REQUEST_DURATION,
+    LAYER_DURATION,
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    TimedProxy,
+    instrument_engine,
+    timed_pool_class,
+)
+from app.interfaces.http.responses import TimedJSONResponse
+from app.interfaces.web.middleware import MetricsMiddleware
+
+
+# 📊 Testes das primitivas
+def test_histogram_render_is_cumulative():
+    histogram = Histogram("latency_seconds", "Latência", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    lines = histogram.render()
+    assert '# TYPE latency_seconds histogram' in lines
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+
+
+def test_registry_renders_metrics_and_collectors():
+    registry = MetricsRegistry()
+    requests = registry.register(Counter("requests_total", "Requisições", ("method",)))
+    requests.inc("GET")
+    requests.inc("GET", amount=2)
+
+    def collector():
+        dynamic = Counter("dynamic_total", "Gerado na leitura")
+        dynamic.inc(amount=7)
+        return [dynamic]
+
+    registry.register_collector(collector)
+    output = registry.render()
+    assert 'requests_total{method="GET"} 3.0' in output
+    assert "dynamic_total 7.0" in output
+
+
+# 🔌 Testes da instrumentação
+def test_engine_and_pool_instrumentation(tmp_path):
+    engine = instrument_engine(create_engine(
+        f"sqlite:///{tmp_path / 'metrics.db'}", poolclass=timed_pool_class(QueuePool)
+    ))
+    selects = DB_QUERY_DURATION.count("SELECT")
+    checkouts = DB_POOL_CHECKOUT_WAIT.count()
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    assert DB_QUERY_DURATION.count("SELECT") == selects + 1
+    assert DB_POOL_CHECKOUT_WAIT.count() == checkouts + 1
+    engine.dispose()
+
+
+# 🧯 Consultas com erro não deixam entradas na pilha de início da conexão (reaproveitada pelo pool)
+def test_failed_queries_do_not_leak_start_times(tmp_path):
+    engine = instrument_engine(create_engine(f"sqlite:///{tmp_path / 'metrics.db'}"))
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+        assert conn.info["query_start"] == []
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_start"] == []
+    engine.dispose()
+
+
+def test_timed_proxy_records_layer_calls():
+    class Service:
+        label = "service"
+
+        def work(self, value):
+            return value * 2
+
+    proxy = TimedProxy(Service(), "usecase")
+    before = LAYER_DURATION.count("usecase", "work")
+
+    assert proxy.work(21) == 42
+    assert proxy.label == "service"
+    assert LAYER_DURATION.count("usecase", "work") == before + 1
+
+
+def test_middleware_records_route_template():
+    app = FastAPI(default_response_class=TimedJSONResponse)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    before = HTTP_REQUEST_DURATION.count("GET", "/items/{item_id}", "200")
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    assert HTTP_REQUEST_DURATION.count("GET", "/items/{item_id}", "200") == before + 2
+    assert HTTP_REQUEST_DURATION.count("GET", "unmatched", "404") >= 1
+
+
+def test_metrics_endpoint():
+    from app.interfaces.web.fastapi_app import app
+
+    # O lifespan cria a engine e o esquema antes da primeira requisição
+    with TestClient(app) as client:
+        client.get("/api/v1/tasks")
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/tasks",status="200"}' in response.text
+    assert "db_query_duration_seconds_bucket" in response.text
+    assert 'layer_call_duration_seconds_count{layer="usecase",method="list_tasks_rows"}' in response.text
@@ -0,0 +1,115 @@
+from sqlalchemy import create_engine, inspect, text
+from app.infra.database.migrations import upgrade_schema
+
+
+def test_upgrade_adds_missing_columns_and_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    # 🏚️ Esquema da primeira versão da aplicação
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, "
+            "description VARCHAR(500), completed BOOLEAN)"
+        ))
+        conn.execute(text("INSERT INTO tasks (title, completed) VALUES ('Old task', 0)"))
+
+    upgrade_schema(engine)
+
+    inspector = inspect(engine)
+    columns = {column["name"] for column in inspector.get_columns("tasks")}
+    assert {"version", "updated_at", "owner_id"} <= columns
+    assert "ix_tasks_owner_id_completed_id" in {index["name"] for index in inspector.get_indexes("tasks")}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version, owner_id FROM tasks")).one() == (1, "default")
+        assert conn.execute(text("SELECT version FROM task_owner_stats WHERE owner_id = 'default'")).scalar() == 0
+
+    # Rodar de novo não altera nada
+    upgrade_schema(engine)
+    engine.dispose()
+
+
+def test_upgrade_indexes_existing_rows_for_search(tmp_path):
+    from sqlalchemy.orm import Session
+    from app.infra.database.repository import SQLTaskRepository
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, "
+            "description VARCHAR(500), completed BOOLEAN)"
+        ))
+        conn.execute(text("INSERT INTO tasks (title, completed) VALUES ('Legacy searchable task', 0)"))
+
+    upgrade_schema(engine)
+
+    with Session(engine) as session:
+        page = SQLTaskRepository(session).search("searchable", limit=10)
+        assert [t.title for t in page.items] == ["Legacy searchable task"]
+    engine.dispose()
+
+
+def test_upgrade_counts_existing_rows_for_stats(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, "
+            "description VARCHAR(500), completed BOOLEAN)"
+        ))
+        conn.execute(text("INSERT INTO tasks (title, completed) VALUES ('A', 1), ('B', 0), ('C', 1)"))
+
+    upgrade_schema(engine)
+    upgrade_schema(engine)
+
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO tasks (title, completed) VALUES ('D', 0)"))
+        stats = conn.execute(text("SELECT owner_id, total, completed FROM task_owner_stats")).all()
+    assert stats == [("default", 4, 2)]
+    engine.dispose()
+
+
+def test_upgrade_starts_change_log(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, "
+            "description VARCHAR(500), completed BOOLEAN)"
+        ))
+        conn.execute(text("CREATE TABLE task_counters (name VARCHAR(50) PRIMARY KEY, value INTEGER NOT NULL)"))
+        conn.execute(text("INSERT INTO task_counters (name, value) VALUES ('version', 7)"))
+
+    upgrade_schema(engine)
+
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO tasks (title, completed) VALUES ('New', 0)"))
+        assert conn.execute(text("SELECT seq, op FROM task_changes")).all() == [(1, "create")]
+    engine.dispose()
+
+
+def test_upgrade_moves_global_stats_to_default_owner(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    # 🏚️ Versão anterior: índices sem dono, totais globais e triggers que não conhecem owner_id
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, "
+            "description VARCHAR(500), completed BOOLEAN, version INTEGER NOT NULL DEFAULT 1, updated_at DATETIME)"
+        ))
+        conn.execute(text("CREATE INDEX ix_tasks_completed_id ON tasks (completed, id)"))
+        conn.execute(text("CREATE TABLE task_counters (name VARCHAR(50) PRIMARY KEY, value INTEGER NOT NULL)"))
+        conn.execute(text("INSERT INTO task_counters (name, value) VALUES ('version', 3), ('total', 2), ('completed', 1)"))
+        conn.execute(text(
+            "CREATE TRIGGER tasks_stats_ai AFTER INSERT ON tasks BEGIN "
+            "UPDATE task_counters SET value = value + 1 WHERE name = 'total'; END"
+        ))
+        conn.execute(text("INSERT INTO tasks (title, completed) VALUES ('A', 1), ('B', 0)"))
+
+    upgrade_schema(engine)
+
+    with engine.begin() as conn:
+        assert "ix_tasks_completed_id" not in {index["name"] for index in inspect(conn).get_indexes("tasks")}
+        assert conn.execute(text("SELECT name FROM task_counters WHERE name IN ('total', 'completed', 'version')")).all() == []
+        # A versão de cada dono continua de onde a global parou
+        assert conn.execute(text("SELECT version FROM task_owner_stats WHERE owner_id = 'default'")).scalar() == 3
+        conn.execute(text("INSERT INTO tasks (title, completed, owner_id) VALUES ('C', 1, 'acme')"))
+        stats = conn.execute(text("SELECT owner_id, total, completed FROM task_owner_stats ORDER BY owner_id")).all()
+        assert stats == [("acme", 1, 1), ("default", 2, 1)]
+        assert conn.execute(text("SELECT owner_id FROM task_changes")).scalar() == "acme"
+    engine.dispose()
@@ -0,0 +1,152 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.infra import ratelimit
+from app.infra.metrics import ADMISSION_REJECTED
+from app.infra.ratelimit import (
+    AdmissionRejected, ConcurrencyLimiter, MemoryRateLimitStore, SQLiteRateLimitStore, TokenBucketLimiter,
+)
+from app.infra.settings import Settings
+from app.interfaces.http import controllers
+from app.interfaces.web import fastapi_app
+from app.interfaces.web.fastapi_app import create_app
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+# 🪣 O balde começa cheio, esvazia com a rajada e volta a encher com o tempo
+def test_memory_bucket_refills(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    store = MemoryRateLimitStore()
+    assert [store.acquire("a", rate=2, burst=3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert store.acquire("a", rate=2, burst=3) == pytest.approx(0.5)
+    assert store.acquire("b", rate=2, burst=3) == 0.0
+
+    clock.now += 0.5
+    assert store.acquire("a", rate=2, burst=3) == 0.0
+    clock.now += 60
+    assert [store.acquire("a", rate=2, burst=3) for _ in range(4)][-1] > 0
+
+
+def test_memory_store_is_bounded():
+    store = MemoryRateLimitStore(max_keys=2)
+    for key in ("a", "b", "c"):
+        store.acquire(key, rate=1, burst=1)
+    assert len(store) == 2
+    # "a" foi esquecido: volta com o balde cheio
+    assert store.acquire("a", rate=1, burst=1) == 0.0
+
+
+# 🤝 Dois workers apontando para o mesmo arquivo dividem os baldes
+def test_sqlite_store_is_shared(tmp_path):
+    path = str(tmp_path / "limits.db")
+    first, second = SQLiteRateLimitStore(path), SQLiteRateLimitStore(path)
+    assert first.acquire("a", rate=0.01, burst=2) == 0.0
+    assert second.acquire("a", rate=0.01, burst=2) == 0.0
+    assert first.acquire("a", rate=0.01, burst=2) > 0
+    assert second.acquire("b", rate=0.01, burst=2) == 0.0
+
+
+def test_invalid_limits_are_rejected():
+    with pytest.raises(ValueError):
+        TokenBucketLimiter(MemoryRateLimitStore(), rate=0)
+    with pytest.raises(ValueError):
+        ConcurrencyLimiter(max_concurrent=0)
+
+
+# 🚦 Uma vaga, uma na fila: a terceira é descartada na hora e a da fila desiste no timeout
+def test_concurrency_limiter_sheds_load():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+        assert rejected.value.reason == "queue_full"
+
+        limiter.release()
+        await waiter
+        assert (limiter.active, limiter.waiting) == (1, 0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+        assert rejected.value.reason == "timeout"
+        limiter.release()
+        async with limiter.slot():
+            assert limiter.active == 1
+        assert limiter.active == 0
+
+    before = ADMISSION_REJECTED.value("timeout")
+    asyncio.run(scenario())
+    assert ADMISSION_REJECTED.value("timeout") == before + 1
+
+
+# 🧷 Cancelada logo depois de receber a vaga, a requisição a repassa em vez de perdê-la
+def test_cancelled_waiter_does_not_leak_the_slot():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=2, queue_timeout=1.0)
+        await limiter.acquire()
+        first = asyncio.create_task(limiter.acquire())
+        second = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()  # a vaga vai para first...
+        first.cancel()  # ...que é cancelada antes de retomar
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await second
+        assert (limiter.active, limiter.waiting) == (1, 0)
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_store_defaults_to_data_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("RATE_LIMIT_BACKEND", "sqlite")
+    monkeypatch.delenv("RATE_LIMIT_PATH", raising=False)
+    monkeypatch.setattr(ratelimit, "DATA_DIR", str(tmp_path / "data"))
+    assert isinstance(ratelimit.create_rate_limit_store(), SQLiteRateLimitStore)
+    assert (tmp_path / "data" / "rate_limit.db").exists()
+
+
+# 🛑 Sem tokens, a API responde 429 com Retry-After; cada API key tem o seu balde
+def test_app_rate_limits_per_client(monkeypatch, tmp_path):
+    limiter = TokenBucketLimiter(MemoryRateLimitStore(), rate=0.01, burst=2)
+    monkeypatch.setattr(fastapi_app, "rate_limiter", limiter)
+    with TestClient(create_app(Settings(database_url=f"sqlite:///{tmp_path / 'limits.db'}"))) as client:
+        assert [client.get("/api/v1/tasks").status_code for _ in range(2)] == [200, 200]
+        limited = client.get("/api/v1/tasks")
+        assert limited.status_code == 429 and int(limited.headers["Retry-After"]) >= 1
+        assert limited.json() == {"detail": "Too many requests"}
+
+        assert client.get("/api/v1/tasks", headers={"X-API-Key": "outra"}).status_code == 200
+        assert client.get("/metrics").status_code == 200
+        assert 'rate_limit_config{parameter="burst"} 2' in client.get("/metrics").text
+
+
+# 🧯 Sem vaga na admissão, 503 com Retry-After antes de tocar no repositório
+def test_app_sheds_load_with_503(monkeypatch, tmp_path):
+    class Full:
+        async def acquire(self):
+            raise AdmissionRejected("queue_full", retry_after=2.5)
+
+    monkeypatch.setattr(controllers, "admission", Full())
+    with TestClient(create_app(Settings(database_url=f"sqlite:///{tmp_path / 'full.db'}"))) as client:
+        response = client.post("/api/v1/tasks", json={"title": "Descartada"})
+        assert response.status_code == 503 and response.headers["Retry-After"] == "3"
+
+    monkeypatch.setattr(controllers, "admission", ConcurrencyLimiter(max_concurrent=1))
+    with TestClient(create_app(Settings(database_url=f"sqlite:///{tmp_path / 'full.db'}"))) as client:
+        assert client.post("/api/v1/tasks", json={"title": "Admitida"}).status_code == 201
+        assert [t["title"] for t in client.get("/api/v1/tasks").json()] == ["Admitida"]
+    assert controllers.admission.active == 0
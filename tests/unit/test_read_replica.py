@@ -0,0 +1,108 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from app.domain.entities import Task
+from app.infra.cache import CachedTaskRepository, LRUCache
+from app.infra.database.config import create_database_engine, sqlite_read_only_url
+from app.infra.database.migrations import upgrade_schema
+from app.infra.database.repository import SQLTaskRepository
+from app.infra.settings import Settings
+from app.interfaces.http import controllers
+from app.interfaces.web.fastapi_app import create_app
+
+
+def _migrated(url: str):
+    engine = create_database_engine(url)
+    upgrade_schema(engine)
+    return engine
+
+
+# 🔀 Consultas vão à sessão de leitura; escritas e a releitura delas, ao banco principal
+def test_repository_routes_reads_to_read_session(tmp_path):
+    primary = _migrated(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = _migrated(f"sqlite:///{tmp_path / 'replica.db'}")  # réplica "atrasada": vazia
+    try:
+        with Session(primary) as db, Session(replica) as read_db:
+            repo = SQLTaskRepository(db, read_db=read_db)
+            task = repo.create(Task(title="Só no principal"))
+            assert repo.update(task.id, Task(title="Atualizada")).title == "Atualizada"
+            assert repo.get_by_id(task.id) is None
+            assert repo.list_all() == [] and repo.stats().total == 0
+            assert repo.search("atualizada", 10).items == []
+            assert SQLTaskRepository(db).get_by_id(task.id).title == "Atualizada"
+    finally:
+        primary.dispose()
+        replica.dispose()
+
+
+# 🧊 Uma réplica atrasada não regrava no cache a versão que a escrita acabou de invalidar
+def test_replica_reads_do_not_fill_the_cache(tmp_path):
+    primary = _migrated(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = _migrated(f"sqlite:///{tmp_path / 'replica.db'}")
+    cache = LRUCache(ttl=60)
+    try:
+        with Session(primary) as db, Session(replica) as read_db:
+            SQLTaskRepository(read_db).create(Task(title="Versão da réplica"))
+            task = CachedTaskRepository(SQLTaskRepository(db), cache).create(Task(title="Original"))
+            CachedTaskRepository(SQLTaskRepository(db), cache).update(task.id, Task(title="Nova"))
+
+            routed = CachedTaskRepository(SQLTaskRepository(db, read_db=read_db), cache, populate=False)
+            assert routed.get_by_id(task.id).title == "Versão da réplica"
+            assert len(cache) == 0
+            assert CachedTaskRepository(SQLTaskRepository(db), cache).get_by_id(task.id).title == "Nova"
+            assert routed.get_by_id(task.id).title == "Nova"  # acerto do cache preenchido pelo principal
+    finally:
+        primary.dispose()
+        replica.dispose()
+
+
+# 🔒 mode=ro: o pool de leitura do SQLite enxerga as escritas (WAL) mas não consegue escrever
+def test_sqlite_read_only_pool(tmp_path):
+    url = f"sqlite:///{tmp_path / 'tasks.db'}"
+    primary = _migrated(url)
+    reader = create_database_engine(sqlite_read_only_url(url), read_only=True)
+    try:
+        with Session(primary) as db, Session(reader) as read_db:
+            task = SQLTaskRepository(db).create(Task(title="Escrita"))
+            assert SQLTaskRepository(db, read_db=read_db).get_by_id(task.id).title == "Escrita"
+            with pytest.raises(OperationalError, match="readonly"):
+                SQLTaskRepository(read_db).create(Task(title="Proibida"))
+    finally:
+        primary.dispose()
+        reader.dispose()
+
+
+def test_settings_read_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'tasks.db'}"
+    assert Settings(database_url=url).read_url() is None
+    assert Settings(database_url=url, read_pool=True).read_url() == sqlite_read_only_url(url)
+    assert Settings(database_url="sqlite:///:memory:", read_pool=True).read_url() is None
+    assert Settings(database_url=url, database_read_url="sqlite:///replica.db").read_url() == "sqlite:///replica.db"
+    assert Settings(database_url="postgresql+psycopg://db/todo", read_pool=True).read_url() == "postgresql+psycopg://db/todo"
+
+
+# 🧲 Com read-your-writes, quem acabou de escrever lê do principal; os demais, da réplica
+def test_read_your_writes_stickiness(monkeypatch, tmp_path):
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    _migrated(replica_url).dispose()
+    settings = Settings(database_url=f"sqlite:///{tmp_path / 'primary.db'}", database_read_url=replica_url)
+
+    with TestClient(create_app(settings)) as client:
+        acme = {"X-Owner-Id": "acme"}
+        assert client.post("/api/v1/tasks", json={"title": "Nova"}, headers=acme).status_code == 201
+        assert client.get("/api/v1/tasks", headers=acme).json() == []
+
+        monkeypatch.setattr(controllers, "recent_writers", LRUCache(ttl=60))
+        task_id = client.post("/api/v1/tasks", json={"title": "Outra"}, headers=acme).json()["id"]
+        assert client.get(f"/api/v1/tasks/{task_id}", headers=acme).json()["title"] == "Outra"
+        assert [t["title"] for t in client.get("/api/v1/tasks", headers=acme).json()] == ["Nova", "Outra"]
+        assert client.get("/api/v1/tasks/stats", headers={"X-Owner-Id": "other"}).json()["total"] == 0
+
+
+def test_app_with_sqlite_read_pool(tmp_path):
+    settings = Settings(database_url=f"sqlite:///{tmp_path / 'tasks.db'}", read_pool=True)
+    with TestClient(create_app(settings)) as client:
+        assert client.post("/api/v1/tasks", json={"title": "Lida pelo pool ro"}).status_code == 201
+        assert [t["title"] for t in client.get("/api/v1/tasks").json()] == ["Lida pelo pool ro"]
+        assert client.get("/api/v1/tasks/export?format=ndjson").text.count("\n") == 1
@@ -1,20 +1,28 @@
+import os
 import pytest
+from types import SimpleNamespace
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.domain.entities import Task
+from app.domain.exceptions import ChangeLogExpiredError, VersionConflictError
+from app.domain.repositories import ROW_FIELDS
 from app.infra.database.models import Base, TaskModel
 from app.infra.database.repository import SQLiteTaskRepository
 
-# 🔧 Configuração do banco em memória para os testes
+# 🔧 Configuração do banco para os testes: em memória, ou TEST_DATABASE_URL (ex.: PostgreSQL no CI)
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///:memory:")
+
 @pytest.fixture(scope="function")
 def db_session():
-    engine = create_engine("sqlite:///:memory:")
+    engine = create_engine(TEST_DATABASE_URL)
     Base.metadata.create_all(engine)
     Session = sessionmaker(bind=engine)
     session = Session()
     yield session
     session.rollback()
     session.close()
+    Base.metadata.drop_all(engine)
+    engine.dispose()
 
 @pytest.fixture
 def repo(db_session):
@@ -93,3 +101,402 @@ def test_delete_task_success(repo, db_session, sample_task):
 # ✅ Teste de exclusão com ID inexistente
 def test_delete_task_not_found(repo):
     assert repo.delete(999) is False
+
+# 📄 Testes de paginação por cursor
+def test_list_page_rows_keyset(repo):
+    for i in range(5):
+        repo.create(Task(title=f"Task {i}"))
+
+    first, cursor = repo.list_page_rows(limit=2)
+    assert [row["title"] for row in first] == ["Task 0", "Task 1"]
+    assert cursor == first[-1]["id"]
+
+    second, cursor = repo.list_page_rows(limit=2, after_id=cursor)
+    assert [row["title"] for row in second] == ["Task 2", "Task 3"]
+
+    last, cursor = repo.list_page_rows(limit=2, after_id=cursor)
+    assert [row["title"] for row in last] == ["Task 4"]
+    assert cursor is None
+
+def test_list_page_rows_filters(repo):
+    repo.create(Task(title="Buy milk", completed=True))
+    repo.create(Task(title="Buy bread"))
+    repo.create(Task(title="Call mom", completed=True))
+
+    done, _ = repo.list_page_rows(limit=10, completed=True)
+    assert [row["title"] for row in done] == ["Buy milk", "Call mom"]
+
+    buy, _ = repo.list_page_rows(limit=10, title_prefix="Buy")
+    assert [row["title"] for row in buy] == ["Buy milk", "Buy bread"]
+
+    both, _ = repo.list_page_rows(limit=10, completed=False, title_prefix="Buy")
+    assert [row["title"] for row in both] == ["Buy bread"]
+
+def test_list_page_rows_are_task_dicts(repo):
+    for i in range(5):
+        repo.create(Task(title=f"Task {i}", description="d", completed=i % 2 == 0))
+
+    rows, next_cursor = repo.list_page_rows(limit=2, completed=True)
+    assert rows == [repo.get_by_id(row["id"]).model_dump() for row in rows]
+    assert list(rows[0]) == list(Task.model_fields)
+    assert next_cursor == rows[-1]["id"]
+
+    rows, next_cursor = repo.list_page_rows(limit=2, after_id=next_cursor, completed=True)
+    assert [row["title"] for row in rows] == ["Task 4"]
+    assert next_cursor is None
+
+# 📤 Teste de iteração para exportação
+def test_iter_all_resumes_after_id(repo):
+    created = [repo.create(Task(title=f"Task {i}")) for i in range(4)]
+
+    assert [t.id for t in repo.iter_all(batch_size=2)] == [t.id for t in created]
+    assert [t.title for t in repo.iter_all(after_id=created[1].id)] == ["Task 2", "Task 3"]
+
+# 🗜️ Leitura compacta: tuplas na ordem de ROW_FIELDS, sem Task por linha
+def test_iter_rows_matches_iter_all(repo):
+    created = [repo.create(Task(title=f"Task {i}", completed=i == 1)) for i in range(3)]
+    rows = list(repo.iter_rows(batch_size=2))
+
+    assert [dict(zip(ROW_FIELDS, row)) for row in rows] == [task.model_dump() for task in repo.iter_all()]
+    assert [row[0] for row in repo.iter_rows(after_id=created[0].id)] == [t.id for t in created[1:]]
+
+# 📦 Testes de operações em lote
+def test_bulk_create(repo, db_session):
+    created = repo.bulk_create([Task(title="A"), Task(title="B", completed=True)])
+
+    assert [t.title for t in created] == ["A", "B"]
+    assert all(t.id is not None for t in created)
+    assert db_session.query(TaskModel).count() == 2
+
+def test_bulk_update_reports_missing(repo, sample_task):
+    result = repo.bulk_update([
+        (sample_task.id, Task(title="Renamed", completed=True)),
+        (999, Task(title="Missing")),
+    ])
+
+    assert result[0].title == "Renamed"
+    assert result[0].completed is True
+    assert result[1] is None
+
+def test_bulk_delete(repo, sample_task):
+    assert repo.bulk_delete([sample_task.id, 999, sample_task.id]) == [True, False, False]
+    assert repo.get_by_id(sample_task.id) is None
+
+# 🔌 Caminho genérico para dialetos sem RETURNING
+@pytest.fixture
+def repo_without_returning(db_session):
+    repo = SQLiteTaskRepository(db_session)
+    repo.dialect = SimpleNamespace(
+        insert_returning=False,
+        update_returning=False,
+        delete_returning=False,
+        insert_executemany_returning_sort_by_parameter_order=False,
+    )
+    return repo
+
+def test_crud_without_returning(repo_without_returning):
+    repo = repo_without_returning
+    created = repo.create(Task(title="Plain"))
+    assert created.id is not None
+
+    updated = repo.update(created.id, Task(title="Plain updated", completed=True))
+    assert updated.title == "Plain updated"
+    assert repo.update(999, Task(title="Missing")) is None
+
+    bulk = repo.bulk_create([Task(title="A"), Task(title="B")])
+    assert [t.title for t in bulk] == ["A", "B"]
+    assert repo.bulk_delete([bulk[0].id, 999]) == [True, False]
+    assert repo.delete(created.id) is True
+
+# 🏷️ Testes de versão
+def test_update_increments_version(repo):
+    created = repo.create(Task(title="Versioned"))
+    assert created.version == 1
+    assert created.updated_at is not None
+
+    updated = repo.update(created.id, Task(title="Versioned 2"))
+    assert updated.version == 2
+
+    repo.bulk_update([(created.id, Task(title="Versioned 3"))])
+    assert repo.get_by_id(created.id).version == 3
+
+def test_collection_version_changes_on_writes(repo):
+    start = repo.collection_version()
+    created = repo.create(Task(title="A"))
+    repo.update(created.id, Task(title="B"))
+    repo.update(999, Task(title="Missing"))
+    repo.delete(created.id)
+    repo.delete(created.id)
+
+    assert repo.collection_version() == start + 3
+
+# 🏷️ A versão é de cada dono: escritas de outro dono não invalidam as ETags deste
+def test_collection_version_is_per_owner(repo, db_session):
+    start = repo.collection_version()
+    other = SQLiteTaskRepository(db_session, owner_id="acme")
+    other.create(Task(title="Outro dono"))
+
+    assert repo.collection_version() == start
+    assert other.collection_version() == 1
+
+# 🔒 Testes de concorrência otimista
+def test_update_with_expected_version(repo):
+    created = repo.create(Task(title="Hot row"))
+
+    updated = repo.update(created.id, Task(title="First writer"), expected_version=1)
+    assert updated.version == 2
+
+    with pytest.raises(VersionConflictError):
+        repo.update(created.id, Task(title="Second writer"), expected_version=1)
+    assert repo.get_by_id(created.id).title == "First writer"
+
+    assert repo.update(999, Task(title="Missing"), expected_version=1) is None
+
+# 🔎 Testes de busca textual
+@pytest.fixture
+def search_data(repo):
+    repo.bulk_create([
+        Task(title="Comprar leite", description="no mercado"),
+        Task(title="Ligar para o mercado", description="confirmar entrega do leite"),
+        Task(title="Pagar contas"),
+    ])
+    return repo
+
+def test_search_ranked_with_prefix(search_data):
+    page = search_data.search("leite", limit=10)
+    assert [t.title for t in page.items] == ["Comprar leite", "Ligar para o mercado"]
+
+    page = search_data.search("merc", limit=1)
+    assert [t.title for t in page.items] == ["Ligar para o mercado"]
+    assert page.next_cursor == 1
+    assert [t.title for t in search_data.search("merc", limit=1, offset=1).items] == ["Comprar leite"]
+
+def test_search_follows_writes(search_data):
+    task = search_data.search("contas", limit=10).items[0]
+    search_data.update(task.id, Task(title="Pagar boletos"))
+
+    assert search_data.search("contas", limit=10).items == []
+    assert [t.id for t in search_data.search("boletos", limit=10).items] == [task.id]
+
+    search_data.delete(task.id)
+    assert search_data.search("boletos", limit=10).items == []
+
+def test_search_fallback_without_fts(search_data, monkeypatch):
+    monkeypatch.setattr(search_data, "_has_fts", lambda: False)
+
+    page = search_data.search("leite", limit=10)
+    assert [t.title for t in page.items] == ["Comprar leite", "Ligar para o mercado"]
+
+    search_data.create(Task(title="Leite condensado"))
+    assert len(search_data.search("leite", limit=10).items) == 3
+
+# 🧩 Depois da primeira busca, o índice invertido só recebe as alterações do log, sem ser refeito
+def test_search_fallback_applies_changes_incrementally(search_data, monkeypatch):
+    from datetime import datetime, timedelta, timezone
+    monkeypatch.setattr(search_data, "_has_fts", lambda: False)
+    assert len(search_data.search("leite", limit=10).items) == 2
+
+    def no_rebuild(*args, **kwargs):
+        raise AssertionError("índice refeito do zero")
+
+    monkeypatch.setattr(search_data, "iter_all", no_rebuild)
+    created = search_data.create(Task(title="Leite condensado"))
+    paid = search_data.search("contas", limit=10).items[0]
+    search_data.update(paid.id, Task(title="Pagar boletos"))
+    search_data.delete(created.id)
+    SQLiteTaskRepository(search_data.db, owner_id="acme").create(Task(title="Leite da acme"))
+
+    assert [t.title for t in search_data.search("leite", limit=10).items] == ["Comprar leite", "Ligar para o mercado"]
+    assert search_data.search("contas", limit=10).items == []
+    assert [t.id for t in search_data.search("boletos", limit=10).items] == [paid.id]
+
+    # Alterações pendentes já compactadas: aí sim o índice é refeito
+    monkeypatch.undo()
+    monkeypatch.setattr(search_data, "_has_fts", lambda: False)
+    search_data.create(Task(title="Leite em pó"))
+    search_data.compact_changes(datetime.now(timezone.utc) + timedelta(days=1))
+    assert len(search_data.search("leite", limit=10).items) == 3
+
+# 📊 Testes de estatísticas mantidas por triggers
+def test_stats_follow_writes(repo, db_session):
+    first = repo.create(Task(title="A", completed=True))
+    second = repo.create(Task(title="B"))
+    repo.bulk_create([Task(title="C"), Task(title="D", completed=True)])
+    assert repo.stats().model_dump(exclude_none=True) == {"total": 4, "completed": 2, "pending": 2}
+
+    repo.update(second.id, Task(title="B", completed=True))
+    repo.update(second.id, Task(title="B2", completed=True))
+    repo.delete(first.id)
+    stats = repo.stats(group_by="completed")
+    assert (stats.total, stats.completed, stats.pending) == (3, 2, 1)
+    assert [(g.value, g.count) for g in stats.groups] == [(True, 2), (False, 1)]
+
+    # Escritas fora do repositório também são contadas
+    db_session.query(TaskModel).filter(TaskModel.completed.is_(True)).delete()
+    db_session.commit()
+    assert repo.stats().model_dump(exclude_none=True) == {"total": 1, "completed": 0, "pending": 1}
+
+def test_stats_without_counters_falls_back_to_count(repo, db_session):
+    from app.infra.database.models import TaskOwnerStatsModel
+    repo.bulk_create([Task(title="A", completed=True), Task(title="B")])
+    db_session.query(TaskOwnerStatsModel).delete()
+    db_session.commit()
+
+    assert (repo.stats().total, repo.stats().completed) == (2, 1)
+
+# 📰 Testes do log de alterações
+def test_change_log_records_every_write(repo):
+    task = repo.create(Task(title="A"))
+    repo.update(task.id, Task(title="A2", completed=True))
+    others = repo.bulk_create([Task(title="B"), Task(title="C")])
+    repo.bulk_delete([task.id, others[0].id])
+
+    changes = repo.changes_since(0, limit=100)
+    assert [(c.op, c.task_id) for c in changes[:4]] == [
+        ("create", task.id), ("update", task.id), ("create", others[0].id), ("create", others[1].id),
+    ]
+    # Dentro de um mesmo DELETE, a ordem das linhas é a do plano de execução
+    assert sorted((c.op, c.task_id) for c in changes[4:]) == [("delete", task.id), ("delete", others[0].id)]
+    assert [c.seq for c in changes] == list(range(1, 7))
+    assert changes[1].task.title == "A2" and changes[1].task.completed and changes[1].task.version == 2
+    assert changes[-1].task is None
+    assert repo.last_change_seq() == 6
+
+    assert [c.seq for c in repo.changes_since(4, limit=1)] == [5]
+
+# 🚦 PostgreSQL: a seq é atribuída no commit; uma transação aberta não bloqueia as demais escritas
+@pytest.mark.skipif(not TEST_DATABASE_URL.startswith("postgresql"), reason="concorrência real só no PostgreSQL")
+def test_change_seq_follows_commit_order_without_blocking(db_session):
+    from sqlalchemy import text
+    engine = db_session.get_bind()
+    with sessionmaker(bind=engine)() as first, sessionmaker(bind=engine)() as second:
+        SQLiteTaskRepository(first, owner_id="acme", autocommit=False).create(Task(title="Lenta"))
+        second.execute(text("SET lock_timeout = '1s'"))
+        SQLiteTaskRepository(second).create(Task(title="Rápida"))  # não espera a transação aberta
+        first.commit()
+
+    from app.infra.database.repository import read_change_log
+    assert [(c.seq, c.task.title) for c in read_change_log(db_session, 0, 10)] == [(1, "Rápida"), (2, "Lenta")]
+
+# 🔄 Testes de sincronização incremental
+def test_changes_delta_returns_latest_state_and_tombstones(repo):
+    removed = repo.create(Task(title="Removed"))
+    kept = repo.create(Task(title="Kept"))
+    token = repo.changes_delta(None, limit=10).token
+
+    repo.update(kept.id, Task(title="Kept v2"))
+    repo.update(kept.id, Task(title="Kept v3", completed=True))
+    repo.delete(removed.id)
+    added = repo.create(Task(title="Added"))
+
+    delta = repo.changes_delta(token, limit=10)
+    assert [(t.id, t.title, t.version) for t in delta.upserts] == [(kept.id, "Kept v3", 3), (added.id, "Added", 1)]
+    assert delta.deletes == [removed.id]
+    assert (delta.token, delta.has_more) == (repo.last_change_seq(), False)
+
+    first = repo.changes_delta(token, limit=2)
+    assert first.has_more and len(first.upserts) + len(first.deletes) == 2
+    rest = repo.changes_delta(first.token, limit=2)
+    assert [t.title for t in rest.upserts] == ["Added"] and not rest.has_more
+
+    assert repo.changes_delta(delta.token, limit=10).upserts == []
+
+def test_compaction_expires_old_tokens(repo):
+    from datetime import datetime, timedelta, timezone
+    repo.create(Task(title="Old"))
+    repo.create(Task(title="Older"))
+    head = repo.last_change_seq()
+
+    assert repo.compact_changes(datetime.now(timezone.utc) + timedelta(days=1)) == 2
+    assert repo.change_horizon() == head
+    assert repo.changes_since(0, limit=10) == []
+
+    with pytest.raises(ChangeLogExpiredError):
+        repo.changes_delta(0, limit=10)
+    with pytest.raises(ChangeLogExpiredError):
+        repo.changes_delta(head + 1, limit=10)
+    assert repo.changes_delta(head, limit=10).upserts == []
+    assert repo.compact_changes(datetime.now(timezone.utc) + timedelta(days=1)) == 0
+
+# 🧹 As escritas não compactam nada: a manutenção roda à parte, em uma transação própria
+def test_maintenance_runs_apart_from_writes(repo, db_session, monkeypatch):
+    from app.infra.database import repository as repository_module
+    monkeypatch.setattr(repository_module, "CHANGE_LOG_RETENTION_DAYS", -1)
+    repo.create(Task(title="Confirmada"))
+    SQLiteTaskRepository(db_session, autocommit=False).create(Task(title="Pendente"))
+    db_session.commit()
+    assert len(repo.changes_since(0, limit=10)) == 2
+
+    repo.run_maintenance()
+    assert repo.changes_since(0, limit=10) == [] and repo.change_horizon() == 2
+
+
+# ⏱️ O loop de manutenção roda a cada intervalo, registra falhas e para quando sinalizado
+def test_maintenance_loop(db_session, monkeypatch, caplog):
+    import asyncio
+    from sqlalchemy.exc import OperationalError
+    from app.infra.database import maintenance
+    engine, runs = db_session.get_bind(), []
+
+    def run_maintenance(self):
+        runs.append(self.db.get_bind())
+        if len(runs) == 1:
+            raise OperationalError("DELETE FROM task_changes", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(SQLiteTaskRepository, "run_maintenance", run_maintenance)
+
+    async def scenario():
+        stop = asyncio.Event()
+        loop = asyncio.create_task(maintenance.maintenance_loop([engine], stop, interval=0.01))
+        while len(runs) < 2:
+            await asyncio.sleep(0.01)
+        stop.set()
+        await asyncio.wait_for(loop, 1)
+
+    with caplog.at_level("ERROR", logger="app.infra.database.maintenance"):
+        asyncio.run(scenario())
+    assert runs[:2] == [engine, engine]
+    assert "Database maintenance failed" in caplog.text
+
+# 🏢 Testes de isolamento por dono
+def test_owners_only_see_their_own_tasks(db_session):
+    acme, globex = SQLiteTaskRepository(db_session, "acme"), SQLiteTaskRepository(db_session, "globex")
+    mine = acme.create(Task(title="Relatório acme", completed=True))
+    acme.bulk_create([Task(title="Relatório acme 2")])
+    theirs = globex.create(Task(title="Relatório globex"))
+    assert (mine.owner_id, theirs.owner_id) == ("acme", "globex")
+
+    assert globex.get_by_id(mine.id) is None
+    assert globex.update(mine.id, Task(title="Invadido")) is None
+    assert globex.delete(mine.id) is False
+    assert globex.bulk_delete([mine.id]) == [False]
+    assert [row["title"] for row in acme.list_page_rows(limit=10)[0]] == ["Relatório acme", "Relatório acme 2"]
+    assert [t.title for t in globex.search("relatório", limit=10).items] == ["Relatório globex"]
+
+    assert (acme.stats().total, acme.stats().completed) == (2, 1)
+    assert (globex.stats().total, globex.stats().completed) == (1, 0)
+    assert [c.task_id for c in globex.changes_since(0, limit=10)] == [theirs.id]
+    assert globex.changes_delta(0, limit=10).upserts == [theirs]
+
+# 🔁 Testes de idempotência
+def test_create_idempotent_replays_original(repo, db_session):
+    from datetime import datetime, timedelta, timezone
+    from app.domain.exceptions import IdempotencyKeyReusedError
+    from app.infra.database.models import IdempotencyKeyModel
+
+    created, replayed = repo.create_idempotent(Task(title="Uma vez"), "key-1", "fp-1")
+    assert not replayed
+    repo.update(created.id, Task(title="Alterada"))
+
+    again, replayed = repo.create_idempotent(Task(title="Uma vez"), "key-1", "fp-1")
+    assert replayed and again == created
+    assert len(repo.list_all()) == 1
+    with pytest.raises(IdempotencyKeyReusedError):
+        repo.create_idempotent(Task(title="Outra"), "key-1", "fp-2")
+
+    # A mesma chave em outro dono é outra chave; uma chave expirada pode ser reutilizada
+    assert not SQLiteTaskRepository(db_session, "acme").create_idempotent(Task(title="X"), "key-1", "fp-1")[1]
+    db_session.query(IdempotencyKeyModel).update({"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)})
+    db_session.commit()
+    assert not repo.create_idempotent(Task(title="Uma vez"), "key-1", "fp-1")[1]
+    assert len(repo.list_all()) == 2
@@ -0,0 +1,43 @@
+import json
+from datetime import datetime
+from app.interfaces.http import responses
+from app.interfaces.http.responses import FastJSONResponse, encode_rows
+
+ROWS = [{"id": 1, "title": "Ação", "completed": False, "updated_at": datetime(2024, 5, 1, 12, 30, 15, 250)}]
+
+
+# ⚡ Codificação direta de linhas com datetime
+def test_fast_json_response_encodes_rows():
+    body = FastJSONResponse(ROWS).body
+    assert json.loads(body) == [
+        {"id": 1, "title": "Ação", "completed": False, "updated_at": "2024-05-01T12:30:15.000250"}
+    ]
+
+
+# 🔁 Sem orjson, o json padrão produz o mesmo documento
+def test_fast_json_response_fallback_without_orjson(monkeypatch):
+    expected = json.loads(FastJSONResponse(ROWS).body)
+    monkeypatch.setattr(responses, "orjson", None)
+    assert json.loads(FastJSONResponse(ROWS).body) == expected
+
+
+# 🧱 Linhas em tuplas viram o mesmo documento, em pedaços por lote
+def test_encode_rows_in_batches():
+    fields = ("id", "title")
+    rows = [(i, f"Task {i}") for i in range(5)]
+    chunks = list(encode_rows(rows, fields, "json", batch_size=2))
+    assert len(chunks) == 4
+    assert json.loads(b"".join(chunks)) == [dict(zip(fields, row)) for row in rows]
+    assert b"".join(encode_rows([], fields, "json")) == b"[]"
+
+    lines = b"".join(encode_rows(rows, fields, "ndjson", batch_size=2)).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == list(range(5))
+    assert list(encode_rows([], fields, "ndjson")) == []
+
+    # Texto que imita o fim de um objeto ou uma quebra de linha não quebra a linha
+    tricky = [(1, '},{"id":2'), (2, 'a\\'), (3, "}\n{")]
+    lines = b"".join(encode_rows(tricky, fields, "ndjson")).splitlines()
+    assert [tuple(json.loads(line).values()) for line in lines] == tricky
+    nested = [({"id": 1}, [{"id": 2}]), ({"id": 3}, [])]
+    lines = b"".join(encode_rows(nested, fields, "ndjson")).splitlines()
+    assert [tuple(json.loads(line).values()) for line in lines] == nested
@@ -1,6 +1,7 @@
 from fastapi.testclient import TestClient
 from app.interfaces.http.routes import router
 from fastapi import APIRouter
+from fastapi.routing import APIRoute
 
 def test_router_initialization():
     """
@@ -16,16 +17,17 @@ def test_task_router_inclusion():
     """
     Testa se o roteador de tarefas foi incluído corretamente
     """
-    # Verifica se há exatamente 5 rotas (como mostrado no erro)
-    assert len(router.routes) == 5
+    # Verifica se há exatamente 14 rotas (CRUD + busca + estatísticas + sincronização + exportação + feed SSE/WebSocket + lotes)
+    assert len(router.routes) == 14
     
     # Verifica o prefixo nas rotas existentes
     for route in router.routes:
         assert route.path.startswith("/tasks/api/v1/tasks")
     
-    # Verifica as tags
+    # Verifica as tags (rotas WebSocket não têm tags)
     for route in router.routes:
-        assert "Tasks" in route.tags
+        if isinstance(route, APIRoute):
+            assert "Tasks" in route.tags
 
 def test_routes_with_fastapi_app():
     """
@@ -0,0 +1,38 @@
+from app.domain.entities import Task
+from app.infra.search import InvertedIndex, fts5_query, tokenize
+
+
+def test_tokenize_normalizes_case_and_accents():
+    assert tokenize("Revisão do Relatório, URGENTE!") == ["revisao", "do", "relatorio", "urgente"]
+    assert tokenize(None) == []
+
+
+def test_fts5_query_quotes_terms_as_prefixes():
+    assert fts5_query('buy "milk" OR') == '"buy"* "milk"* "or"*'
+    assert fts5_query("   !!! ") is None
+
+
+def test_inverted_index_prefix_and_ranking():
+    index = InvertedIndex([
+        Task(id=1, title="Comprar leite", description="no mercado"),
+        Task(id=2, title="Ligar para o mercado", description="confirmar entrega do leite"),
+        Task(id=3, title="Pagar contas"),
+    ])
+
+    # Termo no título pesa mais que na descrição
+    assert index.search("leite", limit=10) == [1, 2]
+    assert index.search("merc", limit=10) == [2, 1]
+    assert index.search("leite merc", limit=10) == [1, 2]
+    assert index.search("leite contas", limit=10) == []
+    assert index.search("leite", limit=1, offset=1) == [2]
+
+
+def test_inverted_index_updates():
+    index = InvertedIndex([Task(id=1, title="Old title")])
+    index.add(Task(id=1, title="New title"))
+    index.add(Task(id=2, title="Another"))
+    index.remove(2)
+
+    assert index.search("old", limit=10) == []
+    assert index.search("new", limit=10) == [1]
+    assert index.search("another", limit=10) == []
@@ -0,0 +1,28 @@
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
+from app.domain.entities import Task
+from app.infra.database.models import TaskModel
+from app.infra.database.repository import SQLTaskRepository
+from app.infra.database.sharding import ShardRouter
+
+
+# 🧭 O dono sempre cai no mesmo shard e cada shard guarda só os seus donos
+def test_shard_router_is_stable_and_isolated(tmp_path):
+    urls = [f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(3)]
+    router = ShardRouter(urls)
+    router.upgrade()
+    try:
+        assert all(inspect(engine).has_table("tasks") for engine in router.engines)
+        owners = [f"owner-{i}" for i in range(20)]
+        assert [router.shard_for(o) for o in owners] == [ShardRouter(urls).shard_for(o) for o in owners]
+        assert len({router.shard_for(o) for o in owners}) == 3
+
+        for owner in owners:
+            with router.session_for(owner) as db:
+                SQLTaskRepository(db, owner).create(Task(title=f"Tarefa de {owner}"))
+        for index, engine in enumerate(router.engines):
+            with Session(engine) as db:
+                stored = set(db.scalars(select(TaskModel.owner_id)))
+            assert stored == {o for o in owners if router.shard_for(o) == index}
+    finally:
+        router.dispose()
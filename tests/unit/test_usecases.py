@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import Mock, create_autospec
 from app.domain.entities import Task
+from app.domain.exceptions import ChangeLogExpiredError, VersionConflictError
 from app.domain.repositories import TaskRepository
 from app.usecases.task_usecases import TaskUseCases
 
@@ -73,24 +74,32 @@ class TestTaskUseCases:
         updated_task = Task(id=1, **updated_data)
         
         mock_repo.update.return_value = updated_task
-        mock_repo.get_by_id.return_value = sample_task
         
         usecase = TaskUseCases(mock_repo)
         result = usecase.update_task(1, updated_task)
         
-        mock_repo.update.assert_called_once_with(1, updated_task)
+        # Atualização em uma única ida ao repositório, sem busca prévia
+        mock_repo.update.assert_called_once_with(1, updated_task, expected_version=None)
+        mock_repo.get_by_id.assert_not_called()
         assert result == updated_task
 
     def test_update_task_not_found(self, mock_repo):
-        mock_repo.get_by_id.return_value = None
+        mock_repo.update.return_value = None
         usecase = TaskUseCases(mock_repo)
         task_to_update = Task(id=99, title="Should fail")
         
         result = usecase.update_task(99, task_to_update)
         
         assert result is None
-        mock_repo.get_by_id.assert_called_once_with(99)
-        mock_repo.update.assert_not_called()
+        mock_repo.update.assert_called_once_with(99, task_to_update, expected_version=None)
+        mock_repo.get_by_id.assert_not_called()
+
+    def test_update_task_version_conflict(self, mock_repo):
+        mock_repo.update.side_effect = VersionConflictError(1, 3)
+        usecase = TaskUseCases(mock_repo)
+
+        with pytest.raises(VersionConflictError):
+            usecase.update_task(1, Task(title="Stale"), expected_version=3)
 
     # Testes para delete_task
     def test_delete_task_success(self, mock_repo):
@@ -129,4 +138,12 @@ class TestTaskUseCases:
         
         mock_repo.list_all.assert_called_once()
         assert len(result) == 1
-        assert result[0] == sample_task
\ No newline at end of file
+        assert result[0] == sample_task
+
+    def test_check_change_token_delegates_to_repository(self, mock_repo):
+        mock_repo.check_change_token.side_effect = ChangeLogExpiredError(1, 2)
+        usecase = TaskUseCases(mock_repo)
+
+        with pytest.raises(ChangeLogExpiredError):
+            usecase.check_change_token(1)
+        mock_repo.check_change_token.assert_called_once_with(1)